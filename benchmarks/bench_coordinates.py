@@ -0,0 +1,64 @@
+"""Cost of the WGS84 -> GCJ02 -> BD09 transforms done on every poll.
+
+Compares converting each position with the scalar helpers against the
+batch helpers, which use numpy when it is installed. That both give the
+same coordinates is checked by tests/test_helper.py.
+
+    python benchmarks/bench_coordinates.py
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import random
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.ha_traccar import helper  # noqa: E402
+from custom_components.ha_traccar.helper import (  # noqa: E402
+    gcj02_to_bd09,
+    gcj02_to_bd09_batch,
+    wgs84togcj02,
+    wgs84togcj02_batch,
+)
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def make_points(size):
+    """Return coordinates across China plus a few outside of it."""
+    rng = random.Random(size)
+    lngs = [rng.uniform(73.0, 135.0) for _ in range(size)]
+    lats = [rng.uniform(18.0, 53.0) for _ in range(size)]
+    for i in range(0, size, 10):
+        lngs[i], lats[i] = rng.uniform(-180.0, 70.0), rng.uniform(-60.0, 80.0)
+    return lngs, lats
+
+
+def scalar(lngs, lats):
+    gcj = [wgs84togcj02(lng, lat) for lng, lat in zip(lngs, lats)]
+    bd = [gcj02_to_bd09(lng, lat) for lng, lat in gcj]
+    return gcj, bd
+
+
+def batch(lngs, lats):
+    gcj = wgs84togcj02_batch(lngs, lats)
+    return gcj, gcj02_to_bd09_batch(*gcj)
+
+
+def main():
+    print(f"numpy: {'yes' if helper.np is not None else 'no'}")
+    print(f"{'points':>8} {'scalar us/pt':>13} {'batch us/pt':>12} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        lngs, lats = make_points(size)
+        runs = max(3, 20000 // size)
+        scalar_s = timeit.timeit(lambda: scalar(lngs, lats), number=runs)
+        batch_s = timeit.timeit(lambda: batch(lngs, lats), number=runs)
+        scalar_us = scalar_s / runs / size * 1e6
+        batch_us = batch_s / runs / size * 1e6
+        print(f"{size:>8} {scalar_us:>13.3f} {batch_us:>12.3f} {scalar_us / batch_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
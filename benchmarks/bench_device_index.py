@@ -0,0 +1,64 @@
+"""Per-poll cost of joining positions to devices against fleet size.
+
+Compares the former linear scan (`next(dev for dev in devices ...)` per
+position) with the id-indexed DeviceIndex, including the incremental
+refresh from a full `get_devices()` list that every poll performs.
+
+    python benchmarks/bench_device_index.py
+"""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import timeit
+
+from pytraccar import DeviceModel, PositionModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.ha_traccar.devices import DeviceIndex  # noqa: E402
+
+FLEET_SIZES = (10, 100, 1000, 5000)
+
+
+def make_fleet(size):
+    """Return devices and positions for a synthetic fleet."""
+    devices = [
+        DeviceModel.construct(id=i, name=f"car{i}", unique_id=f"u{i}", status="online")
+        for i in range(size)
+    ]
+    positions = [
+        PositionModel.construct(id=1000 + i, device_id=i, latitude=31.2, longitude=121.5)
+        for i in reversed(range(size))
+    ]
+    return devices, positions
+
+
+def linear_join(devices, positions):
+    for position in positions:
+        next((dev for dev in devices if dev.id == position.device_id), None)
+
+
+def indexed_join(index, devices, positions):
+    index.refresh(devices)
+    for position in positions:
+        index.get(position.device_id)
+
+
+def main():
+    print(f"{'devices':>8} {'linear ms/poll':>15} {'indexed ms/poll':>16} {'speedup':>8}")
+    for size in FLEET_SIZES:
+        devices, positions = make_fleet(size)
+        index = DeviceIndex()
+        index.refresh(devices)
+        runs = max(1, 20000 // size)
+        linear_runs = max(1, runs // max(1, size // 100))
+        linear = timeit.timeit(lambda: linear_join(devices, positions), number=linear_runs)
+        indexed = timeit.timeit(lambda: indexed_join(index, devices, positions), number=runs)
+        linear_ms = linear / linear_runs * 1000
+        indexed_ms = indexed / runs * 1000
+        print(f"{size:>8} {linear_ms:>15.3f} {indexed_ms:>16.3f} {linear_ms / indexed_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Cost of picking the new events out of overlapping Traccar event queries.
+
+Simulates a fleet producing a steady stream of events, polled every
+scan interval with the EVENT_OVERLAP window the ingestion re-reads, so
+every query returns the previous minute again. Reported per rate: the
+events returned by one query, the new ones, the milliseconds EventIngestor
+spends on a query, and the ids it keeps to deduplicate.
+
+    python benchmarks/bench_events.py
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pytraccar import ReportsEventeModel  # noqa: E402
+
+from custom_components.ha_traccar.events import EVENT_OVERLAP, EventIngestor  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+EVENTS_PER_MINUTE = (100, 1000, 10000)
+SCAN_INTERVAL = 10
+POLLS = 30
+TYPES = ("deviceMoving", "deviceStopped", "ignitionOn", "ignitionOff", "alarm", "deviceOverspeed")
+
+
+def main():
+    rng = random.Random(1)
+    print(
+        f"{'events/min':>10} {'per query':>10} {'new':>6} {'ms/query':>9}"
+        f" {'ids kept':>9} {'fired':>7}"
+    )
+    for rate in EVENTS_PER_MINUTE:
+        start = dt_util.utcnow()
+        history = []
+        next_id = 1
+        ingestor = EventIngestor(["device_moving", "ignition_on", "alarm"], {})
+        ingestor.since(start)
+        elapsed = 0.0
+        returned = fired = 0
+        for poll in range(1, POLLS + 1):
+            now = start + timedelta(seconds=poll * SCAN_INTERVAL)
+            # 这一周期内产生的事件
+            for _ in range(rate * SCAN_INTERVAL // 60):
+                event_time = now - timedelta(seconds=rng.uniform(0, SCAN_INTERVAL))
+                history.append(ReportsEventeModel.construct(
+                    id=next_id, type=rng.choice(TYPES), event_time=event_time.isoformat(),
+                    device_id=rng.randrange(1000), position_id=0, geofence_id=0,
+                    maintenance_id=0, attributes={},
+                ))
+                next_id += 1
+            since = ingestor.since(now)
+            # 服务器按时间返回，和真实的报表查询一样包含重叠窗口内已见过的事件
+            events = [
+                event for event in history
+                if since <= dt_util.parse_datetime(event.event_time) <= now
+            ]
+            history = [
+                event for event in history
+                if dt_util.parse_datetime(event.event_time) >= now - 2 * EVENT_OVERLAP
+            ]
+            started = time.perf_counter()
+            fired += len(ingestor.accept(events, now))
+            elapsed += time.perf_counter() - started
+            returned += len(events)
+        print(
+            f"{rate:>10} {returned / POLLS:>10.0f} {rate * SCAN_INTERVAL // 60:>6}"
+            f" {elapsed / POLLS * 1000:>9.2f} {ingestor.stats['remembered_ids']:>9}"
+            f" {fired:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Per-poll cost of geofence evaluation against fleet size and fence count.
+
+Compares testing every device against every fence (bounding box check,
+then the circle or point-in-polygon test) with the grid lookup of
+GeofenceMonitor. Fences are a mix of 100-500 m circles and 8-vertex
+polygons spread over a 1x1 degree area, like the zones and geofences
+of a city fleet; devices are spread over the same area.
+
+    python benchmarks/bench_geofence.py
+"""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+import random
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.ha_traccar.geofences import (  # noqa: E402
+    METERS_PER_DEGREE,
+    GeofenceMonitor,
+    circle,
+    polygon,
+)
+
+FLEET_SIZES = (100, 1000, 5000)
+FENCE_COUNTS = (10, 100, 1000)
+ORIGIN = (31.0, 121.0)
+
+
+def make_fences(count: int, rng: random.Random):
+    """Return circles and polygons around the origin."""
+    fences = []
+    for i in range(count):
+        lat = ORIGIN[0] + rng.random()
+        lng = ORIGIN[1] + rng.random()
+        radius = rng.uniform(100, 500)
+        if i % 2:
+            fences.append(circle(f"zone.{i}", f"zone {i}", "zone", lat, lng, radius))
+        else:
+            step = radius / METERS_PER_DEGREE
+            points = [
+                (lat + step * math.sin(a), lng + step * math.cos(a))
+                for a in (k * math.pi / 4 for k in range(8))
+            ]
+            fences.append(polygon(f"traccar.{i}", f"fence {i}", "traccar", points))
+    return fences
+
+
+def make_positions(size: int, rng: random.Random):
+    return [
+        (device_id, ORIGIN[0] + rng.random(), ORIGIN[1] + rng.random())
+        for device_id in range(size)
+    ]
+
+
+def linear_evaluate(fences, positions):
+    for _, lat, lng in positions:
+        {fence.fence_id for fence in fences if fence.in_bbox(lat, lng) and fence.contains(lat, lng)}
+
+
+def main():
+    rng = random.Random(1)
+    print(f"{'devices':>8} {'fences':>7} {'linear ms':>10} {'grid ms':>8} {'speedup':>8}")
+    for fences_count in FENCE_COUNTS:
+        fences = make_fences(fences_count, rng)
+        for size in FLEET_SIZES:
+            positions = make_positions(size, rng)
+            monitor = GeofenceMonitor(30)
+            monitor.set_zones(fences)
+            runs = max(1, 20000 // size)
+            linear_runs = max(1, runs * 10 // fences_count)
+            linear = timeit.timeit(lambda: linear_evaluate(fences, positions), number=linear_runs)
+            grid = timeit.timeit(lambda: monitor.evaluate(positions), number=runs)
+            linear_ms = linear / linear_runs * 1000
+            grid_ms = grid / runs * 1000
+            print(
+                f"{size:>8} {fences_count:>7} {linear_ms:>10.2f} {grid_ms:>8.2f}"
+                f" {linear_ms / grid_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""End-to-end load test of the integration against a local fake Traccar.
+
+For each fleet size a fresh Home Assistant instance sets up a config entry
+pointing at benchmarks/fake_traccar.py. The fleet moves between polls.
+Each poll goes through the same UpdateGuard the timer uses, followed by
+`hass.async_block_till_done()`, so entity creation and state writes count
+towards the poll. Reported per size:
+
+- setup: async_setup_entry plus the first update, which runs in the
+  background and creates the entities
+- poll p50/p95/max: wall time of one poll
+- block max/total: event loop stalls over 1 ms seen by a 1 ms ticker
+- memory: Python heap traced by tracemalloc over setup and warm-up
+- writes/poll: entity state writes, saves: store writes to disk
+- http/poll: requests received by the fake server
+- exact: polls in which the device trackers written are exactly the
+  vehicles that reported; trackers are push-only, so anything else means
+  a spurious or missing write. The script exits with 1 if any poll fails.
+  Slow polling of parked devices is off by default because it delays
+  fetching their changes on purpose; with --slow-scan the column is only
+  informational.
+
+Needs Home Assistant and pytest-homeassistant-custom-component (the
+version matching the Home Assistant release) installed:
+
+    python benchmarks/bench_load.py
+    python benchmarks/bench_load.py --sizes 10 100 --polls 50 --push
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_traccar import FakeFleet, FakeTraccarServer  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.ha_traccar import geocoding  # noqa: E402
+from custom_components.ha_traccar.const import (  # noqa: E402
+    DOMAIN,
+    GEOCODE_CACHE,
+    GEOCODER,
+    SOCKET,
+    STATE_STORE,
+    STATS,
+    UPDATE_GUARD,
+)
+from custom_components.ha_traccar.stats import (  # noqa: E402
+    COUNTER_STATE_WRITES,
+    STAGE_DISPATCH,
+)
+from custom_components.ha_traccar.geocoding import (  # noqa: E402
+    BaiduGeocoder,
+    GeocodeCache,
+)
+from homeassistant import loader  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import Event, callback  # noqa: E402
+from homeassistant.helpers.aiohttp_client import async_get_clientsession  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+
+SIZES = (10, 100, 1000, 10000)
+# 模拟的轮询间隔，秒
+STEP = 5
+WARMUP_POLLS = 2
+SETTLE_POLLS = 5
+
+
+class LoopMonitor:
+    """Measure how long the event loop is blocked between two ticks."""
+
+    def __init__(self, interval: float = 0.001) -> None:
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+        self.max = 0.0
+        self.total = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            lag = time.perf_counter() - start - self._interval
+            # 忽略定时器本身的抖动
+            if lag > 0.001:
+                self.total += lag
+                self.max = max(self.max, lag)
+
+    def start(self) -> None:
+        self.max = self.total = 0.0
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+async def async_wait_guard(guard) -> None:
+    """Wait until the first update has run and no update is in progress.
+
+    The first update of an entry runs as a background task, and in push
+    mode the resync after every (re)connect does too;
+    `hass.async_block_till_done()` does not wait for either, and a poll
+    started meanwhile is only merged into the running one.
+    """
+    while not guard.runs or guard.running:
+        await asyncio.sleep(0.01)
+
+
+async def async_wait_geocodes(hass) -> None:
+    """Wait for the background address lookups of earlier polls."""
+    while any(
+        task.get_name().startswith("ha_traccar geocode")
+        for task in hass._background_tasks
+    ):
+        await asyncio.sleep(0.01)
+
+
+def entry_data(port: int, push: bool, slow_scan: int) -> dict:
+    """Return the config entry data for the fake server."""
+    return {
+        "name": "bench",
+        "host": "127.0.0.1",
+        "port": port,
+        "ssl": False,
+        "verify_ssl": False,
+        "username": "bench",
+        "password": "bench",
+        # 定时器不参与测试，轮询由脚本驱动
+        "scan_interval": 3600,
+        "push": push,
+        "slow_scan_interval": slow_scan,
+        "attr_show": True,
+        "sensors": ["speed", "address", "motion", "last_update", "parkingtime"],
+    }
+
+
+async def async_run_size(size: int, polls: int, push: bool, slow_scan: int) -> dict:
+    """Set up one entry for a fleet of `size` and poll it."""
+    fleet = FakeFleet(size)
+    server = FakeTraccarServer(fleet)
+    await server.async_start()
+    geocoding.BAIDU_GEOCODER_URL = f"http://127.0.0.1:{server.port}/geocoder"
+
+    hass = await async_test_home_assistant(asyncio.get_running_loop())
+    config_dir = tempfile.TemporaryDirectory()
+    hass.config.config_dir = config_dir.name
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    # 本地的假地址服务不需要限速
+    cache = GeocodeCache()
+    hass.data[DOMAIN] = {
+        GEOCODE_CACHE: cache,
+        GEOCODER: BaiduGeocoder(
+            async_get_clientsession(hass), cache, max_concurrency=64, rate=1e6, burst=10**6
+        ),
+    }
+    monitor = LoopMonitor()
+    written = set()
+
+    @callback
+    def _state_changed(event: Event) -> None:
+        if event.data["entity_id"].startswith("device_tracker."):
+            written.add(event.data["new_state"].attributes["friendly_name"])
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        entry = MockConfigEntry(domain=DOMAIN, data=entry_data(server.port, push, slow_scan), title="bench")
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        data = hass.data[DOMAIN][entry.entry_id]
+        guard = data[UPDATE_GUARD]
+        stats = data[STATS]
+        # 第一次查询在后台运行（推送模式下是连接后的全量同步），等它完成
+        await async_wait_guard(guard)
+        await hass.async_block_till_done()
+        setup = time.perf_counter() - started
+        for _ in range(WARMUP_POLLS):
+            fleet.step(STEP)
+            await guard.async_call(dt_util.utcnow())
+            await hass.async_block_till_done()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if push:
+            # 推送模式下 socket 随配置项启动，等它连上
+            while not data[SOCKET].connected:
+                await asyncio.sleep(0.01)
+            await async_wait_guard(guard)
+            await hass.async_block_till_done()
+        # 等预热阶段的地址查完并送达实体；车辆已移动时地址在下次处理时才送达，
+        # 所以不推进模拟、全量同步到不再有写入为止
+        for _ in range(SETTLE_POLLS):
+            await async_wait_geocodes(hass)
+            written.clear()
+            await guard.async_call()
+            await hass.async_block_till_done()
+            if not written:
+                break
+
+        requests_before = sum(server.requests.values())
+        writes_before = stats.counters[COUNTER_STATE_WRITES]
+        saves_before = hass.data[DOMAIN][STATE_STORE].saves
+        latencies = []
+        exact = 0
+        monitor.start()
+        for _ in range(polls):
+            written.clear()
+            changed = fleet.step(STEP)
+            poll_started = time.perf_counter()
+            if push:
+                dispatched = stats.timers[STAGE_DISPATCH].count
+                await server.async_push(changed)
+                if changed:
+                    while stats.timers[STAGE_DISPATCH].count == dispatched:
+                        await asyncio.sleep(0)
+            else:
+                await guard.async_call(dt_util.utcnow())
+            await hass.async_block_till_done()
+            latencies.append(time.perf_counter() - poll_started)
+            if written == {FakeFleet.device(v)["name"] for v in changed}:
+                exact += 1
+        monitor.stop()
+        # 让延迟写盘落地，统计持久化次数
+        await hass.data[DOMAIN][STATE_STORE].async_flush()
+
+        latencies.sort()
+        return {
+            "size": size,
+            "setup_s": setup,
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "max_ms": latencies[-1] * 1000,
+            "block_max_ms": monitor.max * 1000,
+            "block_total_ms": monitor.total * 1000,
+            "memory_mb": memory / 1024 / 1024,
+            "writes_per_poll": (stats.counters[COUNTER_STATE_WRITES] - writes_before) / polls,
+            "saves": hass.data[DOMAIN][STATE_STORE].saves - saves_before,
+            "http_per_poll": (sum(server.requests.values()) - requests_before) / polls,
+            "exact": exact,
+            "polls": polls,
+        }
+    finally:
+        unsub()
+        monitor.stop()
+        await hass.async_stop(force=True)
+        await server.async_stop()
+        config_dir.cleanup()
+
+
+async def async_main(args: argparse.Namespace) -> bool:
+    """Run all sizes; return whether every poll wrote exactly the changes."""
+    ok = True
+    print(
+        f"{'devices':>8} {'setup s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"
+        f" {'block max':>10} {'block tot':>10} {'heap MB':>8} {'writes/poll':>12}"
+        f" {'saves':>6} {'http/poll':>10} {'exact':>8}"
+    )
+    for size in args.sizes:
+        polls = args.polls or max(5, min(50, 20000 // size))
+        r = await async_run_size(size, polls, args.push, args.slow_scan)
+        print(
+            f"{r['size']:>8} {r['setup_s']:>8.2f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+            f" {r['max_ms']:>8.1f} {r['block_max_ms']:>10.1f} {r['block_total_ms']:>10.1f}"
+            f" {r['memory_mb']:>8.1f} {r['writes_per_poll']:>12.1f} {r['saves']:>6}"
+            f" {r['http_per_poll']:>10.1f} {r['exact']:>4}/{r['polls']:<3}"
+        )
+        ok = ok and (args.slow_scan > 0 or r["exact"] == r["polls"])
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--polls", type=int, default=0, help="timed polls per size")
+    parser.add_argument("--push", action="store_true", help="deliver updates over the socket")
+    parser.add_argument("--slow-scan", type=int, default=0, help="slow_scan_interval of the entry")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if not asyncio.run(async_main(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
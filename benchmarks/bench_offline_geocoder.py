@@ -0,0 +1,92 @@
+"""Load time, memory and lookup cost of the offline geocoder.
+
+Builds synthetic place files of growing size (places spread over China,
+denser around a few cities, like a GeoNames cities500 extract), loads
+them through OfflineGeocoder.from_file and compares the grid lookup with
+a linear nearest-place scan. Memory is the Python heap traced by
+tracemalloc while the index is built.
+
+    python benchmarks/bench_offline_geocoder.py
+"""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.ha_traccar.offline_geocoding import (  # noqa: E402
+    METERS_PER_DEGREE,
+    OfflineGeocoder,
+)
+
+PLACE_COUNTS = (1000, 10000, 100000)
+CITIES = ((31.23, 121.47), (39.90, 116.40), (23.13, 113.26), (30.57, 104.07))
+LOOKUPS = 2000
+
+
+def make_places(count: int, rng: random.Random) -> list[tuple[float, float]]:
+    """Return place coordinates, half of them clustered around cities."""
+    places = []
+    for i in range(count):
+        if i % 2:
+            lat, lng = rng.choice(CITIES)
+            places.append((lat + rng.gauss(0, 0.3), lng + rng.gauss(0, 0.3)))
+        else:
+            places.append((rng.uniform(20, 45), rng.uniform(100, 125)))
+    return places
+
+
+def linear_lookup(places, lat, lng):
+    """Nearest place by scanning every place."""
+    lng_scale = math.cos(math.radians(lat))
+    return min(
+        range(len(places)),
+        key=lambda i: ((places[i][0] - lat) * METERS_PER_DEGREE) ** 2
+        + ((places[i][1] - lng) * METERS_PER_DEGREE * lng_scale) ** 2,
+    )
+
+
+def main():
+    rng = random.Random(1)
+    print(
+        f"{'places':>8} {'load ms':>8} {'heap KiB':>9}"
+        f" {'grid us':>8} {'linear us':>10} {'misses':>7}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for count in PLACE_COUNTS:
+            places = make_places(count, rng)
+            path = Path(directory, f"places{count}.csv")
+            path.write_text(
+                "".join(f"{lat:.5f},{lng:.5f},place {i}\n" for i, (lat, lng) in enumerate(places)),
+                encoding="utf-8",
+            )
+            tracemalloc.start()
+            started = time.perf_counter()
+            geocoder = OfflineGeocoder.from_file(str(path))
+            load_ms = (time.perf_counter() - started) * 1000
+            heap = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+            queries = [(rng.uniform(20, 45), rng.uniform(100, 125)) for _ in range(LOOKUPS)]
+            grid = timeit.timeit(
+                lambda: [geocoder.lookup(lat, lng) for lat, lng in queries], number=1
+            )
+            linear_queries = queries[: max(10, LOOKUPS * 1000 // count)]
+            linear = timeit.timeit(
+                lambda: [linear_lookup(places, lat, lng) for lat, lng in linear_queries], number=1
+            )
+            print(
+                f"{count:>8} {load_ms:>8.0f} {heap:>9.0f}"
+                f" {grid / len(queries) * 1e6:>8.1f} {linear / len(linear_queries) * 1e6:>10.0f}"
+                f" {geocoder.misses:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Time from Home Assistant start until the Traccar entities are available.
+
+Each fleet size is started twice on the same config directory:
+
+- cold: nothing stored yet, so the entities appear when the first fetch
+  has been processed
+- warm: a restart; the entities are created from the device snapshots
+  stored at shutdown, and the first fetch then updates them in place
+
+Reported are the seconds from the start of the config entry setup until
+every entity exists ("entities") and until the first fetch has been
+applied ("fresh"). --delay adds latency to the fake server's device and
+position requests. Without the stored snapshots and the initial fetch, no
+entity existed until the first timer tick, scan_interval seconds after
+setup.
+
+Needs the same packages as bench_load.py:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --sizes 1000 --delay 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import entry_data  # noqa: E402
+from fake_traccar import FakeFleet, FakeTraccarServer  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.ha_traccar import geocoding  # noqa: E402
+from custom_components.ha_traccar.const import DOMAIN, STATS  # noqa: E402
+from custom_components.ha_traccar.stats import STAGE_UPDATE  # noqa: E402
+from homeassistant import bootstrap, loader  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    issue_registry as ir,
+    restore_state as rs,
+)
+
+SIZES = (100, 1000)
+ENTRY_ID = "bench_startup"
+PLATFORM_DOMAINS = ("device_tracker", "sensor", "binary_sensor")
+
+
+async def async_start_hass(config_dir: str):
+    """Start Home Assistant with registries stored in config_dir."""
+    hass = await async_test_home_assistant(asyncio.get_running_loop(), load_registries=False)
+    hass.config.config_dir = config_dir
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    await asyncio.gather(
+        ar.async_load(hass),
+        dr.async_load(hass),
+        er.async_load(hass),
+        ir.async_load(hass),
+        rs.async_load(hass),
+    )
+    hass.data[bootstrap.DATA_REGISTRIES_LOADED] = None
+    return hass
+
+
+def count_entities(hass) -> int:
+    """Return the number of available entities of the integration."""
+    return sum(
+        1
+        for domain in PLATFORM_DOMAINS
+        for state in hass.states.async_all(domain)
+        if state.state != "unavailable"
+    )
+
+
+async def async_start_once(config_dir: str, port: int, expected: int) -> tuple[float, float]:
+    """Set up the entry once; return the seconds to all entities and to fresh data."""
+    hass = await async_start_hass(config_dir)
+    try:
+        entry = MockConfigEntry(
+            domain=DOMAIN, data=entry_data(port, False, 0), title="bench", entry_id=ENTRY_ID
+        )
+        entry.add_to_hass(hass)
+        started = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        stats = hass.data[DOMAIN][entry.entry_id][STATS]
+        entities = fresh = None
+        while entities is None or fresh is None:
+            now = time.perf_counter() - started
+            if entities is None and count_entities(hass) >= expected:
+                entities = now
+            if fresh is None and STAGE_UPDATE in stats.timers:
+                fresh = now
+            await asyncio.sleep(0.005)
+        await hass.async_block_till_done()
+        return entities, fresh
+    finally:
+        # 停止时写入快照、实体注册表和恢复状态，供下一次启动使用
+        await hass.async_stop(force=True)
+
+
+async def async_run_size(size: int, delay: float) -> dict:
+    """Start cold and warm for a fleet of `size`."""
+    fleet = FakeFleet(size)
+    server = FakeTraccarServer(fleet, delay=delay)
+    await server.async_start()
+    geocoding.BAIDU_GEOCODER_URL = f"http://127.0.0.1:{server.port}/geocoder"
+    # 每台设备一个追踪器，加上entry_data中启用的传感器和二元传感器
+    expected = size * (1 + len(entry_data(0, False, 0)["sensors"]))
+    config_dir = tempfile.TemporaryDirectory()
+    try:
+        cold = await async_start_once(config_dir.name, server.port, expected)
+        fleet.step(5)
+        warm = await async_start_once(config_dir.name, server.port, expected)
+    finally:
+        await server.async_stop()
+        config_dir.cleanup()
+    return {"size": size, "cold": cold, "warm": warm}
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    print(
+        f"{'devices':>8} {'cold entities':>14} {'cold fresh':>11}"
+        f" {'warm entities':>14} {'warm fresh':>11}"
+    )
+    for size in args.sizes:
+        r = await async_run_size(size, args.delay)
+        print(
+            f"{r['size']:>8} {r['cold'][0]:>13.2f}s {r['cold'][1]:>10.2f}s"
+            f" {r['warm'][0]:>13.2f}s {r['warm'][1]:>10.2f}s"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--delay", type=float, default=1.0, help="server latency in seconds")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
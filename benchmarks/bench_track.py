@@ -0,0 +1,124 @@
+"""Memory and speed of the per-device track ring buffers on large fleets.
+
+Fills a TrackStore for every fleet size and capacity until each buffer
+has wrapped around, then reports the heap traced by tracemalloc per
+device, next to the budget documented in track.py (BYTES_PER_FIX per
+fix plus TRACK_OVERHEAD per device, dict entry included) and to the
+same fixes kept as a list of dicts. Also timed: appending one poll's
+fixes for the fleet, and a 10 minute window query per device.
+
+The script exits with 1 if any run is over budget:
+
+    python benchmarks/bench_track.py
+    python benchmarks/bench_track.py --sizes 50000 --capacities 60
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pytraccar import PositionModel  # noqa: E402
+
+from custom_components.ha_traccar.track import BYTES_PER_FIX, TrackStore  # noqa: E402
+
+SIZES = (1000, 10000)
+CAPACITIES = (30, 120)
+# 每台设备除定位数据外的固定开销上限，含缓冲区对象、6个array和字典项
+TRACK_OVERHEAD = 800
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_poll(size: int, step: int) -> tuple[list[PositionModel], float]:
+    """Return one poll of positions, all fixes `step` * 10 s after START, and its time."""
+    fix_time = START + timedelta(seconds=10 * step)
+    return [
+        PositionModel.construct(
+            id=step * size + device_id, device_id=device_id, fix_time=fix_time.isoformat(),
+            latitude=31.2 + step * 1e-4, longitude=121.5, speed=30.0, course=90.0,
+            attributes={"totalDistance": 1000.0 * step},
+        )
+        for device_id in range(size)
+    ], fix_time.timestamp()
+
+
+def as_dicts(size: int, capacity: int) -> list[list[dict]]:
+    """Return the same fixes as lists of dicts, for comparison."""
+    return [
+        [
+            {
+                "time": 1.7e9 + step, "latitude": 31.2 + step * 1e-4, "longitude": 121.5,
+                "speed": 30.0 + step, "course": 90.0, "total_distance": 1000.0 * step,
+            }
+            for step in range(capacity)
+        ]
+        for _ in range(size)
+    ]
+
+
+def run(size: int, capacity: int) -> dict:
+    polls = [make_poll(size, step) for step in range(capacity + 6)]
+    tracemalloc.start()
+    store = TrackStore(capacity)
+    for positions, fix_time in polls[:-1]:
+        for position in positions:
+            store.append(position, fix_time)
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 计时不开tracemalloc，它会让每次分配慢一个数量级
+    positions, fix_time = polls[-1]
+    started = time.perf_counter()
+    for position in positions:
+        store.append(position, fix_time)
+    append_s = time.perf_counter() - started
+
+    since = (START + timedelta(seconds=10 * (capacity + 5) - 600)).timestamp()
+    started = time.perf_counter()
+    for device_id in range(size):
+        store.window(device_id, since)
+    window_s = time.perf_counter() - started
+
+    tracemalloc.start()
+    dicts = as_dicts(size, capacity)
+    dict_heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dicts
+    return {
+        "per_device": heap / size,
+        "budget": BYTES_PER_FIX * capacity + TRACK_OVERHEAD,
+        "dicts": dict_heap / size,
+        "append_ms": append_s * 1000,
+        "window_us": window_s / size * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--capacities", type=int, nargs="+", default=CAPACITIES)
+    args = parser.parse_args()
+    print(
+        f"{'devices':>8} {'fixes':>6} {'B/device':>9} {'budget':>7} {'dicts B':>8}"
+        f" {'append ms/poll':>15} {'window us':>10}"
+    )
+    over = False
+    for size in args.sizes:
+        for capacity in args.capacities:
+            r = run(size, capacity)
+            over |= r["per_device"] > r["budget"]
+            print(
+                f"{size:>8} {capacity:>6} {r['per_device']:>9.0f} {r['budget']:>7}"
+                f" {r['dicts']:>8.0f} {r['append_ms']:>15.2f} {r['window_us']:>10.1f}"
+            )
+    if over:
+        print("over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
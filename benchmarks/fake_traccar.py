@@ -0,0 +1,286 @@
+"""Local stand-in for a Traccar server with a simulated fleet.
+
+Serves the parts of the Traccar API the integration uses:
+/api/server, /api/devices, /api/positions (optionally ?deviceId=),
+/api/session and the /api/socket push channel, plus a stub of the Baidu
+geocoder at /geocoder. The fleet moves only when `step()` is called, so a
+benchmark controls exactly what changes between two polls.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+import json
+import math
+import random
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+# 1节 = 1.852 km/h
+KNOT = 1.852
+METERS_PER_DEGREE = 111320.0
+
+SERVER = {
+    "id": 1,
+    "registration": True,
+    "readonly": False,
+    "deviceReadonly": False,
+    "limitCommands": False,
+    "map": None,
+    "bingKey": None,
+    "mapUrl": None,
+    "poiLayer": None,
+    "latitude": 0.0,
+    "longitude": 0.0,
+    "zoom": 0,
+    "twelveHourFormat": False,
+    "version": "5.9",
+    "forceSettings": False,
+    "coordinateFormat": None,
+    "openIdEnabled": False,
+    "openIdForce": False,
+    "attributes": {},
+}
+
+
+def traccar_time(value: datetime) -> str:
+    """Format a time the way Traccar does."""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}+00:00"
+
+
+class Vehicle:
+    """One simulated device alternating between parking and driving."""
+
+    __slots__ = (
+        "id", "latitude", "longitude", "course", "speed", "total_distance",
+        "position_id", "fix_time", "status",
+    )
+
+    def __init__(self, device_id: int, rng: random.Random, now: datetime) -> None:
+        self.id = device_id
+        # 分布在上海周边约50公里范围内
+        self.latitude = 31.2 + rng.uniform(-0.25, 0.25)
+        self.longitude = 121.5 + rng.uniform(-0.25, 0.25)
+        self.course = rng.uniform(0, 360)
+        self.speed = 0.0
+        self.total_distance = rng.uniform(0, 1e7)
+        self.position_id = device_id * 1_000_000
+        # 早于在线超时，测试期间停放车辆的在线状态不会翻转
+        self.fix_time = now - timedelta(minutes=rng.uniform(20, 600))
+        self.status = "online"
+
+
+class FakeFleet:
+    """A fleet of vehicles with realistic parking and driving patterns.
+
+    Every step a parked vehicle starts driving with `p_start` and a moving
+    one parks with `p_stop`; moving vehicles change speed and heading
+    gradually and report a new position. About `moving` of the fleet is
+    driving at the start. Fix times follow a simulated clock advanced by
+    `step`, so the distance covered matches the time between two fixes
+    however fast the benchmark polls.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        moving: float = 0.3,
+        p_start: float = 0.01,
+        p_stop: float = 0.02,
+        seed: int = 1,
+    ) -> None:
+        self._rng = random.Random(seed)
+        self._p_start = p_start
+        self._p_stop = p_stop
+        self.now = datetime.now(timezone.utc)
+        self.vehicles = [Vehicle(i + 1, self._rng, self.now) for i in range(size)]
+        for vehicle in self.vehicles:
+            if self._rng.random() < moving:
+                vehicle.speed = self._rng.uniform(10, 50)
+                self._report(vehicle, self.now)
+        self.changed: list[Vehicle] = []
+
+    def _report(self, vehicle: Vehicle, now: datetime) -> None:
+        vehicle.position_id += 1
+        vehicle.fix_time = now
+
+    def step(self, seconds: float) -> list[Vehicle]:
+        """Advance the simulation; return the vehicles that reported."""
+        rng = self._rng
+        self.now = now = self.now + timedelta(seconds=seconds)
+        changed = []
+        for vehicle in self.vehicles:
+            if vehicle.speed == 0:
+                if rng.random() >= self._p_start:
+                    continue
+                vehicle.speed = rng.uniform(5, 20)
+            elif rng.random() < self._p_stop:
+                vehicle.speed = 0.0
+            else:
+                vehicle.speed = min(70.0, max(3.0, vehicle.speed + rng.gauss(0, 3)))
+                vehicle.course = (vehicle.course + rng.gauss(0, 15)) % 360
+                meters = vehicle.speed * KNOT / 3.6 * seconds
+                rad = math.radians(vehicle.course)
+                vehicle.latitude += meters * math.cos(rad) / METERS_PER_DEGREE
+                vehicle.longitude += meters * math.sin(rad) / (
+                    METERS_PER_DEGREE * math.cos(math.radians(vehicle.latitude))
+                )
+                vehicle.total_distance += meters
+            self._report(vehicle, now)
+            changed.append(vehicle)
+        self.changed = changed
+        return changed
+
+    @staticmethod
+    def device(vehicle: Vehicle) -> dict[str, Any]:
+        """Return the /api/devices item of a vehicle."""
+        return {
+            "id": vehicle.id,
+            "name": f"car{vehicle.id}",
+            "uniqueId": f"imei{vehicle.id:08d}",
+            "status": vehicle.status,
+            "disabled": False,
+            "lastUpdate": traccar_time(vehicle.fix_time),
+            "positionId": vehicle.position_id,
+            "groupId": 0,
+            "phone": None,
+            "model": "bench",
+            "contact": None,
+            "category": "car",
+            "geofenceIds": [],
+            "attributes": {},
+        }
+
+    @staticmethod
+    def position(vehicle: Vehicle) -> dict[str, Any]:
+        """Return the /api/positions item of a vehicle."""
+        fix_time = traccar_time(vehicle.fix_time)
+        return {
+            "id": vehicle.position_id,
+            "deviceId": vehicle.id,
+            "protocol": "osmand",
+            "deviceTime": fix_time,
+            "fixTime": fix_time,
+            "serverTime": fix_time,
+            "outdated": False,
+            "valid": True,
+            "latitude": vehicle.latitude,
+            "longitude": vehicle.longitude,
+            "altitude": 10,
+            "speed": round(vehicle.speed),
+            "course": round(vehicle.course),
+            "address": None,
+            "accuracy": 5,
+            "network": None,
+            "attributes": {
+                "batteryLevel": 80,
+                "sat": 9,
+                "hdop": 0.9,
+                "motion": vehicle.speed > 0,
+                "ignition": vehicle.speed > 0,
+                "totalDistance": round(vehicle.total_distance, 1),
+            },
+        }
+
+
+class FakeTraccarServer:
+    """aiohttp application serving a FakeFleet.
+
+    `delay` seconds are added to the device and position requests to
+    emulate a remote or busy server.
+    """
+
+    def __init__(self, fleet: FakeFleet, delay: float = 0) -> None:
+        self.fleet = fleet
+        self.delay = delay
+        self.requests: dict[str, int] = {}
+        self.geocodes = 0
+        self._sockets: set[web.WebSocketResponse] = set()
+        self._runner: web.AppRunner | None = None
+        self.port = 0
+        app = web.Application()
+        app.router.add_get("/api/server", self._server)
+        app.router.add_get("/api/devices", self._devices)
+        app.router.add_get("/api/positions", self._positions)
+        app.router.add_post("/api/session", self._session)
+        app.router.add_get("/api/socket", self._socket)
+        app.router.add_get("/geocoder", self._geocoder)
+        self._app = app
+
+    async def async_start(self) -> None:
+        """Listen on a free local port."""
+        self._runner = web.AppRunner(self._app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def async_stop(self) -> None:
+        """Close the sockets and stop listening."""
+        for ws in list(self._sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def async_push(self, vehicles: list[Vehicle]) -> None:
+        """Send the changed vehicles to every connected socket."""
+        if not vehicles or not self._sockets:
+            return
+        text = json.dumps({"positions": [FakeFleet.position(v) for v in vehicles]})
+        for ws in list(self._sockets):
+            await ws.send_str(text)
+
+    def _count(self, name: str) -> None:
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    async def _server(self, request: web.Request) -> web.Response:
+        self._count("server")
+        return web.json_response(SERVER)
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        self._count("devices")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.json_response([FakeFleet.device(v) for v in self.fleet.vehicles])
+
+    async def _positions(self, request: web.Request) -> web.Response:
+        if device_ids := request.query.getall("deviceId", []):
+            self._count("positions_by_device")
+            wanted = {int(device_id) for device_id in device_ids}
+            vehicles = [v for v in self.fleet.vehicles if v.id in wanted]
+        else:
+            self._count("positions")
+            vehicles = self.fleet.vehicles
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.json_response([FakeFleet.position(v) for v in vehicles])
+
+    async def _session(self, request: web.Request) -> web.Response:
+        self._count("session")
+        response = web.json_response({"id": 1})
+        response.set_cookie("JSESSIONID", "bench")
+        return response
+
+    async def _socket(self, request: web.Request) -> web.WebSocketResponse:
+        self._count("socket")
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    async def _geocoder(self, request: web.Request) -> web.Response:
+        self.geocodes += 1
+        return web.json_response(
+            {
+                "status": "OK",
+                # 固定地址：补发的地址不会让已写过的状态再变化
+                "result": {"formatted_address": "stub address"},
+            }
+        )
@@ -0,0 +1,150 @@
+"""Generate the synthetic tracks in benchmarks/tracks.
+
+The tracks are not recordings: each one is built from a seeded random
+generator to reproduce a pattern typical of a kind of tracker (GPS drift
+while parked, traffic lights, sparse power-saving fixes, ignition, a
+tracker losing power, a long sleep before departure). The comment line at
+the top of each file says what it models. The generator is shared across
+all tracks in order, so new tracks go at the end to keep the existing
+files identical.
+
+    python benchmarks/make_tracks.py
+"""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+import random
+
+TRACKS = Path(__file__).resolve().parent / "tracks"
+# 2024-01-01 08:00:00 UTC
+T0 = 1704096000
+# 每纬度的米数
+METERS_PER_DEGREE = 111320.0
+HEADER = "fixTime,latitude,longitude,speed,ignition,motion\n"
+KMH_PER_KNOT = 1.852
+
+rng = random.Random(7)
+
+
+class Track:
+    """Fixes of one device, written as Traccar reports them (speed in knots)."""
+
+    def __init__(self, lat: float = 31.2, lng: float = 121.45) -> None:
+        self.time, self.lat, self.lng = T0, lat, lng
+        self.rows: list[str] = []
+
+    def fix(self, kmh: float, ignition: str = "", motion: str | None = None, jitter: float = 5) -> None:
+        """Add a fix at the current place with a few meters of GPS noise."""
+        lat = self.lat + rng.gauss(0, jitter) / METERS_PER_DEGREE
+        lng = self.lng + rng.gauss(0, jitter) / self._meters_per_lng()
+        if motion is None:
+            motion = "true" if kmh > 1 else "false"
+        self.rows.append(
+            f"{self.time},{lat:.6f},{lng:.6f},{kmh / KMH_PER_KNOT:.2f},{ignition},{motion}\n"
+        )
+
+    def park(self, seconds: int, every: int, ignition: str = "") -> None:
+        """Parked: drifting position and a noisy speed."""
+        for _ in range(seconds // every):
+            self.time += every
+            self.fix(rng.choice([0, 0, 0, 0.8, 1.5, 3.0]), ignition, "false", jitter=12)
+
+    def drive(self, seconds: int, every: int, kmh: float, ignition: str = "", heading: float = 90) -> None:
+        """Drive around kmh towards heading (degrees from north)."""
+        for _ in range(seconds // every):
+            self.time += every
+            speed = max(0.0, kmh + rng.gauss(0, 4))
+            meters = speed / 3.6 * every
+            self.lat += meters * math.cos(math.radians(heading)) / METERS_PER_DEGREE
+            self.lng += meters * math.sin(math.radians(heading)) / self._meters_per_lng()
+            self.fix(speed, ignition)
+
+    def light(self, seconds: int, every: int, ignition: str = "") -> None:
+        """Wait at a traffic light."""
+        for _ in range(seconds // every):
+            self.time += every
+            self.fix(0, ignition, "false", jitter=3)
+
+    def write(self, name: str, comment: str) -> None:
+        """Write the track with a comment line describing it."""
+        with (TRACKS / name).open("w") as file:
+            file.write(f"# {comment}\n" + HEADER + "".join(self.rows))
+
+    def _meters_per_lng(self) -> float:
+        return METERS_PER_DEGREE * math.cos(math.radians(self.lat))
+
+
+def main() -> None:
+    # 上下班：停车漂移，经过三个红灯
+    track = Track()
+    track.park(1800, 30)
+    track.drive(300, 10, 40)
+    track.light(90, 10)
+    track.drive(400, 10, 50)
+    track.light(60, 10)
+    track.drive(300, 10, 35, heading=0)
+    track.light(120, 10)
+    track.drive(200, 10, 30, heading=0)
+    track.park(1800, 30)
+    track.write(
+        "commute.csv",
+        "phone tracker, 10 s fixes: one commute with three traffic lights, parked before and after",
+    )
+
+    # 省电定位器每10分钟一个定位，中途停车正好落在两个定位之间
+    track = Track()
+    track.park(1800, 600)
+    track.drive(1200, 600, 45)
+    # 在商店停了约8分钟：10分钟只走了500米
+    track.time += 600
+    track.lng += 500 / track._meters_per_lng()
+    track.fix(0)
+    track.drive(1200, 600, 45)
+    track.park(3600, 600)
+    track.write(
+        "sparse.csv",
+        "power-saving tracker, 10 min fixes: two trips with a stop between two fixes",
+    )
+
+    # 有点火信号的货车：两次熄火送货，中间等红灯不熄火
+    track = Track()
+    track.park(600, 60, "false")
+    track.drive(600, 30, 40, "true")
+    track.park(120, 30, "false")
+    track.drive(600, 30, 40, "true", heading=180)
+    track.park(120, 30, "false")
+    track.drive(300, 30, 30, "true", heading=270)
+    track.light(120, 30, "true")
+    track.drive(300, 30, 30, "true", heading=270)
+    track.park(1200, 60, "false")
+    track.write(
+        "delivery.csv",
+        "van with ignition, 30 s fixes: three trips split by short ignition-off"
+        " deliveries, idling at a light",
+    )
+
+    # 到达后立即断电，最后一个定位仍在行驶
+    track = Track()
+    track.park(900, 60)
+    track.drive(900, 15, 60)
+    track.write(
+        "poweroff.csv",
+        "tracker powered off on arrival, 15 s fixes: the last fix is still moving",
+    )
+
+    # 停车过夜时定位器休眠10小时，出发后第一个定位已经离开停车点
+    track = Track()
+    track.park(1800, 600)
+    track.time += 36000
+    track.drive(1200, 30, 45)
+    track.park(1800, 600)
+    track.write(
+        "overnight.csv",
+        "tracker asleep while parked for 10 h, 30 s fixes while driving:"
+        " one 20 min trip after the gap",
+    )
+
+
+if __name__ == "__main__":
+    main()
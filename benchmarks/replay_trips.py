@@ -0,0 +1,120 @@
+"""Replay the synthetic tracks through the trip segmentation.
+
+Each CSV in benchmarks/tracks holds the fixes of one device in the form
+Traccar reports them (fixTime as a UNIX time, speed in knots, the ignition
+and motion attributes empty when the device does not report them). They
+are not recordings but generated by make_tracks.py, each modelling a
+pattern of a kind of tracker described on its first line. The fixes are
+fed to TripSegmenter with the default options, with `expire` called at
+every fix and once more STALE_RUN_INTERVAL after the last one, the way a
+poll would. Reported per track: the trips found, and the state saves
+against the running/stopped flips of the previous rule (stopped at speed
+0, running above it). The expected trips are checked by tests/test_trips.py.
+
+    python benchmarks/replay_trips.py
+    python benchmarks/replay_trips.py -v
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from custom_components.ha_traccar import STALE_RUN_INTERVAL  # noqa: E402
+from custom_components.ha_traccar.const import (  # noqa: E402
+    DEFAULT_TRIP_MIN_DISTANCE,
+    DEFAULT_TRIP_MIN_SPEED,
+    DEFAULT_TRIP_STOP_DURATION,
+)
+from custom_components.ha_traccar.trips import (  # noqa: E402
+    KNOTS_TO_KMH,
+    TRIP_END,
+    TRIP_START,
+    TripSegmenter,
+    TripState,
+)
+
+TRACKS = Path(__file__).resolve().parent / "tracks"
+
+
+def read_track(path: Path) -> list[tuple[float, float, float, float, bool | None, bool | None]]:
+    """Return the fixes of a track file, speed in km/h."""
+    def flag(value: str) -> bool | None:
+        return None if value == "" else value == "true"
+
+    with path.open(newline="") as file:
+        rows = csv.DictReader(line for line in file if not line.startswith("#"))
+        return [
+            (
+                float(row["fixTime"]), float(row["latitude"]), float(row["longitude"]),
+                float(row["speed"]) * KNOTS_TO_KMH, flag(row["ignition"]), flag(row["motion"]),
+            )
+            for row in rows
+        ]
+
+
+def replay(fixes, segmenter: TripSegmenter) -> list[tuple[str, object]]:
+    """Return the trip records the fixes give, in order."""
+    state = TripState()
+    records = []
+    for time, lat, lng, speed, ignition, motion in fixes:
+        records += segmenter.update(state, time, lat, lng, speed, ignition, motion)
+        if (record := segmenter.expire(state, time)) is not None:
+            records.append((TRIP_END, record))
+    if (record := segmenter.expire(state, fixes[-1][0] + STALE_RUN_INTERVAL.total_seconds() + 1)) is not None:
+        records.append((TRIP_END, record))
+    return records
+
+
+def old_flips(fixes) -> int:
+    """Return the state changes of the previous speed rule, each one a save."""
+    running = False
+    flips = 0
+    for _, _, _, speed, _, _ in fixes:
+        if speed == 0 and running or speed > 0 and not running:
+            running = not running
+            flips += 1
+    return flips
+
+
+def default_segmenter() -> TripSegmenter:
+    """Return a segmenter with the default options of the integration."""
+    return TripSegmenter(
+        min_speed=DEFAULT_TRIP_MIN_SPEED,
+        stop_duration=DEFAULT_TRIP_STOP_DURATION,
+        min_distance=DEFAULT_TRIP_MIN_DISTANCE,
+        stale_timeout=STALE_RUN_INTERVAL.total_seconds(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every trip")
+    args = parser.parse_args()
+    segmenter = default_segmenter()
+    print(f"{'track':<14} {'fixes':>6} {'trips':>6} {'saves':>6} {'old saves':>10}")
+    for path in sorted(TRACKS.glob("*.csv")):
+        fixes = read_track(path)
+        records = replay(fixes, segmenter)
+        trips = sum(kind == TRIP_END for kind, _ in records)
+        print(
+            f"{path.name:<14} {len(fixes):>6} {trips:>6}"
+            f" {len(records):>6} {old_flips(fixes):>10}"
+        )
+        if args.verbose:
+            for kind, record in records:
+                data = record.as_event_data()
+                if kind == TRIP_START:
+                    print(f"    start {data['start_time']}")
+                else:
+                    print(
+                        f"    end   {data['end_time']} {data['distance']:>6} m"
+                        f" {data['duration']}s max {data['max_speed']} km/h"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
 import asyncio
-import time, datetime
+from dataclasses import replace
+import datetime
 import logging
-import pytz
-import os
-import json
-import requests
-import re
+import time
+from types import MappingProxyType
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     Platform,
+    EVENT_HOMEASSISTANT_STOP,
+    EVENT_STATE_CHANGED,
     CONF_HOST,
     CONF_PORT,
     CONF_SCAN_INTERVAL,
@@ -18,19 +18,17 @@ from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD
 )
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.util.json import load_json
-from homeassistant.helpers.json import save_json
-from .helper import gcj02towgs84, wgs84togcj02, gcj02_to_bd09
+from homeassistant.util import dt as dt_util
+from .helper import gcj02_to_bd09_batch, wgs84togcj02_batch
 
 from pytraccar import (
-    ApiClient,
     TraccarAuthenticationException,
     TraccarConnectionException,
     TraccarException,
@@ -38,38 +36,175 @@ from pytraccar import (
 from .const import (
     DOMAIN,
     TRACKER_UPDATE,
+    TRACKER_NEW_DEVICE,
     DEVICE_TRACKERS,
     SENSORS,
     STOP_TIMER,
-    CONF_ATTR_SHOW,
+    SOCKET,
+    DEVICE_INDEX,
+    STATE_STORE,
+    GEOCODE_CACHE,
+    GEOCODER,
+    OFFLINE_GEOCODERS,
+    OFFLINE_GEOCODER,
+    GEOFENCE_MONITOR,
+    EVENT_INGESTOR,
+    TRACK_STORE,
+    FIX_FILTER,
+    SCHEDULER,
+    UPDATE_GUARD,
+    STATS,
+    ATTR_BATTERY_LEVEL,
+    ATTR_IGNITION,
+    ATTR_MOTION,
+    ATTR_GEOFENCE,
+    ATTR_TRACCAR_ID,
+    EVENT_GEOFENCE_ENTER,
+    EVENT_GEOFENCE_EXIT,
+    EVENT_TRIP_START,
+    EVENT_TRIP_END,
+    TRACCAR_EVENT_RENAMES,
+    CONF_PUSH,
+    CONF_MAX_ACCURACY,
+    CONF_SKIP_ACCURACY_ON,
+    CONF_MIN_SATELLITES,
+    CONF_MAX_HDOP,
+    CONF_MAX_SPEED,
+    CONF_DEVICE_REFRESH_INTERVAL,
+    CONF_STATUS_REFRESH_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_GEOCODE_RADIUS,
+    CONF_GEOCODE_TTL,
+    CONF_GEOCODE_CACHE_SIZE,
+    CONF_GEOCODER_MODE,
+    CONF_OFFLINE_GEOCODER_FILE,
+    CONF_GEOFENCE_EVENTS,
+    CONF_GEOFENCE_HYSTERESIS,
+    CONF_EVENTS,
+    CONF_TRACK_SIZE,
+    CONF_TRIP_MIN_SPEED,
+    CONF_TRIP_STOP_DURATION,
+    CONF_TRIP_MIN_DISTANCE,
+    CONF_TRACKER_ATTRIBUTES,
+    GEOCODER_MODE_ONLINE,
+    GEOCODER_MODE_OFFLINE,
+    DEFAULT_GEOCODE_RADIUS,
+    DEFAULT_GEOCODE_TTL,
+    DEFAULT_GEOCODE_CACHE_SIZE,
+    DEFAULT_MAX_SPEED,
+    DEFAULT_DEVICE_REFRESH_INTERVAL,
+    DEFAULT_STATUS_REFRESH_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_GEOFENCE_HYSTERESIS,
+    DEFAULT_TRACK_SIZE,
+    DEFAULT_TRIP_MIN_SPEED,
+    DEFAULT_TRIP_STOP_DURATION,
+    DEFAULT_TRIP_MIN_DISTANCE,
+    DEFAULT_TRACKER_ATTRIBUTES,
+    ENTITY_ATTRIBUTES,
 )
+from .api import TraccarApiClient
+from .devices import DeviceIndex
+from .events import EVENT_POLL_INTERVAL, EventIngestor, event_name
+from .filters import FixFilter
+from .geocoding import BaiduGeocoder, GeocodeCache
+from .geofences import GeofenceMonitor, traccar_geofence, zone_geofence
+from .guard import UpdateGuard
+from .offline_geocoding import OfflineGeocoder
+from .scheduler import PER_DEVICE_QUERY_LIMIT, PollScheduler
+from .stats import (
+    COUNTER_DEVICES,
+    COUNTER_EVENTS,
+    COUNTER_GEOCODE_CALLS,
+    COUNTER_GEOFENCE_EVENTS,
+    COUNTER_POLLS,
+    COUNTER_POSITIONS,
+    COUNTER_STATE_WRITES,
+    COUNTER_STATE_WRITES_SKIPPED,
+    STAGE_DISPATCH,
+    STAGE_FETCH,
+    STAGE_GEOCODE,
+    STAGE_GEOFENCE,
+    STAGE_JOIN,
+    STAGE_STATE,
+    STAGE_TRANSFORM,
+    STAGE_UPDATE,
+    PipelineStats,
+)
+from .snapshot import DeviceSnapshot, normalize_address
+from .storage import TraccarStateStore
+from .track import TrackStore
+from .trips import KNOTS_TO_KMH, TRIP_END, TRIP_START, TripSegmenter
+from .websocket import TraccarSocket
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = [Platform.DEVICE_TRACKER, Platform.SENSOR, Platform.BINARY_SENSOR]
+ZONE_DOMAIN = "zone"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+STALE_RUN_INTERVAL = datetime.timedelta(seconds=1200)
+
+
+def time_diff(result):
+    """Format a duration the way the parking time is shown."""
+    hours = int(result.seconds / 3600)
+    minutes = int(result.seconds % 3600 / 60)
+    seconds = result.seconds%3600%60
+    if result.days > 0:
+        return("{0}天{1}小时{2}分钟".format(result.days,hours,minutes))
+    elif hours > 0:
+        return("{0}小时{1}分钟".format(hours,minutes))
+    elif minutes > 0:
+        return("{0}分钟{1}秒".format(minutes,seconds))
+    else:
+        return("{0}秒".format(seconds))
+
+
+def _flag(value):
+    """Return a boolean position attribute, None if absent or not a boolean."""
+    return value if isinstance(value, bool) else None
+
+
+def device_update_signal(server, unique_id):
+    """Return the signal carrying the updates of one device."""
+    return f"{TRACKER_UPDATE}_{server}_{unique_id}"
+
+
+def new_device_signal(entry_id):
+    """Return the signal announcing new devices of a config entry."""
+    return f"{TRACKER_NEW_DEVICE}_{entry_id}"
 
-varstinydict = {}
 
 class TraccarEntity(RestoreEntity):
 
-    def __init__(self, server, device):
+    def __init__(self, snapshot):
         self._unsub_dispatcher = None
-        self._device_info_id = f"{server}-{device.unique_id}"
-        self._server = server
-        self._device_unique_id = device.unique_id      
+        self._device_info_id = f"{snapshot.server}-{snapshot.unique_id}"
+        self._server = snapshot.server
+        self._device_unique_id = snapshot.unique_id
+        self._device_name = snapshot.name      
+        self._last_fingerprint = None
+        self._stats = None
 
     @property
     def device_info(self):
         """Return the device info."""
+        # 带上设备名，先于追踪器注册的传感器也能生成 sensor.<设备名>_<类型> 的实体ID
         return DeviceInfo(
             identifiers={(DOMAIN, self._device_info_id)},
+            name=self._device_name,
+            manufacturer="Traccar",
         )
 
     async def async_added_to_hass(self) -> None:
         """Register state update callback."""
         await super().async_added_to_hass()
+        self._stats = self.hass.data[DOMAIN][self.platform.config_entry.entry_id][STATS]
         self._unsub_dispatcher = async_dispatcher_connect(
-            self.hass, TRACKER_UPDATE, self._async_receive_data
+            self.hass,
+            device_update_signal(self._server, self._device_unique_id),
+            self._async_receive_data,
         )
 
     async def async_will_remove_from_hass(self) -> None:
@@ -78,19 +213,25 @@ class TraccarEntity(RestoreEntity):
         self._unsub_dispatcher()
 
     @callback
-    def _async_receive_data(
-        self, server, device, position, calculatedata, attr_show
-    ):
+    def _async_receive_data(self, snapshot):
         """Mark the device as seen."""
-        if server != self._server or device.unique_id != self._device_unique_id:
+        self._update_traccar_info(snapshot)
+        # 内容没有变化时不写状态，避免无意义的state_changed事件和数据库记录
+        fingerprint = self._state_fingerprint()
+        if fingerprint == self._last_fingerprint:
+            self._stats.count(COUNTER_STATE_WRITES_SKIPPED)
             return
-
-        self._update_traccar_info(device, position, calculatedata, attr_show)
+        self._last_fingerprint = fingerprint
+        self._stats.count(COUNTER_STATE_WRITES)
         self.async_write_ha_state()
 
-    def _update_traccar_info(self, device, postion, calculatedata, attr_show):
+    def _update_traccar_info(self, snapshot):
         """Update info"""
 
+    def _state_fingerprint(self):
+        """Return the values whose change requires a state write."""
+        return None
+
 
 async def async_setup(hass: HomeAssistant, hass_config: ConfigType) -> bool:
     """Set up the Traccar component."""
@@ -99,11 +240,10 @@ async def async_setup(hass: HomeAssistant, hass_config: ConfigType) -> bool:
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    hass.data.setdefault(DOMAIN, {})
     config = config_entry.data
-    
-    attr_show = config_entry.data.get(CONF_ATTR_SHOW, True)    
 
-    api = ApiClient(
+    api = TraccarApiClient(
         host=config[CONF_HOST],
         port=config[CONF_PORT],
         ssl=config[CONF_SSL],
@@ -123,189 +263,657 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 
     server = f"{config[CONF_HOST]}-{config[CONF_PORT]}"    
     
-    def save_to_file(filename, data):
-        with open(filename, 'w') as f:
-            json.dump(data, f)
-
-    def read_from_file(filename):
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        return data
-        
-    path = hass.config.path(f'.storage')
-    global varstinydict
-    _LOGGER.debug("varstinydict: %s", varstinydict)
-    if not os.path.exists(f'{path}/ha_traccar.json'):
-        save_to_file(f'{path}/ha_traccar.json', {})            
-    varstinydict = read_from_file(f'{path}/ha_traccar.json')
-    _LOGGER.debug("read_from_file varstinydict: %s", varstinydict)
+    if (state_store := hass.data[DOMAIN].get(STATE_STORE)) is None:
+        state_store = hass.data[DOMAIN][STATE_STORE] = TraccarStateStore(hass)
+    await state_store.async_load()
+    device_states = state_store.async_get_entry(config_entry.entry_id)
         
-    async def _async_update(now=None):
-        """Update info from Traccar."""
-        _LOGGER.debug("Updating device data")
+    geocode_radius = config.get(CONF_GEOCODE_RADIUS, DEFAULT_GEOCODE_RADIUS)
+    geocode_ttl = config.get(CONF_GEOCODE_TTL, DEFAULT_GEOCODE_TTL)
+    if (geocode_cache := hass.data[DOMAIN].get(GEOCODE_CACHE)) is None:
+        geocode_cache = hass.data[DOMAIN][GEOCODE_CACHE] = GeocodeCache()
+    # 缓存由所有配置项共用，取各配置项中最大的容量
+    geocode_cache.max_size = max(
+        geocode_cache.max_size,
+        config.get(CONF_GEOCODE_CACHE_SIZE, DEFAULT_GEOCODE_CACHE_SIZE),
+    )
+
+    if (geocoder := hass.data[DOMAIN].get(GEOCODER)) is None:
+        geocoder = hass.data[DOMAIN][GEOCODER] = BaiduGeocoder(
+            async_get_clientsession(hass), geocode_cache)
+    geocode_pending = set()
+
+    geocoder_mode = config.get(CONF_GEOCODER_MODE, GEOCODER_MODE_ONLINE)
+    offline_geocoder = None
+    if geocoder_mode != GEOCODER_MODE_ONLINE:
+        offline_geocoder = await _async_get_offline_geocoder(
+            hass, config.get(CONF_OFFLINE_GEOCODER_FILE, ""))
+    # 只用离线地点时不再访问在线接口
+    geocode_online = geocoder_mode != GEOCODER_MODE_OFFLINE
+    # 每台设备最近一次分发的快照，随状态一起持久化，重启后先用它创建实体
+    last_dispatch = state_store.async_get_snapshots(
+        config_entry.entry_id,
+        [*config.get(CONF_TRACKER_ATTRIBUTES, DEFAULT_TRACKER_ATTRIBUTES), *ENTITY_ATTRIBUTES],
+    )
+
+    stats = PipelineStats()
+    device_index = DeviceIndex()
+    announced = set()
+    fix_filter = FixFilter(
+        max_accuracy=config.get(CONF_MAX_ACCURACY, 0),
+        skip_on=config.get(CONF_SKIP_ACCURACY_ON, []),
+        min_satellites=config.get(CONF_MIN_SATELLITES, 0),
+        max_hdop=config.get(CONF_MAX_HDOP, 0),
+        max_speed=config.get(CONF_MAX_SPEED, DEFAULT_MAX_SPEED),
+    )
+
+    trip_segmenter = TripSegmenter(
+        min_speed=config.get(CONF_TRIP_MIN_SPEED, DEFAULT_TRIP_MIN_SPEED),
+        stop_duration=config.get(CONF_TRIP_STOP_DURATION, DEFAULT_TRIP_STOP_DURATION),
+        min_distance=config.get(CONF_TRIP_MIN_DISTANCE, DEFAULT_TRIP_MIN_DISTANCE),
+        stale_timeout=STALE_RUN_INTERVAL.total_seconds(),
+    )
+
+    # 每台设备最近的定位，供抖动判断、趋势速度等使用，不必再查询服务器
+    track_store = TrackStore(config.get(CONF_TRACK_SIZE, DEFAULT_TRACK_SIZE))
+
+    geofence_monitor = None
+    if config.get(CONF_GEOFENCE_EVENTS, False):
+        geofence_monitor = GeofenceMonitor(
+            config.get(CONF_GEOFENCE_HYSTERESIS, DEFAULT_GEOFENCE_HYSTERESIS))
+
+        @callback
+        def _async_load_zones(event=None):
+            """Index the current HA zones."""
+            geofence_monitor.set_zones(
+                fence
+                for state in hass.states.async_all(ZONE_DOMAIN)
+                if (fence := zone_geofence(state)) is not None
+            )
+
+        @callback
+        def _is_zone_event(event: Event) -> bool:
+            """Return whether a state change belongs to a zone."""
+            return event.data["entity_id"].startswith(f"{ZONE_DOMAIN}.")
+
+        _async_load_zones()
+        # 区域很少变化，变化时整体重建网格
+        config_entry.async_on_unload(
+            hass.bus.async_listen(
+                EVENT_STATE_CHANGED, _async_load_zones, event_filter=_is_zone_event
+            )
+        )
+
+    @callback
+    def _dispatch(snapshots):
+        """Send the snapshots to the entities of their devices."""
+        new_devices = []
+        for snapshot in snapshots:
+            last_dispatch[snapshot.device_id] = snapshot
+            if snapshot.device_id in announced:
+                async_dispatcher_send(
+                    hass, device_update_signal(server, snapshot.unique_id), snapshot)
+            else:
+                announced.add(snapshot.device_id)
+                new_devices.append(snapshot)
+        if new_devices:
+            # 新设备只通知本配置项的平台，每个平台一次性注册本次轮询的所有新实体
+            async_dispatcher_send(hass, new_device_signal(config_entry.entry_id), new_devices)
+
+    event_ingestor = None
+    events_fetched_at = None
+    events_failing = False
+    if event_names := config.get(CONF_EVENTS, []):
+        event_ingestor = EventIngestor(
+            event_names, state_store.async_get_event_cursor(config_entry.entry_id))
+
+    @callback
+    def _async_fire_events(events, until=None):
+        """Fire the new Traccar events on the bus in one go."""
+        accepted = event_ingestor.accept(events, until)
+        for event, event_time in accepted:
+            device = device_index.get(event.device_id)
+            name = event_name(event.type)
+            hass.bus.async_fire(
+                f"{DOMAIN}_{TRACCAR_EVENT_RENAMES.get(name, name)}",
+                {
+                    "device_traccar_id": event.device_id,
+                    "device_name": device.name if device is not None else None,
+                    "unique_id": device.unique_id if device is not None else None,
+                    "type": event.type,
+                    "event_time": event_time.isoformat(),
+                    "position_id": event.position_id,
+                    "geofence_id": event.geofence_id,
+                    "attributes": event.attributes,
+                    ATTR_TRACCAR_ID: event.id,
+                },
+            )
+        stats.count(COUNTER_EVENTS, len(accepted))
+        if event_ingestor.cursor_moved:
+            # 游标随状态一起延迟写盘
+            state_store.async_schedule_save()
+
+    async def _async_fetch_events(force=False):
+        """Fetch the events since the cursor and fire the new ones.
+
+        Runs at most once per EVENT_POLL_INTERVAL unless forced; the
+        cursor makes a later query return whatever happened in between.
+        A failed query is only logged, so a server without the reports
+        API does not stop the position updates.
+        """
+        nonlocal events_fetched_at, events_failing
+        if event_ingestor is None or not len(device_index):
+            return
+        if (
+            not force
+            and events_fetched_at is not None
+            and time.monotonic() - events_fetched_at < EVENT_POLL_INTERVAL
+        ):
+            return
+        until = dt_util.utcnow()
+        # 失败后同样等到下一个间隔再查询，游标不动，下次补上这段时间的事件
+        events_fetched_at = time.monotonic()
         try:
-            (devices, positions) = await asyncio.gather(
-                api.get_devices(),
-                api.get_positions(),
+            events = await api.get_events(
+                [device.id for device in device_index],
+                event_ingestor.since(until),
+                until,
+                event_ingestor.server_types,
             )
         except TraccarException as ex:
-            _LOGGER.error("Error while updating device data: %s", ex)
+            # 服务器未开放报表接口时每次都会失败，只在开始失败时记一次警告
+            log = _LOGGER.debug if events_failing else _LOGGER.warning
+            log("Error while fetching Traccar events: %s", ex)
+            events_failing = True
             return
-            
-        #_LOGGER.debug(devices)    
-        #_LOGGER.debug(positions)
-        global varstinydict
-        _LOGGER.debug("update varstinydict: %s", varstinydict)
+        events_failing = False
+        _async_fire_events(events, until)
 
-        for position in positions:
-            device = next(
-                (dev for dev in devices if dev.id == position.device_id), None
+    @callback
+    def _async_apply_trips(device, state, records, trips):
+        """Update the motion state of a device from its new trip records."""
+        _LOGGER.debug("trips of %s: %s", device.id, records)
+        state.running = state.trip.moving
+        if not state.running:
+            # 停车时间取实际停下的时间，而不是发现停车的这次查询
+            state.last_stop_time = dt_util.as_local(
+                dt_util.utc_from_timestamp(state.trip.stop_since))
+        state_store.async_schedule_save()
+        trips.extend((device, kind, record) for kind, record in records)
+
+    @callback
+    def _async_fire_trips(trips):
+        """Fire the trip start and end events."""
+        for device, kind, record in trips:
+            hass.bus.async_fire(
+                f"{DOMAIN}_{EVENT_TRIP_START if kind == TRIP_START else EVENT_TRIP_END}",
+                {
+                    "device_traccar_id": device.id,
+                    "device_name": device.name,
+                    "unique_id": device.unique_id,
+                    **record.as_event_data(),
+                },
             )
 
-            if not device:
+    @callback
+    def _async_expire_trips():
+        """End the trips of moving devices that stopped reporting.
+
+        A device powered off on arrival never sends the fix that ends its
+        trip, and in push mode nothing else is processed for it, so every
+        timer tick checks the moving devices against the clock.
+        """
+        now = dt_util.now()
+        trips = []
+        updates = []
+        for device_id, state in device_states.items():
+            if not state.trip.moving or (device := device_index.get(device_id)) is None:
+                continue
+            if (record := trip_segmenter.expire(state.trip, now.timestamp())) is None:
                 continue
+            _async_apply_trips(device, state, [(TRIP_END, record)], trips)
+            if (snapshot := last_dispatch.get(device_id)) is not None:
+                last_stop_time = dt_util.as_local(state.last_stop_time)
+                updates.append(replace(
+                    snapshot,
+                    running=state.running,
+                    last_stop_time=last_stop_time,
+                    last_stop_text=last_stop_time.strftime(TIME_FORMAT),
+                    parking_time="" if state.running else time_diff(now - state.last_stop_time),
+                ))
+        _dispatch(updates)
+        _async_fire_trips(trips)
+
+    async def _async_process(positions):
+        """Process positions and dispatch them to the entities."""
+        pending = []
+        updates = []
+        trips = []
+
+        now = dt_util.now()
+        query_text = now.strftime(TIME_FORMAT)
+        started = time.perf_counter()
+        # 精度不够或不可能到达的定位在最前面丢弃，不再触发地址查询、状态变化和写入
+        positions = [
+            position
+            for position in positions
+            if position.device_id in device_index and fix_filter.accept(position)
+        ]
+        stats.count(COUNTER_DEVICES, len(positions))
+        stats.last_devices = len(positions)
+        joined = time.perf_counter()
+        stats.observe(STAGE_JOIN, joined - started)
+        # 整批转换坐标，结果供实体属性和地址查询共用
+        gcj_lngs, gcj_lats = wgs84togcj02_batch(
+            [position.longitude for position in positions],
+            [position.latitude for position in positions],
+        )
+        bd_lngs, bd_lats = gcj02_to_bd09_batch(gcj_lngs, gcj_lats)
+        transformed = time.perf_counter()
+        stats.observe(STAGE_TRANSFORM, transformed - joined)
+        for position, gcj_lng, gcj_lat, bd_lng, bd_lat in zip(
+            positions, gcj_lngs, gcj_lats, bd_lngs, bd_lats
+        ):
+            device = device_index.get(position.device_id)
+            fix_time = dt_util.parse_datetime(position.fix_time)
+            if fix_time is not None:
+                track_store.append(position, fix_time.timestamp())
                 
             _LOGGER.debug(position)            
-            
-            def time_diff (timestamp):
-                result = datetime.datetime.now() - datetime.datetime.fromtimestamp(timestamp)
-                hours = int(result.seconds / 3600)
-                minutes = int(result.seconds % 3600 / 60)
-                seconds = result.seconds%3600%60
-                if result.days > 0:
-                    return("{0}天{1}小时{2}分钟".format(result.days,hours,minutes))
-                elif hours > 0:
-                    return("{0}小时{1}分钟".format(hours,minutes))
-                elif minutes > 0:
-                    return("{0}分钟{1}秒".format(minutes,seconds))
-                else:
-                    return("{0}秒".format(seconds))
 
-            
-                    
-            def get_free_geocoding(lat, lng):
-                def get_data(url):
-                    json_text = requests.get(url).content
-                    json_text = json_text.decode('utf-8')
-                    # json_text = re.sub(r'\\','',json_text)
-                    # json_text = re.sub(r'"{','{',json_text)
-                    # json_text = re.sub(r'}"','}',json_text)
-                    resdata = json.loads(json_text)
-                    return resdata
-                api_url = 'https://api.map.baidu.com/geocoder'
-                location = str("{:.6f}".format(lat))+','+str("{:.6f}".format(lng))
-                url = api_url+'?&output=json&location='+location
-                _LOGGER.debug(url)
-                response = get_data(url)
-                _LOGGER.debug(response)
-                return response                    
-                    
-            if not varstinydict.get("lastupdate_"+str(position.device_id)):
-                varstinydict["lastupdate_"+str(position.device_id)]=""                
-            if not varstinydict.get("lasttotaldistance_"+str(position.device_id)):
-                varstinydict["lasttotaldistance_"+str(position.device_id)]=[0,0]
-            if not varstinydict.get("lastlocationtime_"+str(position.device_id)):
-                varstinydict["lastlocationtime_"+str(position.device_id)] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            if not varstinydict.get("updatetime_"+str(position.device_id)):
-                varstinydict["updatetime_"+str(position.device_id)] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            if not varstinydict.get("runorstop_"+str(position.device_id)):
-                varstinydict["runorstop_"+str(position.device_id)] = "stop"
-            if not varstinydict.get("coords_"+str(position.device_id)):
-                _LOGGER.debug("初始化lastupdate_"+str(position.device_id))
-                varstinydict["coords_"+str(position.device_id)] = [0,0]
-            _LOGGER.debug(varstinydict["lastlocationtime_"+str(position.device_id)])
-            _LOGGER.debug(varstinydict["lasttotaldistance_"+str(position.device_id)])            
-            #计算两次总里程的历史变化值，忽略掉gps信号偶然漂移到超远距离,一次位移大于10000米的回到00点
-            thisdistance = varstinydict["lasttotaldistance_"+str(position.device_id)][0] - varstinydict["lasttotaldistance_"+str(position.device_id)][1]
-            if thisdistance < 10000:
-                pass
-            else:
-                thisdistance = 0
-            thistotaldistance = position.attributes.get("totalDistance")            
-            
-            # 设备数据更新后，或者刷新时间相差2分钟以上，刷新总里程的历史数据
+            if (state := device_states.get(position.device_id)) is None:
+                state = state_store.async_create_state(
+                    config_entry.entry_id, position.device_id, now
+                )
+
+            # 设备数据更新后记下Traccar的更新时间
             lastupdate = device.last_update
-            if lastupdate != varstinydict["lastupdate_"+str(position.device_id)] or datetime.datetime.now() - datetime.datetime.strptime(varstinydict["updatetime_"+str(position.device_id)], "%Y-%m-%d %H:%M:%S") > datetime.timedelta(seconds=120):
-                varstinydict["lastupdate_"+str(position.device_id)] = lastupdate            
-                varstinydict["lasttotaldistance_"+str(position.device_id)][1] = varstinydict["lasttotaldistance_"+str(position.device_id)][0]
-                varstinydict["lasttotaldistance_"+str(position.device_id)][0] = thistotaldistance
-                varstinydict["updatetime_"+str(position.device_id)] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")           
+            if lastupdate != state.last_update:
+                state.last_update = lastupdate
+                state.last_update_at = dt_util.parse_datetime(lastupdate) if lastupdate else None
             
-            thisspeed = position.speed
-            
-            
-            _LOGGER.debug("device_id: %s, lastupdate: %s, thisspeed：%s, lastdistance: %s, lastlocationtime: %s, runorstop %s", position.device_id, lastupdate, thisspeed, varstinydict["lasttotaldistance_"+str(position.device_id)], varstinydict["lastlocationtime_"+str(position.device_id)], varstinydict["runorstop_"+str(position.device_id)])
-            # 速度为0或当前里程为0时，状态从运动改为静止
-            #if (thisspeed == 0 or thisdistance==0) and varstinydict["runorstop_"+str(position.device_id)]=="run":
-            if thisspeed == 0 and varstinydict["runorstop_"+str(position.device_id)]=="run":
-                _LOGGER.debug("变为静止1")
-                varstinydict["runorstop_"+str(position.device_id)] = "stop"
-                varstinydict["lastlocationtime_"+str(position.device_id)] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                save_to_file(f'{path}/ha_traccar.json', varstinydict)
+            _LOGGER.debug("device_id: %s, lastupdate: %s, speed：%s, state: %s", position.device_id, lastupdate, position.speed, state)
+            # 按行程切分判断运动或静止，只在行程开始和结束时保存
+            records = []
+            if fix_time is not None:
+                records = trip_segmenter.update(
+                    state.trip,
+                    fix_time.timestamp(),
+                    position.latitude,
+                    position.longitude,
+                    (position.speed or 0.0) * KNOTS_TO_KMH,
+                    _flag(position.attributes.get(ATTR_IGNITION)),
+                    _flag(position.attributes.get(ATTR_MOTION)),
+                )
+            if (record := trip_segmenter.expire(state.trip, now.timestamp())) is not None:
+                records.append((TRIP_END, record))
+            if records:
+                _async_apply_trips(device, state, records, trips)
                 
-        
-            # 速度大于0且当前里程大于0时，状态改为运动
-            elif thisspeed > 0 and varstinydict["runorstop_"+str(position.device_id)]=="stop":
-                _LOGGER.debug("变为运动1")
-                varstinydict["runorstop_"+str(position.device_id)] = "run"
-                # varstinydict["lastlocationtime_"+str(position.device_id)] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # 设备超过1200秒没有向服务器更新数据，且原来为运动状态，则设置上次到达时间为上次更新时间（设备到达后立即断电导致停止状态未发送的情况）。
-            last_update_datetime = datetime.datetime.fromisoformat(lastupdate)
-            lastupdatetime = (datetime.datetime.strptime(lastupdate, '%Y-%m-%dT%H:%M:%S.%f+00:00') + datetime.timedelta(hours=8)).strftime("%Y-%m-%d %H:%M:%S")
-            if datetime.datetime.now(pytz.utc) - last_update_datetime > datetime.timedelta(seconds=1200) and varstinydict["runorstop_"+str(position.device_id)]=="run":
-                _LOGGER.debug("变为静止2")
-                varstinydict["runorstop_"+str(position.device_id)] = "stop"
-                varstinydict["lastlocationtime_"+str(position.device_id)] = lastupdatetime
-                save_to_file(f'{path}/ha_traccar.json', varstinydict)
-                
-            lastlocationtime = varstinydict["lastlocationtime_"+str(position.device_id)]
-            if varstinydict["runorstop_"+str(position.device_id)] == "stop":
-                parkingtime = time_diff(int(time.mktime(time.strptime(lastlocationtime, "%Y-%m-%d %H:%M:%S"))))
-            else:
-                parkingtime = ""
-            calculatedata = {}
-            calculatedata["laststoptime"] = lastlocationtime
-            calculatedata["runorstop"] = varstinydict["runorstop_"+str(position.device_id)]
-            calculatedata["parkingtime"] = parkingtime
-            calculatedata["querytime"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            if varstinydict["coords_"+str(position.device_id)] != [position.latitude, position.longitude]:
-                _LOGGER.debug("free_geocoding")
-                _LOGGER.debug(varstinydict["coords_"+str(position.device_id)])
-                _LOGGER.debug([position.latitude, position.longitude])
-                gcjdata = wgs84togcj02(position.longitude, position.latitude)
-                bddata = gcj02_to_bd09(gcjdata[0], gcjdata[1])
-                addressdata = await hass.async_add_executor_job(get_free_geocoding, bddata[1], bddata[0])
-                if addressdata['status'] == 'OK':
-                    varstinydict["address_"+str(position.device_id)] = addressdata['result']['formatted_address']
+            if (state.latitude, state.longitude) != (position.latitude, position.longitude) and position.device_id not in geocode_pending:
+                _LOGGER.debug("free_geocoding: %s -> %s", (state.latitude, state.longitude), (position.latitude, position.longitude))
+                address = None
+                if offline_geocoder is not None:
+                    # 离线查询只需几微秒，直接在本次更新中完成
+                    address = offline_geocoder.lookup(position.latitude, position.longitude)
+                if address is None and geocode_online:
+                    # 附近的位置（含静止时的GPS漂移）直接使用缓存的地址
+                    address = geocode_cache.get(position.latitude, position.longitude, geocode_radius, geocode_ttl)
+                if address is None and geocode_online:
+                    # 未命中缓存的地址在后台批量查询，不阻塞本次更新的分发
+                    geocode_pending.add(position.device_id)
+                    pending.append((position.device_id, position.latitude, position.longitude, (bd_lng, bd_lat)))
                 else:
-                    varstinydict["address_"+str(position.device_id)] = 'free接口返回错误'
-                varstinydict["coords_"+str(position.device_id)] = [position.latitude, position.longitude]
-            calculatedata["get_address"] = varstinydict["address_"+str(position.device_id)]
+                    state.address = address
+                    state.latitude, state.longitude = position.latitude, position.longitude
+            # 同一设备的所有实体共用这份快照，每次轮询每台设备只计算一次
+            last_stop_time = dt_util.as_local(state.last_stop_time)
+            updates.append(DeviceSnapshot(
+                server=server,
+                device_id=device.id,
+                unique_id=device.unique_id,
+                name=device.name,
+                status=device.status,
+                protocol=position.protocol,
+                last_update=lastupdate,
+                last_update_at=state.last_update_at,
+                last_update_text=(
+                    dt_util.as_local(state.last_update_at).strftime(TIME_FORMAT)
+                    if state.last_update_at is not None else None
+                ),
+                latitude=position.latitude,
+                longitude=position.longitude,
+                accuracy=position.accuracy or 0.0,
+                speed=position.speed or 0.0,
+                battery_level=position.attributes.get(ATTR_BATTERY_LEVEL, -1),
+                attributes=MappingProxyType(position.attributes),
+                address=normalize_address(position.address),
+                get_address=state.address or "unknown",
+                gcj_lat=gcj_lat,
+                gcj_lng=gcj_lng,
+                bd_lat=bd_lat,
+                bd_lng=bd_lng,
+                running=state.running,
+                last_stop_time=last_stop_time,
+                last_stop_text=last_stop_time.strftime(TIME_FORMAT),
+                parking_time="" if state.running else time_diff(now - state.last_stop_time),
+                query_time=now,
+                query_text=query_text,
+                poll_tier=scheduler.update(device, state, now),
+            ))
+
+        processed = time.perf_counter()
+        stats.observe(STAGE_STATE, processed - transformed)
+        # 分发时实体在回调中同步写入状态，写入耗时也计入分发
+        _dispatch(updates)
+        stats.observe(STAGE_DISPATCH, time.perf_counter() - processed)
+
+        _async_fire_trips(trips)
+
+        if geofence_monitor is not None:
+            with stats.timer(STAGE_GEOFENCE):
+                crossings = geofence_monitor.evaluate(
+                    (snapshot.device_id, snapshot.latitude, snapshot.longitude)
+                    for snapshot in updates
+                )
+            # 事件在实体状态更新之后触发，自动化中读到的已是新位置
+            snapshots = {snapshot.device_id: snapshot for snapshot in updates}
+            for device_id, entered, fence in crossings:
+                snapshot = snapshots[device_id]
+                hass.bus.async_fire(
+                    f"{DOMAIN}_{EVENT_GEOFENCE_ENTER if entered else EVENT_GEOFENCE_EXIT}",
+                    {
+                        "device_traccar_id": device_id,
+                        "device_name": snapshot.name,
+                        "unique_id": snapshot.unique_id,
+                        ATTR_GEOFENCE: fence.name,
+                        "geofence_id": fence.fence_id,
+                        "source": fence.source,
+                        "latitude": snapshot.latitude,
+                        "longitude": snapshot.longitude,
+                    },
+                )
+            stats.count(COUNTER_GEOFENCE_EVENTS, len(crossings))
+
+        if pending:
+            stats.count(COUNTER_GEOCODE_CALLS, len(pending))
+            config_entry.async_create_background_task(
+                hass, _async_geocode(pending), f"ha_traccar geocode {server}"
+            )
+        _LOGGER.debug("geocode cache: %s", geocode_cache.stats)
+
+    async def _async_geocode(pending):
+        """Resolve the addresses of a poll concurrently and update the entities."""
+        with stats.timer(STAGE_GEOCODE):
+            results = await asyncio.gather(
+                *(
+                    geocoder.async_geocode(lat, lng, geocode_radius, bd09)
+                    for _, lat, lng, bd09 in pending
+                ),
+                return_exceptions=True,
+            )
+        for (device_id, lat, lng, _), address in zip(pending, results):
+            geocode_pending.discard(device_id)
+            if isinstance(address, BaseException):
+                if not isinstance(address, asyncio.CancelledError):
+                    _LOGGER.error("Unexpected error while geocoding: %s", address)
+                address = None
+            if (state := device_states.get(device_id)) is None:
+                continue
+            state.address = address or 'free接口返回错误'
+            state.latitude, state.longitude = lat, lng
+
+            # 设备在查询期间已经移动时不再补发，下次更新会查询新位置
+            if (last := last_dispatch.get(device_id)) is None:
+                continue
+            if (last.latitude, last.longitude) != (lat, lng):
+                continue
+            _dispatch([replace(last, get_address=state.address)])
+
+    socket = None
+    latest_positions = {}
+    latest_fix_times = {}
+    # 全量同步失败后置位，定时轮询改做全量同步直到成功
+    resync_pending = False
+    device_refresh_interval = config.get(
+        CONF_DEVICE_REFRESH_INTERVAL, DEFAULT_DEVICE_REFRESH_INTERVAL
+    )
+    status_refresh_interval = config.get(
+        CONF_STATUS_REFRESH_INTERVAL, DEFAULT_STATUS_REFRESH_INTERVAL
+    )
+    devices_refreshed_at = None
+    status_refreshed_at = None
+    unknown_devices = set()
+    scheduler = PollScheduler(
+        config.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)
+    )
+
+    @callback
+    def _async_keep_newer(positions, strict):
+        """Drop the positions older than the latest known fix of their device.
+
+        Pushes and resyncs run concurrently, so a resync may return fixes
+        that were already superseded by pushed ones. With `strict`, a fix
+        as old as the latest one is dropped too.
+        """
+        kept = []
+        for position in positions:
+            fix_time = dt_util.parse_datetime(position.fix_time)
+            stamp = fix_time.timestamp() if fix_time is not None else None
+            last = latest_fix_times.get(position.device_id)
+            if last is not None and stamp is not None and (stamp < last or strict and stamp == last):
+                continue
+            latest_positions[position.device_id] = position
+            if stamp is not None:
+                latest_fix_times[position.device_id] = stamp
+            kept.append(position)
+        return kept
+
+    async def _async_update(now=None):
+        """Update info from Traccar; called through the guard only."""
+        nonlocal devices_refreshed_at, status_refreshed_at, resync_pending
+        if now is not None and socket is not None and socket.connected and not resync_pending:
+            # 推送连接正常时不轮询，socket断开时由定时轮询兜底
+            return
+        # (重新)连接后的同步，以及上次失败的同步，都要全量刷新
+        full_sync = now is None or resync_pending
+        resync_pending = full_sync
+        _LOGGER.debug("Updating device data")
+        started = time.perf_counter()
+        # 设备目录很少变化，只按较长的间隔刷新
+        refresh_devices = (
+            full_sync
+            or devices_refreshed_at is None
+            or time.monotonic() - devices_refreshed_at >= device_refresh_interval
+        )
+        # None表示处理全部设备
+        due = None
+        # 请求失败时抛出TraccarException，由guard负责退避和断路
+        stats.count(COUNTER_POLLS)
+        if refresh_devices:
+            if geofence_monitor is not None:
+                # Traccar的地理围栏和设备目录一起刷新
+                (devices, positions, geofences) = await asyncio.gather(
+                    api.get_devices(),
+                    api.get_positions(),
+                    api.get_geofences(),
+                )
+                geofence_monitor.set_traccar(
+                    fence
+                    for geofence in geofences
+                    if (fence := traccar_geofence(geofence)) is not None
+                )
+            else:
+                (devices, positions) = await asyncio.gather(
+                    api.get_devices(),
+                    api.get_positions(),
+                )
+        else:
+            # 在线状态以服务器为准，不能由定位时间推断，按较短的间隔单独刷新；
+            # 推送连接正常时状态变化由socket送达
+            refresh_status = (
+                status_refresh_interval > 0
+                and (socket is None or not socket.connected)
+                and time.monotonic() - status_refreshed_at >= status_refresh_interval
+            )
+            if scheduler.enabled:
+                due = scheduler.due(device.id for device in device_index)
+                if not due and not refresh_status:
+                    # 所有设备都停放着，还没到慢速查询的时间，事件照常查询
+                    await _async_fetch_events()
+                    return
+            if refresh_status:
+                (devices, positions) = await asyncio.gather(
+                    api.get_devices(),
+                    api.get_positions(),
+                )
+                status_refreshed_at = time.monotonic()
+                # 状态变化的设备即使没有到期也要分发
+                status_changed = device_index.update_status(devices)
+                if due is not None:
+                    due |= status_changed
+            elif due is not None and len(due) <= PER_DEVICE_QUERY_LIMIT and len(due) < len(device_index):
+                results = await asyncio.gather(
+                    *(api.get_device_positions(device_id) for device_id in due)
+                )
+                positions = [position for result in results for position in result]
+            else:
+                positions = await api.get_positions()
+            # 出现没见过的设备时立即刷新设备目录
+            if any(
+                position.device_id not in device_index
+                and position.device_id not in unknown_devices
+                for position in positions
+            ):
+                if not refresh_status:
+                    devices = await api.get_devices()
+                refresh_devices = True
+                due = None
+        stats.observe(STAGE_FETCH, time.perf_counter() - started)
+        stats.count(COUNTER_POSITIONS, len(positions))
             
-            #_LOGGER.debug("laststoptime: %s, querytime %s", lastlocationtime, calculatedata["querytime"])
-
-            async_dispatcher_send(
-                hass,
-                TRACKER_UPDATE,
-                server,
-                device,
-                position,
-                calculatedata,
-                attr_show
+        #_LOGGER.debug(devices)    
+        #_LOGGER.debug(positions)
+        if refresh_devices:
+            device_index.refresh(devices)
+            # 服务器上已删除的设备不再保存快照
+            for device_id in [device_id for device_id in last_dispatch if device_id not in device_index]:
+                del last_dispatch[device_id]
+            track_store.retain(device.id for device in device_index)
+            for device_id in [device_id for device_id in latest_positions if device_id not in device_index]:
+                del latest_positions[device_id]
+                latest_fix_times.pop(device_id, None)
+            devices_refreshed_at = status_refreshed_at = time.monotonic()
+            # 刷新后仍不在目录中的设备（如已禁用）不再反复触发刷新
+            unknown_devices.clear()
+            unknown_devices.update(
+                position.device_id
+                for position in positions
+                if position.device_id not in device_index
             )
+        if socket is not None:
+            positions = _async_keep_newer(positions, strict=False)
+        for position in positions:
+            device_index.apply_position(position)
+
+        await _async_process(scheduler.select(positions, due))
+        resync_pending = False
+        # 全量同步时补上断线期间的事件
+        await _async_fetch_events(force=full_sync)
+        stats.observe(STAGE_UPDATE, time.perf_counter() - started)
+
+    async def _async_push(devices, positions, events):
+        """Process the devices, positions and events pushed by the socket."""
+        device_index.update(devices)
+        changed = {}
+        # 不比已知定位新的推送（含同步期间已被取代的）不再处理，设备不会跳回旧位置
+        for position in _async_keep_newer(positions, strict=True):
+            changed[position.device_id] = position
+        # 只有设备信息变化（如在线状态）时，沿用该设备最近一次的位置
+        for device in devices:
+            if device.id not in changed and device.id in latest_positions:
+                changed[device.id] = latest_positions[device.id]
+
+        await _async_process(list(changed.values()))
+        if events and event_ingestor is not None:
+            _async_fire_events(events)
+
+    # 同一时间只运行一次更新，重叠的定时触发合并为一次
+    guard = UpdateGuard(_async_update, config[CONF_SCAN_INTERVAL])
+
+    if config.get(CONF_PUSH, False):
+        socket = TraccarSocket(
+            hass,
+            async_get_clientsession(hass, config[CONF_VERIFY_SSL]),
+            config[CONF_HOST],
+            config[CONF_PORT],
+            config[CONF_SSL],
+            config[CONF_USERNAME],
+            config[CONF_PASSWORD],
+            on_message=_async_push,
+            # 每次(重新)连接后做一次全量同步，补上断线期间的变化
+            on_connect=guard.async_call,
+        )
+
+    async def _async_tick(now):
+        """Run a timer tick: expire stale trips, then the guarded update."""
+        # 推送模式下定时轮询直接返回，超时的行程在这里结束
+        _async_expire_trips()
+        await guard.async_call(now)
 
     timer = async_track_time_interval(
-        hass, _async_update, datetime.timedelta(seconds=config[CONF_SCAN_INTERVAL]))
+        hass, _async_tick, datetime.timedelta(seconds=config[CONF_SCAN_INTERVAL]))
 
     hass.data[DOMAIN][config_entry.entry_id] = {
-        DEVICE_TRACKERS: set(), SENSORS: set(), STOP_TIMER: timer}
+        DEVICE_TRACKERS: set(), SENSORS: set(), STOP_TIMER: timer, SOCKET: socket,
+        DEVICE_INDEX: device_index, FIX_FILTER: fix_filter,
+        SCHEDULER: scheduler, UPDATE_GUARD: guard, STATS: stats,
+        OFFLINE_GEOCODER: offline_geocoder, GEOFENCE_MONITOR: geofence_monitor,
+        EVENT_INGESTOR: event_ingestor, TRACK_STORE: track_store}
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    if last_dispatch:
+        # 先用上次保存的快照创建实体，不必等第一次查询
+        _dispatch([
+            snapshot if snapshot.server == server else replace(snapshot, server=server)
+            for snapshot in last_dispatch.values()
+        ])
+    if socket is not None:
+        # 连接后的全量同步就是第一次查询
+        socket.async_start()
+    else:
+        config_entry.async_create_background_task(
+            hass, guard.async_call(), f"ha_traccar first update {server}"
+        )
+
+    @callback
+    def _async_save_snapshots(event):
+        """Persist the latest snapshots when Home Assistant stops."""
+        state_store.async_schedule_snapshot_save()
+
+    config_entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_save_snapshots)
+    )
     return True
 
 
+async def _async_get_offline_geocoder(hass: HomeAssistant, path: str) -> OfflineGeocoder | None:
+    """Return the offline geocoder of a place file, loading it once for all entries."""
+    if not path:
+        _LOGGER.error("Offline geocoding needs a place file")
+        return None
+    path = hass.config.path(path)
+    geocoders = hass.data[DOMAIN].setdefault(OFFLINE_GEOCODERS, {})
+    if (geocoder := geocoders.get(path)) is None:
+        try:
+            geocoder = await hass.async_add_executor_job(OfflineGeocoder.from_file, path)
+        except OSError as err:
+            _LOGGER.error("Cannot read the place file %s: %s", path, err)
+            return None
+        geocoders[path] = geocoder
+    return geocoder
+
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(
@@ -314,8 +922,22 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
 
     if unload_ok:
         hass.data[DOMAIN][config_entry.entry_id][STOP_TIMER]()
+        if (socket := hass.data[DOMAIN][config_entry.entry_id][SOCKET]) is not None:
+            await socket.async_stop()
         hass.data[DOMAIN].pop(config_entry.entry_id)
+        state_store = hass.data[DOMAIN][STATE_STORE]
+        state_store.async_release_entry(config_entry.entry_id)
+        await state_store.async_flush()
         if len(hass.config_entries.async_entries(DOMAIN)) == 0:
             hass.data.pop(DOMAIN)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Forget the stored device states of a removed entry."""
+    if (state_store := hass.data.get(DOMAIN, {}).get(STATE_STORE)) is None:
+        state_store = TraccarStateStore(hass)
+    await state_store.async_load()
+    state_store.async_remove_entry(config_entry.entry_id)
+    await state_store.async_flush()
@@ -0,0 +1,55 @@
+"""Traccar API client with the queries pytraccar does not provide."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+from pytraccar import ApiClient, PositionModel, ReportsEventeModel
+
+from homeassistant.util import dt as dt_util
+
+# 每个事件查询最多带这么多设备ID，避免URL过长
+EVENT_QUERY_DEVICES = 100
+
+
+class TraccarApiClient(ApiClient):
+    """pytraccar client extended with per-device position and event queries."""
+
+    async def get_device_positions(self, device_id: int) -> list[PositionModel]:
+        """Get the latest position of one device."""
+        return self._parse_response(
+            list[PositionModel],
+            await self._call_api("positions", params=[("deviceId", device_id)]),
+        )
+
+    async def get_events(
+        self,
+        device_ids: list[int],
+        start: datetime,
+        end: datetime,
+        event_types: list[str],
+    ) -> list[ReportsEventeModel]:
+        """Get the events of the devices between two times; no types means all."""
+        # pytraccar的get_reports_events只接受naive UTC时间，且默认值在导入时就固定了
+        params = [
+            ("from", dt_util.as_utc(start).strftime("%Y-%m-%dT%H:%M:%SZ")),
+            ("to", dt_util.as_utc(end).strftime("%Y-%m-%dT%H:%M:%SZ")),
+            *[("type", event_type) for event_type in event_types],
+        ]
+        results = await asyncio.gather(
+            *(
+                self._call_api(
+                    "reports/events",
+                    params=params + [
+                        ("deviceId", device_id)
+                        for device_id in device_ids[index:index + EVENT_QUERY_DEVICES]
+                    ],
+                )
+                for index in range(0, len(device_ids), EVENT_QUERY_DEVICES)
+            )
+        )
+        return [
+            event
+            for result in results
+            for event in self._parse_response(list[ReportsEventeModel], result)
+        ]
@@ -25,12 +25,11 @@ from .const import (
     KEY_CHARGE,
     KEY_IGNITION,
     KEY_MOTION,
-    TRACKER_UPDATE,
     SENSORS,
     CONF_SENSORS,
 )
 
-from . import TraccarEntity
+from . import TraccarEntity, new_device_signal
 
 BINARY_SENSOR_TYPES: tuple[BinarySensorEntityDescription, ...] = (
     BinarySensorEntityDescription(
@@ -73,29 +72,36 @@ async def async_setup_entry(
         CONF_SENSORS, []) if s in BINARY_SENSOR_TYPES_KEYS]
 
     @callback
-    def _receive_data(server, device, position, calculatedata, attr_show):
-        for sensor_type in enabled_sensors:
-            sensor_id = f"{device.unique_id}-{sensor_type}"
-            if sensor_id in hass.data[DOMAIN][entry.entry_id][SENSORS]:
-                continue
+    def _receive_data(snapshots):
+        """Create the sensors of new devices in one batch."""
+        sensors = hass.data[DOMAIN][entry.entry_id][SENSORS]
+        entities = []
+        for snapshot in snapshots:
+            for sensor_type in enabled_sensors:
+                sensor_id = f"{snapshot.server}-{snapshot.unique_id}-{sensor_type}"
+                if sensor_id in sensors:
+                    continue
 
-            hass.data[DOMAIN][entry.entry_id][SENSORS].add(sensor_id)
+                sensors.add(sensor_id)
+                entities.append(
+                    TraccarBinarySensorEntity(BINARY_SENSOR_TYPES_MAP[sensor_type], snapshot)
+                )
 
-            async_add_entities(
-                [TraccarBinarySensorEntity(
-                    BINARY_SENSOR_TYPES_MAP[sensor_type], server, device, position, calculatedata, attr_show)]
-            )
+        if entities:
+            async_add_entities(entities)
 
-    async_dispatcher_connect(hass, TRACKER_UPDATE, _receive_data)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, new_device_signal(entry.entry_id), _receive_data)
+    )
 
 
 class TraccarBinarySensorEntity(BinarySensorEntity, TraccarEntity):
     _attr_has_entity_name = True
 
-    def __init__(self, description, server, device, position, calculatedata, attr_show):
-        super().__init__(server, device)
+    def __init__(self, description, snapshot):
+        super().__init__(snapshot)
         self.entity_description = description
-        self._unique_id = f"{server}-{device.unique_id}-{description.key}"
+        self._unique_id = f"{snapshot.server}-{snapshot.unique_id}-{description.key}"
         self._attr_translation_key = f"{self.entity_description.name}"
         attr_map = {
             KEY_MOTION: ATTR_MOTION,
@@ -104,12 +110,14 @@ class TraccarBinarySensorEntity(BinarySensorEntity, TraccarEntity):
             KEY_IGNITION: ATTR_IGNITION
         }
         self._attributes_key = attr_map.get(description.key)
-        self._update_traccar_info(device, position, calculatedata, attr_show)
+        self._update_traccar_info(snapshot)
 
-    def _update_traccar_info(self, device, position, calculatedata, attr_show):
-        if (_state := position.attributes.get(self._attributes_key)) is not None:
+    def _update_traccar_info(self, snapshot):
+        if (_state := snapshot.attributes.get(self._attributes_key)) is not None:
             self._attr_is_on = _state
 
+    def _state_fingerprint(self):
+        return self._attr_is_on
 
     @property
     def unique_id(self):
@@ -21,6 +21,46 @@ from .const import (
     DOMAIN, 
     CONF_SENSORS,
     CONF_ATTR_SHOW,
+    CONF_PUSH,
+    CONF_VOLATILE_WRITES,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_GEOFENCE_EVENTS,
+    CONF_GEOFENCE_HYSTERESIS,
+    DEFAULT_GEOFENCE_HYSTERESIS,
+    CONF_EVENTS,
+    EVENTS,
+    CONF_TRACK_SIZE,
+    DEFAULT_TRACK_SIZE,
+    CONF_TRIP_MIN_SPEED,
+    CONF_TRIP_STOP_DURATION,
+    CONF_TRIP_MIN_DISTANCE,
+    DEFAULT_TRIP_MIN_SPEED,
+    DEFAULT_TRIP_STOP_DURATION,
+    DEFAULT_TRIP_MIN_DISTANCE,
+    CONF_GEOCODE_RADIUS,
+    CONF_GEOCODE_TTL,
+    CONF_GEOCODE_CACHE_SIZE,
+    CONF_GEOCODER_MODE,
+    CONF_OFFLINE_GEOCODER_FILE,
+    GEOCODER_MODE_ONLINE,
+    GEOCODER_MODES,
+    CONF_MAX_ACCURACY,
+    CONF_SKIP_ACCURACY_ON,
+    CONF_MIN_SATELLITES,
+    CONF_MAX_HDOP,
+    CONF_MAX_SPEED,
+    CONF_DEVICE_REFRESH_INTERVAL,
+    CONF_STATUS_REFRESH_INTERVAL,
+    CONF_SLOW_SCAN_INTERVAL,
+    CONF_TRACKER_ATTRIBUTES,
+    DEFAULT_GEOCODE_RADIUS,
+    DEFAULT_GEOCODE_TTL,
+    DEFAULT_GEOCODE_CACHE_SIZE,
+    DEFAULT_MAX_SPEED,
+    DEFAULT_DEVICE_REFRESH_INTERVAL,
+    DEFAULT_STATUS_REFRESH_INTERVAL,
+    DEFAULT_SLOW_SCAN_INTERVAL,
+    DEFAULT_TRACKER_ATTRIBUTES,
     KEY_ARMED, 
     KEY_BATTERY_LEVEL, 
     KEY_BATTERY, 
@@ -39,6 +79,9 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# 常见的报警类属性，出现时不过滤该定位
+SKIP_ACCURACY_ATTRIBUTES = ["alarm", "event", "sos"]
+
 class TraccarFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Met Eireann component."""
 
@@ -67,7 +110,54 @@ class TraccarFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         vol.Required(CONF_USERNAME): cv.string,
                         vol.Required(CONF_PASSWORD): cv.string,
                         vol.Required(CONF_SCAN_INTERVAL, default=5): vol.Coerce(int),
+                        vol.Optional(CONF_SLOW_SCAN_INTERVAL, default=DEFAULT_SLOW_SCAN_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_DEVICE_REFRESH_INTERVAL, default=DEFAULT_DEVICE_REFRESH_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_STATUS_REFRESH_INTERVAL, default=DEFAULT_STATUS_REFRESH_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_PUSH, default=False): cv.boolean,
+                        vol.Optional(CONF_GEOCODE_RADIUS, default=DEFAULT_GEOCODE_RADIUS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                        vol.Optional(CONF_GEOCODE_TTL, default=DEFAULT_GEOCODE_TTL): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_GEOCODE_CACHE_SIZE, default=DEFAULT_GEOCODE_CACHE_SIZE): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                        vol.Optional(CONF_GEOCODER_MODE, default=GEOCODER_MODE_ONLINE): SelectSelector(
+                            SelectSelectorConfig(
+                                options=GEOCODER_MODES,
+                                translation_key=CONF_GEOCODER_MODE
+                            )
+                        ),
+                        vol.Optional(CONF_OFFLINE_GEOCODER_FILE, default=""): str,
+                        vol.Optional(CONF_MAX_ACCURACY, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_MIN_SATELLITES, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_MAX_HDOP, default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                        vol.Optional(CONF_MAX_SPEED, default=DEFAULT_MAX_SPEED): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_SKIP_ACCURACY_ON, default=[]): SelectSelector(
+                            SelectSelectorConfig(
+                                options=SKIP_ACCURACY_ATTRIBUTES,
+                                multiple=True,
+                                custom_value=True
+                            )
+                        ),
                         vol.Optional(CONF_ATTR_SHOW, default=False): cv.boolean,
+                        vol.Optional(CONF_TRACKER_ATTRIBUTES, default=DEFAULT_TRACKER_ATTRIBUTES): SelectSelector(
+                            SelectSelectorConfig(
+                                options=DEFAULT_TRACKER_ATTRIBUTES,
+                                multiple=True,
+                                custom_value=True
+                            )
+                        ),
+                        vol.Optional(CONF_VOLATILE_WRITES, default=False): cv.boolean,
+                        vol.Optional(CONF_DIAGNOSTIC_SENSORS, default=False): cv.boolean,
+                        vol.Optional(CONF_TRACK_SIZE, default=DEFAULT_TRACK_SIZE): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                        vol.Optional(CONF_TRIP_MIN_SPEED, default=DEFAULT_TRIP_MIN_SPEED): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                        vol.Optional(CONF_TRIP_STOP_DURATION, default=DEFAULT_TRIP_STOP_DURATION): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_TRIP_MIN_DISTANCE, default=DEFAULT_TRIP_MIN_DISTANCE): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_GEOFENCE_EVENTS, default=False): cv.boolean,
+                        vol.Optional(CONF_GEOFENCE_HYSTERESIS, default=DEFAULT_GEOFENCE_HYSTERESIS): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_EVENTS, default=[]): SelectSelector(
+                            SelectSelectorConfig(
+                                options=EVENTS,
+                                multiple=True,
+                                translation_key=CONF_EVENTS
+                            )
+                        ),
                         vol.Optional(CONF_SENSORS): SelectSelector(
                             SelectSelectorConfig(
                                 options=[
@@ -132,7 +222,54 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         vol.Required(CONF_USERNAME, default=self.config.get(CONF_USERNAME)): cv.string,
                         vol.Required(CONF_PASSWORD, default=self.config.get(CONF_PASSWORD)): cv.string,
                         vol.Required(CONF_SCAN_INTERVAL, default=self.config.get(CONF_SCAN_INTERVAL)): vol.Coerce(int),
+                        vol.Optional(CONF_SLOW_SCAN_INTERVAL, default=self.config.get(CONF_SLOW_SCAN_INTERVAL, DEFAULT_SLOW_SCAN_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_DEVICE_REFRESH_INTERVAL, default=self.config.get(CONF_DEVICE_REFRESH_INTERVAL, DEFAULT_DEVICE_REFRESH_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_STATUS_REFRESH_INTERVAL, default=self.config.get(CONF_STATUS_REFRESH_INTERVAL, DEFAULT_STATUS_REFRESH_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_PUSH, default=self.config.get(CONF_PUSH, False)): cv.boolean,
+                        vol.Optional(CONF_GEOCODE_RADIUS, default=self.config.get(CONF_GEOCODE_RADIUS, DEFAULT_GEOCODE_RADIUS)): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                        vol.Optional(CONF_GEOCODE_TTL, default=self.config.get(CONF_GEOCODE_TTL, DEFAULT_GEOCODE_TTL)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_GEOCODE_CACHE_SIZE, default=self.config.get(CONF_GEOCODE_CACHE_SIZE, DEFAULT_GEOCODE_CACHE_SIZE)): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                        vol.Optional(CONF_GEOCODER_MODE, default=self.config.get(CONF_GEOCODER_MODE, GEOCODER_MODE_ONLINE)): SelectSelector(
+                            SelectSelectorConfig(
+                                options=GEOCODER_MODES,
+                                translation_key=CONF_GEOCODER_MODE
+                            )
+                        ),
+                        vol.Optional(CONF_OFFLINE_GEOCODER_FILE, default=self.config.get(CONF_OFFLINE_GEOCODER_FILE, "")): str,
+                        vol.Optional(CONF_MAX_ACCURACY, default=self.config.get(CONF_MAX_ACCURACY, 0)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_MIN_SATELLITES, default=self.config.get(CONF_MIN_SATELLITES, 0)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_MAX_HDOP, default=self.config.get(CONF_MAX_HDOP, 0)): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                        vol.Optional(CONF_MAX_SPEED, default=self.config.get(CONF_MAX_SPEED, DEFAULT_MAX_SPEED)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_SKIP_ACCURACY_ON, default=self.config.get(CONF_SKIP_ACCURACY_ON, [])): SelectSelector(
+                            SelectSelectorConfig(
+                                options=SKIP_ACCURACY_ATTRIBUTES,
+                                multiple=True,
+                                custom_value=True
+                            )
+                        ),
                         vol.Optional(CONF_ATTR_SHOW, default=self.config.get(CONF_ATTR_SHOW)): cv.boolean,
+                        vol.Optional(CONF_TRACKER_ATTRIBUTES, default=self.config.get(CONF_TRACKER_ATTRIBUTES, DEFAULT_TRACKER_ATTRIBUTES)): SelectSelector(
+                            SelectSelectorConfig(
+                                options=DEFAULT_TRACKER_ATTRIBUTES,
+                                multiple=True,
+                                custom_value=True
+                            )
+                        ),
+                        vol.Optional(CONF_VOLATILE_WRITES, default=self.config.get(CONF_VOLATILE_WRITES, False)): cv.boolean,
+                        vol.Optional(CONF_DIAGNOSTIC_SENSORS, default=self.config.get(CONF_DIAGNOSTIC_SENSORS, False)): cv.boolean,
+                        vol.Optional(CONF_TRACK_SIZE, default=self.config.get(CONF_TRACK_SIZE, DEFAULT_TRACK_SIZE)): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                        vol.Optional(CONF_TRIP_MIN_SPEED, default=self.config.get(CONF_TRIP_MIN_SPEED, DEFAULT_TRIP_MIN_SPEED)): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                        vol.Optional(CONF_TRIP_STOP_DURATION, default=self.config.get(CONF_TRIP_STOP_DURATION, DEFAULT_TRIP_STOP_DURATION)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_TRIP_MIN_DISTANCE, default=self.config.get(CONF_TRIP_MIN_DISTANCE, DEFAULT_TRIP_MIN_DISTANCE)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_GEOFENCE_EVENTS, default=self.config.get(CONF_GEOFENCE_EVENTS, False)): cv.boolean,
+                        vol.Optional(CONF_GEOFENCE_HYSTERESIS, default=self.config.get(CONF_GEOFENCE_HYSTERESIS, DEFAULT_GEOFENCE_HYSTERESIS)): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                        vol.Optional(CONF_EVENTS, default=self.config.get(CONF_EVENTS, [])): SelectSelector(
+                            SelectSelectorConfig(
+                                options=EVENTS,
+                                multiple=True,
+                                translation_key=CONF_EVENTS
+                            )
+                        ),
                         vol.Optional(CONF_SENSORS, default=self.config.get(CONF_SENSORS,[])): SelectSelector(
                             SelectSelectorConfig(
                                 options=[
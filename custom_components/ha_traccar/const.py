@@ -2,6 +2,7 @@
 
 DOMAIN = "ha_traccar"
 TRACKER_UPDATE = "ha_traccar_update"
+TRACKER_NEW_DEVICE = "ha_traccar_new_device"
 
 CONF_MAX_ACCURACY = "max_accuracy"
 CONF_SKIP_ACCURACY_ON = "skip_accuracy_filter_on"
@@ -9,10 +10,81 @@ CONF_SENSORS = "sensors"
 CONF_ATTR_SHOW = "attr_show"
 CONF_MAP_GCJ_LAT = "map_gcj_lat"
 CONF_MAP_GCJ_LNG = "map_gcj_lng"
+CONF_MAP_BD_LAT = "map_bd_lat"
+CONF_MAP_BD_LNG = "map_bd_lng"
+CONF_PUSH = "push"
+CONF_VOLATILE_WRITES = "volatile_writes"
+CONF_GEOCODE_RADIUS = "geocode_radius"
+CONF_GEOCODE_TTL = "geocode_ttl"
+CONF_GEOCODE_CACHE_SIZE = "geocode_cache_size"
+CONF_MIN_SATELLITES = "min_satellites"
+CONF_MAX_HDOP = "max_hdop"
+CONF_MAX_SPEED = "max_speed"
+CONF_DEVICE_REFRESH_INTERVAL = "device_refresh_interval"
+CONF_STATUS_REFRESH_INTERVAL = "status_refresh_interval"
+CONF_SLOW_SCAN_INTERVAL = "slow_scan_interval"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_GEOFENCE_EVENTS = "geofence_events"
+CONF_GEOFENCE_HYSTERESIS = "geofence_hysteresis"
+CONF_EVENTS = "events"
+CONF_TRACK_SIZE = "track_size"
+CONF_TRIP_MIN_SPEED = "trip_min_speed"
+CONF_TRIP_STOP_DURATION = "trip_stop_duration"
+CONF_TRIP_MIN_DISTANCE = "trip_min_distance"
+CONF_TRACKER_ATTRIBUTES = "tracker_attributes"
+CONF_GEOCODER_MODE = "geocoder_mode"
+CONF_OFFLINE_GEOCODER_FILE = "offline_geocoder_file"
+
+GEOCODER_MODE_ONLINE = "online"
+GEOCODER_MODE_OFFLINE = "offline"
+# 先查离线地点，附近没有地点时再在线查询
+GEOCODER_MODE_OFFLINE_FIRST = "offline_first"
+GEOCODER_MODES = [GEOCODER_MODE_ONLINE, GEOCODER_MODE_OFFLINE, GEOCODER_MODE_OFFLINE_FIRST]
+
+DEFAULT_GEOCODE_RADIUS = 30
+DEFAULT_GEOCODE_TTL = 86400
+DEFAULT_GEOCODE_CACHE_SIZE = 4096
+# km/h，0为不检查
+DEFAULT_MAX_SPEED = 300
+# 设备目录（名称、型号等）的刷新间隔，秒
+DEFAULT_DEVICE_REFRESH_INTERVAL = 3600
+# 轮询时设备在线状态的刷新间隔，秒，0为只随设备目录刷新；推送模式由socket送达
+DEFAULT_STATUS_REFRESH_INTERVAL = 60
+# 停放和离线设备的查询间隔，秒，0为不降速
+DEFAULT_SLOW_SCAN_INTERVAL = 300
+# 离开围栏的滞后距离，米
+DEFAULT_GEOFENCE_HYSTERESIS = 30
+# 每台设备保留的最近定位数，每个定位48字节
+DEFAULT_TRACK_SIZE = 30
+# 行程切分：低于这个速度（km/h）视为停车
+DEFAULT_TRIP_MIN_SPEED = 5
+# 停车超过这么多秒才结束行程，等红灯不算
+DEFAULT_TRIP_STOP_DURATION = 180
+# 离开停车点超过这么多米才开始行程，停车时的GPS漂移不算
+DEFAULT_TRIP_MIN_DISTANCE = 200
+# 复制到device_tracker属性中的定位原始属性，其余协议属性不进入状态和数据库
+DEFAULT_TRACKER_ATTRIBUTES = [
+    "batteryLevel", "motion", "ignition", "charge", "armed", "alarm",
+    "sat", "hdop", "totalDistance",
+]
 
 DEVICE_TRACKERS = "devices"
 SENSORS = "sensors"
 STOP_TIMER = "stop_timer"
+SOCKET = "socket"
+DEVICE_INDEX = "device_index"
+STATE_STORE = "state_store"
+GEOCODE_CACHE = "geocode_cache"
+GEOCODER = "geocoder"
+OFFLINE_GEOCODERS = "offline_geocoders"
+OFFLINE_GEOCODER = "offline_geocoder"
+GEOFENCE_MONITOR = "geofence_monitor"
+EVENT_INGESTOR = "event_ingestor"
+TRACK_STORE = "track_store"
+FIX_FILTER = "fix_filter"
+SCHEDULER = "scheduler"
+UPDATE_GUARD = "update_guard"
+STATS = "stats"
 
 KEY_BATTERY_LEVEL = "battery_level"
 KEY_BATTERY = "battery"
@@ -57,6 +129,11 @@ ATTR_LASTSTOPTIME = "laststoptime"
 ATTR_LAST_UPDATE = "last_update"
 ATTR_QUERYTIME = "querytime"
 ATTR_PARKING_TIME = "parkingtime"
+# 传感器和设备信息从定位原始属性中读取的字段，快照只保存这些和追踪器属性
+ENTITY_ATTRIBUTES = [
+    ATTR_VERSION_HW, ATTR_VERSION_FW, ATTR_BATTERY, ATTR_TOTALDISTANCE,
+    ATTR_MOTION, ATTR_ARMED, ATTR_CHARGE, ATTR_IGNITION,
+]
 
 EVENT_DEVICE_MOVING = "device_moving"
 EVENT_COMMAND_RESULT = "command_result"
@@ -75,3 +152,34 @@ EVENT_DEVICE_UNKNOWN = "device_unknown"
 EVENT_IGNITION_OFF = "ignition_off"
 EVENT_IGNITION_ON = "ignition_on"
 EVENT_ALL_EVENTS = "all_events"
+EVENT_TRIP_START = "trip_start"
+EVENT_TRIP_END = "trip_end"
+EVENT_TRACCAR_GEOFENCE_ENTER = "traccar_geofence_enter"
+EVENT_TRACCAR_GEOFENCE_EXIT = "traccar_geofence_exit"
+
+# 与本地地理围栏判断的事件同名的Traccar事件改用这些名称，自动化可以区分来源
+TRACCAR_EVENT_RENAMES = {
+    EVENT_GEOFENCE_ENTER: EVENT_TRACCAR_GEOFENCE_ENTER,
+    EVENT_GEOFENCE_EXIT: EVENT_TRACCAR_GEOFENCE_EXIT,
+}
+
+# 可以转发到HA的Traccar事件，all_events表示全部类型
+EVENTS = [
+    EVENT_ALL_EVENTS,
+    EVENT_DEVICE_MOVING,
+    EVENT_DEVICE_STOPPED,
+    EVENT_DEVICE_OVERSPEED,
+    EVENT_DEVICE_ONLINE,
+    EVENT_DEVICE_OFFLINE,
+    EVENT_DEVICE_UNKNOWN,
+    EVENT_DEVICE_FUEL_DROP,
+    EVENT_IGNITION_ON,
+    EVENT_IGNITION_OFF,
+    EVENT_GEOFENCE_ENTER,
+    EVENT_GEOFENCE_EXIT,
+    EVENT_ALARM,
+    EVENT_MAINTENANCE,
+    EVENT_TEXT_MESSAGE,
+    EVENT_DRIVER_CHANGED,
+    EVENT_COMMAND_RESULT,
+]
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-import time, datetime
 from homeassistant.components.device_tracker import (
     SourceType,
     TrackerEntity,
@@ -13,15 +12,12 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .helper import gcj02towgs84, wgs84togcj02, gcj02_to_bd09
 
 from .const import (
     DOMAIN,
-    TRACKER_UPDATE,
     DEVICE_TRACKERS,
     ATTR_ACCURACY,
     ATTR_ALTITUDE,
-    ATTR_BATTERY_LEVEL,
     ATTR_BEARING,
     ATTR_LATITUDE,
     ATTR_LONGITUDE,
@@ -33,31 +29,50 @@ from .const import (
     CONF_MAP_GCJ_LNG,
     CONF_MAP_BD_LAT,
     CONF_MAP_BD_LNG, 
+    CONF_VOLATILE_WRITES,
+    CONF_TRACKER_ATTRIBUTES,
+    DEFAULT_TRACKER_ATTRIBUTES,
+    ATTR_QUERYTIME,
+    ATTR_PARKING_TIME,
 )
 
-from . import TraccarEntity
+from . import TraccarEntity, new_device_signal
 
 _LOGGER = logging.getLogger(__name__)
 
+VOLATILE_ATTRIBUTES = frozenset({ATTR_QUERYTIME, ATTR_PARKING_TIME})
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Configure a dispatcher connection based on a config entry."""    
+    volatile_writes = entry.data.get(CONF_VOLATILE_WRITES, False)
+    attr_show = entry.data.get(CONF_ATTR_SHOW, True)
+    tracker_attributes = tuple(
+        entry.data.get(CONF_TRACKER_ATTRIBUTES, DEFAULT_TRACKER_ATTRIBUTES))
+
     @callback
-    def _receive_data(server, device, position,calculatedata, attr_show):
-        """Receive set location."""
-        if device.unique_id in hass.data[DOMAIN][entry.entry_id][DEVICE_TRACKERS]:
-            return
+    def _receive_data(snapshots):
+        """Create the trackers of new devices in one batch."""
+        trackers = hass.data[DOMAIN][entry.entry_id][DEVICE_TRACKERS]
+        entities = []
+        for snapshot in snapshots:
+            tracker_id = f"{snapshot.server}-{snapshot.unique_id}-device_tracker"
+            if tracker_id in trackers:
+                continue
 
-        hass.data[DOMAIN][entry.entry_id][DEVICE_TRACKERS].add(
-            device.unique_id)
+            trackers.add(tracker_id)
+            entities.append(
+                TraccarDeviceTrackerEntity(snapshot, attr_show, tracker_attributes, volatile_writes)
+            )
 
-        async_add_entities(
-            [TraccarDeviceTrackerEntity(server, device, position, calculatedata, attr_show)]
-        )
+        if entities:
+            async_add_entities(entities)
 
-    async_dispatcher_connect(hass, TRACKER_UPDATE, _receive_data)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, new_device_signal(entry.entry_id), _receive_data)
+    )
 
 
 class TraccarDeviceTrackerEntity(TrackerEntity, TraccarEntity):
@@ -65,57 +80,70 @@ class TraccarDeviceTrackerEntity(TrackerEntity, TraccarEntity):
     _attr_has_entity_name = True
     _attr_name = None
     _attr_translation_key = "traccar_device_tracker"
+    # 每次轮询都会变化的属性不写入数据库
+    _unrecorded_attributes = VOLATILE_ATTRIBUTES
 
-    def __init__(self, server, device, position, calculatedata, attr_show):
+    def __init__(self, snapshot, attr_show, tracker_attributes=(), volatile_writes=False):
         """Set up Geofency entity."""
-        super().__init__(server, device)
+        super().__init__(snapshot)
         self._attributes = {}
-        self._unique_id = f"{server}-{device.unique_id}-device_tracker"
+        self._volatile_writes = volatile_writes
+        self._unique_id = f"{snapshot.server}-{snapshot.unique_id}-device_tracker"
         self._attr_show = attr_show
-        self._model = position.protocol
-        self._update_traccar_info(device, position, calculatedata, attr_show)        
-
-    def _update_traccar_info(self, device, position, calculatedata, attr_show):                         
-        self._name = device.name
-        self._latitude = position.latitude
-        self._longitude = position.longitude
-        self._battery = position.attributes.get(ATTR_BATTERY_LEVEL, -1)
-        self._accuracy = position.accuracy or 0.0
-        self._speed = position.speed or 0.0
-        if attr_show == True:
-            position.attributes["last_update"] = device.last_update
-            position.attributes["device_status"] = device.status
-            position.attributes["battery_level"] = self._battery
-            position.attributes["speed"] = self._speed
-            if position.address:
-                addressstrlist = position.address.replace(" ","").split(",")
-                if len(addressstrlist) > 5:
-                    addressstr = ""
-                    for i in range(len(addressstrlist)-3, -1, -1):
-                        addressstr += addressstrlist[i]
-                    position.attributes["address"] = addressstr
-                else:
-                    position.attributes["address"] = position.address
-            else:
-                position.attributes["address"] = "unknown"                
-
-            position.attributes["parkingtime"] = calculatedata["parkingtime"]
-            position.attributes["get_address"] = calculatedata["get_address"]
-            position.attributes["runorstop"] = calculatedata["runorstop"]
-            position.attributes["laststoptime"] = calculatedata["laststoptime"]
-            position.attributes["querytime"] = calculatedata["querytime"]
-            gcjdata = wgs84togcj02(position.longitude, position.latitude)
-            position.attributes[CONF_MAP_GCJ_LAT] = gcjdata[1]
-            position.attributes[CONF_MAP_GCJ_LNG] = gcjdata[0]
-            bddata = gcj02_to_bd09(position.attributes[CONF_MAP_GCJ_LNG], position.attributes[CONF_MAP_GCJ_LAT])
-            position.attributes[CONF_MAP_BD_LAT] = bddata[1]
-            position.attributes[CONF_MAP_BD_LNG] = bddata[0]
-            
-            self._attributes.update(position.attributes)
+        self._tracker_attributes = tracker_attributes
+        self._model = snapshot.protocol
+        self._hw_version = None
+        self._sw_version = None
+        self._update_traccar_info(snapshot)
+
+    def _update_traccar_info(self, snapshot):
+        self._name = snapshot.name
+        self._latitude = snapshot.latitude
+        self._longitude = snapshot.longitude
+        self._battery = snapshot.battery_level
+        self._accuracy = snapshot.accuracy
+        self._speed = snapshot.speed
+        self._hw_version = snapshot.attributes.get(ATTR_VERSION_HW, self._hw_version)
+        self._sw_version = snapshot.attributes.get(ATTR_VERSION_FW, self._sw_version)
+        if self._attr_show:
+            # 只保留允许的协议属性，避免属性不断累积撑大状态和数据库
+            attributes = snapshot.attributes
+            self._attributes = {
+                key: attributes[key]
+                for key in self._tracker_attributes
+                if key in attributes
+            }
+            self._attributes.update({
+                "last_update": snapshot.last_update,
+                "device_status": snapshot.status,
+                "battery_level": self._battery,
+                "speed": self._speed,
+                "address": snapshot.address,
+                "parkingtime": snapshot.parking_time,
+                "get_address": snapshot.get_address,
+                "runorstop": snapshot.runorstop,
+                "laststoptime": snapshot.last_stop_text,
+                "querytime": snapshot.query_text,
+                "poll_tier": snapshot.poll_tier,
+                CONF_MAP_GCJ_LAT: snapshot.gcj_lat,
+                CONF_MAP_GCJ_LNG: snapshot.gcj_lng,
+                CONF_MAP_BD_LAT: snapshot.bd_lat,
+                CONF_MAP_BD_LNG: snapshot.bd_lng,
+            })
         else:
             self._attributes={}
- 
-        
+
+    def _state_fingerprint(self):
+        # 查询时间、停车时长每次轮询都会变，默认不因它们单独写状态
+        volatile = () if self._volatile_writes else VOLATILE_ATTRIBUTES
+        return (
+            self._name,
+            self._latitude,
+            self._longitude,
+            self._accuracy,
+            [item for item in self._attributes.items() if item[0] not in volatile],
+        )
+
     # @property
     # def battery_level(self):
         # """Return battery value of the device."""
@@ -155,14 +183,20 @@ class TraccarDeviceTrackerEntity(TrackerEntity, TraccarEntity):
             name=self._name,
             manufacturer="Traccar",
             model=self._model,
-            hw_version=self._attributes.get(ATTR_VERSION_HW),
-            sw_version=self._attributes.get(ATTR_VERSION_FW)
+            hw_version=self._hw_version,
+            sw_version=self._sw_version
         )
 
     @property
     def should_poll(self):
         """Return the polling requirement of the entity."""
-        return True
+        # 状态只由集成的更新流程推送，HA不再单独轮询实体
+        return False
+
+    @property
+    def force_update(self):
+        """Write the state only when it changed."""
+        return False
         
     @property
     def source_type(self) -> SourceType:
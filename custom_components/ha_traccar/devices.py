@@ -0,0 +1,106 @@
+"""Id-indexed registry of the Traccar devices of one config entry."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+from pytraccar import DeviceModel, PositionModel
+
+from homeassistant.util import dt as dt_util
+
+STATUS_ONLINE = "online"
+
+
+class DeviceIndex:
+    """Devices of one Traccar server keyed by their Traccar id.
+
+    Positions reference their device by id, so joining a poll's positions
+    to the devices is one dict lookup per position instead of a scan of
+    the whole device list. The full device list only needs to be fetched
+    rarely; `apply_position` keeps `last_update` current, and the status
+    is taken from the server by `update_status`.
+    """
+
+    __slots__ = ("_devices",)
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._devices: dict[int, DeviceModel] = {}
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def __contains__(self, device_id: int) -> bool:
+        return device_id in self._devices
+
+    def __iter__(self) -> Iterator[DeviceModel]:
+        return iter(self._devices.values())
+
+    def get(self, device_id: int) -> DeviceModel | None:
+        """Return the device with the given Traccar id."""
+        return self._devices.get(device_id)
+
+    def refresh(self, devices: Iterable[DeviceModel]) -> set[int]:
+        """Sync the index with a full device list from the server.
+
+        Entries are replaced in place and devices missing from the list are
+        dropped. Returns the ids that were not known before.
+        """
+        seen: set[int] = set()
+        added = self.update(devices, seen)
+        if len(seen) != len(self._devices):
+            for device_id in self._devices.keys() - seen:
+                del self._devices[device_id]
+        return added
+
+    def update(
+        self, devices: Iterable[DeviceModel], seen: set[int] | None = None
+    ) -> set[int]:
+        """Add or replace the given devices, keeping all others.
+
+        Returns the ids that were not known before.
+        """
+        added = set()
+        known = self._devices
+        for device in devices:
+            if seen is not None:
+                seen.add(device.id)
+            if device.id not in known:
+                added.add(device.id)
+            known[device.id] = device
+        return added
+
+    def update_status(self, devices: Iterable[DeviceModel]) -> set[int]:
+        """Take the status and last update of the known devices from a device list.
+
+        The rest of the catalogue (names, attributes) is left as it is until
+        the next full refresh, which also adds unknown devices. Returns the
+        ids whose status changed.
+        """
+        changed = set()
+        known = self._devices
+        for device in devices:
+            if (current := known.get(device.id)) is None:
+                continue
+            if current.status != device.status:
+                current.status = device.status
+                changed.add(device.id)
+            if device.last_update and device.last_update != current.last_update:
+                received = dt_util.parse_datetime(device.last_update)
+                last = dt_util.parse_datetime(current.last_update) if current.last_update else None
+                if received is not None and (last is None or received > last):
+                    current.last_update = device.last_update
+        return changed
+
+    def apply_position(self, position: PositionModel) -> None:
+        """Advance last_update of a device to the time its latest position was received.
+
+        The status is not derived here: parked devices and devices sending
+        only heartbeats are still online in Traccar.
+        """
+        if (device := self._devices.get(position.device_id)) is None:
+            return
+        if position.server_time != device.last_update:
+            received = dt_util.parse_datetime(position.server_time)
+            last = dt_util.parse_datetime(device.last_update) if device.last_update else None
+            if received is not None and (last is None or received > last):
+                device.last_update = position.server_time
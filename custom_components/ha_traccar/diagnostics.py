@@ -0,0 +1,57 @@
+"""Diagnostics support for Traccar."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    DEVICE_INDEX,
+    FIX_FILTER,
+    GEOCODE_CACHE,
+    GEOCODER,
+    OFFLINE_GEOCODER,
+    GEOFENCE_MONITOR,
+    EVENT_INGESTOR,
+    TRACK_STORE,
+    SCHEDULER,
+    STATE_STORE,
+    STATS,
+    UPDATE_GUARD,
+)
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the update pipeline statistics of a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    geocoder = hass.data[DOMAIN][GEOCODER]
+    return {
+        "config": async_redact_data(dict(entry.data), TO_REDACT),
+        "devices": len(data[DEVICE_INDEX]),
+        "pipeline": data[STATS].as_dict(),
+        "update_guard": data[UPDATE_GUARD].stats,
+        "poll_tiers": data[SCHEDULER].counts,
+        "rejected_fixes": data[FIX_FILTER].stats,
+        "geofences": (
+            monitor.stats if (monitor := data[GEOFENCE_MONITOR]) is not None else None
+        ),
+        "track": data[TRACK_STORE].stats,
+        "events": (
+            ingestor.stats if (ingestor := data[EVENT_INGESTOR]) is not None else None
+        ),
+        "offline_geocoder": (
+            offline.stats if (offline := data[OFFLINE_GEOCODER]) is not None else None
+        ),
+        # 以下对象由所有配置项共用
+        "geocode_cache": hass.data[DOMAIN][GEOCODE_CACHE].stats,
+        "geocoder": {"requests": geocoder.requests, "errors": geocoder.errors},
+        "store": {"saves": hass.data[DOMAIN][STATE_STORE].saves},
+    }
@@ -0,0 +1,122 @@
+"""Incremental ingestion of Traccar events."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+import re
+from typing import Any
+
+from pytraccar import ReportsEventeModel
+
+from homeassistant.util import dt as dt_util
+
+from .const import EVENT_ALL_EVENTS
+
+# 服务器写入事件可能比事件时间晚，每次查询都往回多查这么久，重复的由ID去重
+EVENT_OVERLAP = timedelta(seconds=60)
+# 停机再久，重启后也只补发这段时间内的事件
+MAX_BACKFILL = timedelta(hours=1)
+# 轮询时事件的查询间隔，秒；每次查询按设备数分成多个请求，不随位置每次都查
+EVENT_POLL_INTERVAL = 30
+
+_CAMEL = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+def event_name(event_type: str) -> str:
+    """Return the snake_case name of a Traccar event type ("deviceMoving" -> "device_moving")."""
+    return _CAMEL.sub("_", event_type).lower()
+
+
+def traccar_event_type(name: str) -> str:
+    """Return the Traccar event type of a snake_case name."""
+    first, *rest = name.split("_")
+    return first + "".join(word.capitalize() for word in rest)
+
+
+class EventIngestor:
+    """Pick the events not seen yet from overlapping queries and socket pushes.
+
+    The cursor is the newest event time seen, and the ids of the events
+    within EVENT_OVERLAP of it; both live in the `cursor` dict the store
+    persists, so a restart continues where it stopped instead of reading
+    the history again. `cursor_moved` tells whether the last `accept` saw
+    new events; a cursor that only moved up to the end of an empty query
+    needs no save, as querying again from the stored time finds nothing new.
+    """
+
+    def __init__(self, names: Iterable[str], cursor: dict[str, Any]) -> None:
+        """Initialize with the snake_case event names to keep."""
+        names = set(names)
+        # None表示保留所有类型
+        self.names = None if EVENT_ALL_EVENTS in names else names
+        self._cursor = cursor
+        cursor.setdefault("time", None)
+        cursor.setdefault("seen", {})
+        self.cursor_moved = False
+        self.received = 0
+        self.duplicates = 0
+        self.accepted = 0
+
+    @property
+    def server_types(self) -> list[str]:
+        """Return the Traccar types to ask for; empty means all."""
+        return [] if self.names is None else sorted(map(traccar_event_type, self.names))
+
+    def since(self, now: datetime) -> datetime:
+        """Return the start of the next events query."""
+        if (time := self._cursor["time"]) is None:
+            # 第一次启用时从现在开始，不补发以前的事件
+            self._cursor["time"] = now.isoformat()
+            return now
+        return max(now - MAX_BACKFILL, dt_util.parse_datetime(time) - EVENT_OVERLAP)
+
+    def accept(
+        self, events: Iterable[ReportsEventeModel], until: datetime | None = None
+    ) -> list[tuple[ReportsEventeModel, datetime]]:
+        """Return the new events of the configured types, oldest first.
+
+        `until` is the end of the query the events came from: nothing older
+        than it minus EVENT_OVERLAP can still arrive, so the cursor moves up
+        to there even when there were no events.
+        """
+        seen: dict[str, float] = self._cursor["seen"]
+        newest = dt_util.parse_datetime(self._cursor["time"]) if self._cursor["time"] else None
+        fresh = []
+        self.cursor_moved = False
+        for event in events:
+            self.received += 1
+            key = str(event.id)
+            if key in seen:
+                self.duplicates += 1
+                continue
+            if (event_time := dt_util.parse_datetime(event.event_time)) is None:
+                continue
+            seen[key] = event_time.timestamp()
+            self.cursor_moved = True
+            if newest is None or event_time > newest:
+                newest = event_time
+            if self.names is None or event_name(event.type) in self.names:
+                fresh.append((event, event_time))
+        if until is not None and (newest is None or until - EVENT_OVERLAP > newest):
+            newest = until - EVENT_OVERLAP
+        if newest is not None:
+            self._cursor["time"] = newest.isoformat()
+            # 只需记住重叠窗口内的ID
+            oldest = (newest - EVENT_OVERLAP).timestamp()
+            for key in [key for key, stamp in seen.items() if stamp < oldest]:
+                del seen[key]
+        fresh.sort(key=lambda item: (item[1], item[0].id))
+        self.accepted += len(fresh)
+        return fresh
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the cursor and counts for diagnostics."""
+        return {
+            "types": self.server_types or EVENT_ALL_EVENTS,
+            "cursor": self._cursor["time"],
+            "remembered_ids": len(self._cursor["seen"]),
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "accepted": self.accepted,
+        }
@@ -0,0 +1,146 @@
+"""Rejection of inaccurate or impossible Traccar fixes."""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+import logging
+import math
+
+from pytraccar import PositionModel
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# 地球平均半径（米）
+EARTH_RADIUS = 6371008.8
+
+REASON_ACCURACY = "accuracy"
+REASON_SATELLITES = "satellites"
+REASON_HDOP = "hdop"
+REASON_SPEED = "speed"
+
+
+def distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Return the great-circle distance in metres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    h = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
+
+class _Fix:
+    """Last accepted or held fix of a device."""
+
+    __slots__ = ("latitude", "longitude", "time")
+
+    def __init__(self, position: PositionModel, time: datetime | None) -> None:
+        self.latitude = position.latitude
+        self.longitude = position.longitude
+        self.time = time
+
+
+class FixFilter:
+    """Drop fixes that would only cost work downstream.
+
+    A fix is rejected when its accuracy, satellite count or HDOP fails the
+    configured limits (0 disables a limit), or when reaching it from the
+    last accepted fix would need more than `max_speed` km/h. Such a jump is
+    held rather than dropped: if the next fix is consistent with it the
+    device really moved (e.g. it was off while driving) and is accepted.
+    Fixes with any of the `skip_on` attributes set (alarms and the like)
+    bypass all checks.
+
+    Traccar repeats a device's latest position until a new one arrives, so
+    each position id is judged and counted only once.
+    """
+
+    def __init__(
+        self,
+        max_accuracy: int = 0,
+        skip_on: Iterable[str] = (),
+        min_satellites: int = 0,
+        max_hdop: float = 0,
+        max_speed: float = 0,
+    ) -> None:
+        """Initialize the filter."""
+        self._max_accuracy = max_accuracy
+        self._skip_on = tuple(skip_on)
+        self._min_satellites = min_satellites
+        self._max_hdop = max_hdop
+        # km/h换算成m/s
+        self._max_speed = max_speed / 3.6
+        self._accepted: dict[int, _Fix] = {}
+        self._held: dict[int, _Fix] = {}
+        self._verdicts: dict[int, tuple[int, bool]] = {}
+        self.rejected: dict[int, Counter[str]] = {}
+
+    def accept(self, position: PositionModel) -> bool:
+        """Return whether the fix should be processed."""
+        device_id = position.device_id
+        if (verdict := self._verdicts.get(device_id)) is not None and verdict[0] == position.id:
+            return verdict[1]
+
+        reason = self._check(position)
+        self._verdicts[device_id] = (position.id, reason is None)
+        if reason is None:
+            return True
+        self.rejected.setdefault(device_id, Counter())[reason] += 1
+        _LOGGER.debug(
+            "Rejected fix %s of device %s: %s", position.id, device_id, reason
+        )
+        return False
+
+    def _check(self, position: PositionModel) -> str | None:
+        """Return why the fix is rejected, None if it is accepted."""
+        attributes = position.attributes
+        skip = any(attributes.get(attr) for attr in self._skip_on)
+        if not skip:
+            if self._max_accuracy and position.accuracy > self._max_accuracy:
+                return REASON_ACCURACY
+            if (
+                self._min_satellites
+                and (sat := attributes.get("sat")) is not None
+                and sat < self._min_satellites
+            ):
+                return REASON_SATELLITES
+            if (
+                self._max_hdop
+                and (hdop := attributes.get("hdop")) is not None
+                and hdop > self._max_hdop
+            ):
+                return REASON_HDOP
+
+        fix = _Fix(position, dt_util.parse_datetime(position.fix_time))
+        device_id = position.device_id
+        last = self._accepted.get(device_id)
+        held = self._held.pop(device_id, None)
+        if (
+            not skip
+            and self._max_speed
+            and last is not None
+            and not self._reachable(last, fix)
+            # 上一次被拦下的跳变与本次位置一致，说明设备确实移动了
+            and (held is None or not self._reachable(held, fix))
+        ):
+            self._held[device_id] = fix
+            return REASON_SPEED
+        self._accepted[device_id] = fix
+        return None
+
+    def _reachable(self, start: _Fix, end: _Fix) -> bool:
+        """Return whether the device can travel between two fixes."""
+        if start.time is None or end.time is None:
+            return True
+        seconds = (end.time - start.time).total_seconds()
+        meters = distance(start.latitude, start.longitude, end.latitude, end.longitude)
+        # 时间戳精度只到秒，至少按1秒计算
+        return meters <= self._max_speed * max(seconds, 1.0)
+
+    @property
+    def stats(self) -> dict[int, dict[str, int]]:
+        """Return the number of rejected fixes per device and reason."""
+        return {device_id: dict(counts) for device_id, counts in self.rejected.items()}
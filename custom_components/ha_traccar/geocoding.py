@@ -0,0 +1,206 @@
+"""Reverse geocoding of Traccar positions."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import logging
+import time
+
+import aiohttp
+
+from .const import DEFAULT_GEOCODE_CACHE_SIZE
+from .helper import gcj02_to_bd09, wgs84togcj02
+
+_LOGGER = logging.getLogger(__name__)
+
+BAIDU_GEOCODER_URL = "https://api.map.baidu.com/geocoder"
+# 纬度方向每度约111.32公里
+METERS_PER_DEGREE = 111320.0
+
+GEOCODE_MAX_CONCURRENCY = 4
+GEOCODE_RATE = 10
+GEOCODE_BURST = 10
+GEOCODE_TIMEOUT = 10
+
+
+class GeocodeCache:
+    """LRU cache of addresses keyed by coordinates snapped to a grid.
+
+    Positions are quantized to cells of `radius` metres, so GPS jitter of a
+    parked device and repeated visits to the same place resolve from memory.
+    One instance is shared by all devices and config entries; entries with a
+    different radius use different keys and do not mix.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_GEOCODE_CACHE_SIZE) -> None:
+        """Initialize an empty cache."""
+        self._entries: OrderedDict[tuple[int, int, int], tuple[float, str]] = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(lat: float, lng: float, radius: int) -> tuple[int, int, int]:
+        """Return the grid cell containing the coordinates."""
+        step = radius / METERS_PER_DEGREE
+        return (radius, round(lat / step), round(lng / step))
+
+    def get(self, lat: float, lng: float, radius: int, ttl: int) -> str | None:
+        """Return the cached address near the coordinates, if still fresh."""
+        key = self.key(lat, lng, radius)
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry[0] > ttl:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def peek(self, key: tuple[int, int, int]) -> str | None:
+        """Return the address stored under a key without counting a lookup."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def put(self, lat: float, lng: float, radius: int, address: str) -> None:
+        """Store the address of the coordinates' grid cell."""
+        key = self.key(lat, lng, radius)
+        self._entries[key] = (time.monotonic(), address)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """Return the counters used to tune radius, TTL and size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class TokenBucket:
+    """Token bucket limiting how many requests start per second."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def async_acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._stamp) * self._rate
+                )
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class BaiduGeocoder:
+    """Async client for the free Baidu geocoder.
+
+    Runs on HA's shared aiohttp session so connections are kept alive, caps
+    the number of requests in flight, spaces them with a token bucket and
+    gives every request its own timeout. Concurrent lookups of the same
+    grid cell share one request.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache: GeocodeCache,
+        max_concurrency: int = GEOCODE_MAX_CONCURRENCY,
+        rate: float = GEOCODE_RATE,
+        burst: int = GEOCODE_BURST,
+        timeout: float = GEOCODE_TIMEOUT,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate, burst)
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._inflight: dict[tuple[int, int, int], asyncio.Future[str | None]] = {}
+        self.cache = cache
+        self.requests = 0
+        self.errors = 0
+
+    async def async_geocode(
+        self,
+        lat: float,
+        lng: float,
+        radius: int,
+        bd09: tuple[float, float] | None = None,
+    ) -> str | None:
+        """Return the address of WGS84 coordinates, None if the lookup failed.
+
+        `bd09` is the (lng, lat) already converted by the caller, if any.
+        """
+        key = self.cache.key(lat, lng, radius)
+        # 同一批中附近的设备可能已经查询过
+        if (address := self.cache.peek(key)) is not None:
+            return address
+        if (future := self._inflight.get(key)) is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            address = await self._async_request(lat, lng, bd09)
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+
+        if address is not None:
+            self.cache.put(lat, lng, radius, address)
+        future.set_result(address)
+        return address
+
+    async def _async_request(
+        self, lat: float, lng: float, bd09: tuple[float, float] | None
+    ) -> str | None:
+        """Query the geocoder for one position."""
+        if (bddata := bd09) is None:
+            gcjdata = wgs84togcj02(lng, lat)
+            bddata = gcj02_to_bd09(gcjdata[0], gcjdata[1])
+        params = {
+            "output": "json",
+            "location": "{:.6f},{:.6f}".format(bddata[1], bddata[0]),
+        }
+        async with self._semaphore:
+            await self._bucket.async_acquire()
+            self.requests += 1
+            try:
+                async with self._session.get(
+                    BAIDU_GEOCODER_URL, params=params, timeout=self._timeout
+                ) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as ex:
+                self.errors += 1
+                _LOGGER.debug("Geocoding %s failed: %s", params["location"], ex)
+                return None
+        _LOGGER.debug("Geocoding %s: %s", params["location"], data)
+        if data.get("status") != "OK":
+            self.errors += 1
+            return None
+        return data["result"]["formatted_address"]
@@ -0,0 +1,297 @@
+"""Geofence evaluation of device positions against HA zones and Traccar geofences."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import chain
+import logging
+import math
+import re
+from typing import Any
+
+from pytraccar import GeofenceModel
+
+from homeassistant.core import State
+
+_LOGGER = logging.getLogger(__name__)
+
+# 网格边长，度（纬度方向约5.5公里）
+CELL_SIZE = 0.05
+# 覆盖网格数超过这个值的大围栏不进网格，每次都先比较外接矩形
+MAX_FENCE_CELLS = 256
+METERS_PER_DEGREE = 111320.0
+
+SOURCE_ZONE = "zone"
+SOURCE_TRACCAR = "traccar"
+
+# Traccar的WKT区域先写纬度再写经度
+_CIRCLE = re.compile(r"^\s*CIRCLE\s*\(\s*(\S+)\s+(\S+)\s*,\s*(\S+)\s*\)\s*$", re.IGNORECASE)
+_POLYGON = re.compile(r"^\s*POLYGON\s*\(\s*\((.*?)\)", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass(frozen=True, slots=True)
+class Geofence:
+    """A circle or a polygon; polygons have no radius, circles no vertices."""
+
+    fence_id: str
+    name: str
+    source: str
+    latitude: float
+    longitude: float
+    radius: float
+    polygon: tuple[tuple[float, float], ...]
+    bbox: tuple[float, float, float, float]
+
+    def contains(self, lat: float, lng: float, margin: float = 0.0) -> bool:
+        """Return whether a position is inside, or within `margin` meters of it."""
+        lng_scale = math.cos(math.radians(lat))
+        if not self.polygon:
+            dy = (lat - self.latitude) * METERS_PER_DEGREE
+            dx = (lng - self.longitude) * METERS_PER_DEGREE * lng_scale
+            reach = self.radius + margin
+            return dx * dx + dy * dy <= reach * reach
+        if _point_in_polygon(lat, lng, self.polygon):
+            return True
+        return margin > 0 and _distance_to_ring(lat, lng, self.polygon, lng_scale) <= margin
+
+    def in_bbox(self, lat: float, lng: float) -> bool:
+        """Return whether a position is inside the bounding box."""
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+
+def circle(
+    fence_id: str, name: str, source: str, lat: float, lng: float, radius: float
+) -> Geofence:
+    """Return a circular geofence."""
+    dlat = radius / METERS_PER_DEGREE
+    dlng = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return Geofence(
+        fence_id, name, source, lat, lng, radius, (),
+        (lat - dlat, lng - dlng, lat + dlat, lng + dlng),
+    )
+
+
+def polygon(
+    fence_id: str, name: str, source: str, points: list[tuple[float, float]]
+) -> Geofence | None:
+    """Return a polygon geofence, None if it has fewer than three vertices."""
+    if points and points[0] == points[-1]:
+        points = points[:-1]
+    if len(points) < 3:
+        return None
+    lats = [point[0] for point in points]
+    lngs = [point[1] for point in points]
+    bbox = (min(lats), min(lngs), max(lats), max(lngs))
+    return Geofence(
+        fence_id, name, source, (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2,
+        0.0, tuple(points), bbox,
+    )
+
+
+def zone_geofence(state: State) -> Geofence | None:
+    """Return the geofence of a zone entity state."""
+    attributes = state.attributes
+    try:
+        return circle(
+            state.entity_id,
+            attributes.get("friendly_name", state.entity_id),
+            SOURCE_ZONE,
+            float(attributes["latitude"]),
+            float(attributes["longitude"]),
+            float(attributes.get("radius", 0)),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def traccar_geofence(model: GeofenceModel) -> Geofence | None:
+    """Return the geofence of a Traccar geofence; None for unsupported areas."""
+    fence_id = f"{SOURCE_TRACCAR}.{model.id}"
+    try:
+        if match := _CIRCLE.match(model.area):
+            lat, lng, radius = (float(value) for value in match.groups())
+            return circle(fence_id, model.name, SOURCE_TRACCAR, lat, lng, radius)
+        if match := _POLYGON.match(model.area):
+            points = []
+            for vertex in match.group(1).split(","):
+                lat, lng = vertex.split()
+                points.append((float(lat), float(lng)))
+            return polygon(fence_id, model.name, SOURCE_TRACCAR, points)
+    except ValueError:
+        pass
+    # LINESTRING等区域不支持
+    _LOGGER.debug("Skipping geofence %s with area %s", model.name, model.area)
+    return None
+
+
+class GeofenceIndex:
+    """Uniform grid over the bounding boxes of a set of geofences.
+
+    A position is tested only against the fences whose box overlaps its
+    grid cell, plus the few fences too large for the grid.
+    """
+
+    __slots__ = ("fences", "_cells", "_large")
+
+    def __init__(self, fences: Iterable[Geofence]) -> None:
+        """Build the grid."""
+        self.fences = {fence.fence_id: fence for fence in fences}
+        self._cells: dict[tuple[int, int], list[Geofence]] = {}
+        self._large: list[Geofence] = []
+        for fence in self.fences.values():
+            min_row, min_col = _cell(fence.bbox[0], fence.bbox[1])
+            max_row, max_col = _cell(fence.bbox[2], fence.bbox[3])
+            if (max_row - min_row + 1) * (max_col - min_col + 1) > MAX_FENCE_CELLS:
+                self._large.append(fence)
+                continue
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self._cells.setdefault((row, col), []).append(fence)
+
+    def __len__(self) -> int:
+        return len(self.fences)
+
+    def containing(self, lat: float, lng: float) -> set[str]:
+        """Return the ids of the fences a position is inside."""
+        return {
+            fence.fence_id
+            for fence in chain(self._cells.get(_cell(lat, lng), ()), self._large)
+            if fence.in_bbox(lat, lng) and fence.contains(lat, lng)
+        }
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return the size of the grid for diagnostics."""
+        return {
+            "fences": len(self.fences),
+            "cells": len(self._cells),
+            "large": len(self._large),
+        }
+
+
+class GeofenceMonitor:
+    """Track the fences each device is in and report the crossings.
+
+    A device enters a fence as soon as its position is inside, and leaves
+    only once it is more than `hysteresis` meters outside, so GPS noise
+    near a border does not produce a stream of enter/exit pairs. The first
+    position of a device only records where it is, without events, so a
+    restart does not report every device entering its current zone.
+    """
+
+    def __init__(self, hysteresis: float) -> None:
+        """Initialize the monitor without any fences."""
+        self.hysteresis = hysteresis
+        self._zones: list[Geofence] = []
+        self._traccar: list[Geofence] = []
+        self._index = GeofenceIndex(())
+        self._inside: dict[int, frozenset[str]] = {}
+        self.evaluations = 0
+        self.enters = 0
+        self.exits = 0
+
+    def set_zones(self, fences: Iterable[Geofence]) -> None:
+        """Replace the HA zones."""
+        self._zones = list(fences)
+        self._index = GeofenceIndex(chain(self._zones, self._traccar))
+
+    def set_traccar(self, fences: Iterable[Geofence]) -> None:
+        """Replace the Traccar geofences."""
+        self._traccar = list(fences)
+        self._index = GeofenceIndex(chain(self._zones, self._traccar))
+
+    def evaluate(
+        self, positions: Iterable[tuple[int, float, float]]
+    ) -> list[tuple[int, bool, Geofence]]:
+        """Test a batch of (device id, latitude, longitude).
+
+        Returns (device id, entered, fence) for every crossing; fences that
+        were removed meanwhile are dropped without an exit.
+        """
+        index = self._index
+        fences = index.fences
+        crossings = []
+        for device_id, lat, lng in positions:
+            self.evaluations += 1
+            inside = index.containing(lat, lng)
+            previous = self._inside.get(device_id)
+            if previous:
+                # 已在其中的围栏要离开超过滞后距离才算离开
+                for fence_id in previous - inside:
+                    if (fence := fences.get(fence_id)) is not None and fence.contains(
+                        lat, lng, self.hysteresis
+                    ):
+                        inside.add(fence_id)
+            self._inside[device_id] = frozenset(inside)
+            if previous is None or previous == inside:
+                continue
+            for fence_id in previous - inside:
+                if (fence := fences.get(fence_id)) is not None:
+                    self.exits += 1
+                    crossings.append((device_id, False, fence))
+            for fence_id in inside - previous:
+                self.enters += 1
+                crossings.append((device_id, True, fences[fence_id]))
+        return crossings
+
+    def inside(self, device_id: int) -> frozenset[str]:
+        """Return the ids of the fences a device is in."""
+        return self._inside.get(device_id, frozenset())
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the index size and crossing counts for diagnostics."""
+        return {
+            **self._index.stats,
+            "zones": len(self._zones),
+            "traccar": len(self._traccar),
+            "hysteresis": self.hysteresis,
+            "evaluations": self.evaluations,
+            "enters": self.enters,
+            "exits": self.exits,
+        }
+
+
+def _cell(lat: float, lng: float) -> tuple[int, int]:
+    """Return the grid cell of a position."""
+    return (math.floor(lat / CELL_SIZE), math.floor(lng / CELL_SIZE))
+
+
+def _point_in_polygon(
+    lat: float, lng: float, points: tuple[tuple[float, float], ...]
+) -> bool:
+    """Even-odd ray casting test."""
+    inside = False
+    prev_lat, prev_lng = points[-1]
+    for point_lat, point_lng in points:
+        if (point_lat > lat) != (prev_lat > lat) and lng < (
+            (prev_lng - point_lng) * (lat - point_lat) / (prev_lat - point_lat) + point_lng
+        ):
+            inside = not inside
+        prev_lat, prev_lng = point_lat, point_lng
+    return inside
+
+
+def _distance_to_ring(
+    lat: float, lng: float, points: tuple[tuple[float, float], ...], lng_scale: float
+) -> float:
+    """Return the distance in meters from a position to the polygon border."""
+    # 以当前位置为原点换算成平面米坐标
+    def project(point: tuple[float, float]) -> tuple[float, float]:
+        return (
+            (point[1] - lng) * METERS_PER_DEGREE * lng_scale,
+            (point[0] - lat) * METERS_PER_DEGREE,
+        )
+
+    best = math.inf
+    x1, y1 = project(points[-1])
+    for point in points:
+        x2, y2 = project(point)
+        dx, dy = x2 - x1, y2 - y1
+        length = dx * dx + dy * dy
+        t = 0.0 if length == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length))
+        px, py = x1 + t * dx, y1 + t * dy
+        best = min(best, px * px + py * py)
+        x1, y1 = x2, y2
+    return math.sqrt(best)
@@ -0,0 +1,148 @@
+"""Single-flight execution and back-off of the Traccar update."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+import logging
+import time
+
+from pytraccar import TraccarException
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# 连续失败多少次后断路
+FAILURE_THRESHOLD = 5
+# 退避的最长时间，也是断路后再次尝试的间隔，秒
+MAX_BACKOFF = 300
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+
+
+class UpdateGuard:
+    """Run the update at most once at a time and back off when it fails.
+
+    A tick arriving while an update runs is coalesced into one follow-up
+    run that starts as soon as the current one ends; further ticks in the
+    meantime are skipped. After a TraccarException the next ticks are
+    skipped for an exponentially growing time. After FAILURE_THRESHOLD
+    consecutive failures the circuit opens and only one attempt per
+    MAX_BACKOFF seconds is made until the server answers again.
+
+    `update(now)` follows the timer callback convention: `now` is the
+    scheduled time of a timer tick, or None for a full resync, which
+    ignores the back-off.
+    """
+
+    def __init__(
+        self,
+        update: Callable[[datetime | None], Awaitable[None]],
+        interval: float,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        max_backoff: float = MAX_BACKOFF,
+    ) -> None:
+        """Initialize the guard."""
+        self._update = update
+        self._interval = interval
+        self._failure_threshold = failure_threshold
+        self._max_backoff = max_backoff
+        self._running = False
+        self._pending = False
+        self._pending_now: datetime | None = None
+        self._retry_at = 0.0
+        self.failures = 0
+        self.runs = 0
+        self.skipped = 0
+        self.overlapped = 0
+        self.late = 0
+
+    @property
+    def running(self) -> bool:
+        """Return whether an update is in progress."""
+        return self._running
+
+    @property
+    def circuit(self) -> str:
+        """Return whether updates are currently suspended."""
+        if self.failures >= self._failure_threshold:
+            return CIRCUIT_OPEN
+        return CIRCUIT_CLOSED
+
+    async def async_call(self, now: datetime | None = None) -> None:
+        """Run the update unless one is running or the guard backs off."""
+        if self._running:
+            self.overlapped += 1
+            if self._pending:
+                self.skipped += 1
+            # 合并为一次后续更新；其中有全量同步时后续更新也做全量同步
+            full = now is None or (self._pending and self._pending_now is None)
+            self._pending_now = None if full else now
+            self._pending = True
+            return
+        if now is not None and time.monotonic() < self._retry_at:
+            self.skipped += 1
+            return
+
+        self._running = True
+        try:
+            while True:
+                if now is not None and (dt_util.utcnow() - now).total_seconds() > self._interval:
+                    self.late += 1
+                if not await self._async_run(now) or not self._pending:
+                    if self._pending:
+                        # 更新失败时不立即重试合并的请求
+                        self.skipped += 1
+                    break
+                now = self._pending_now
+                self._pending = False
+                self._pending_now = None
+        finally:
+            self._running = False
+            self._pending = False
+            self._pending_now = None
+
+    async def _async_run(self, now: datetime | None) -> bool:
+        """Run the update once and record its outcome."""
+        self.runs += 1
+        try:
+            await self._update(now)
+        except TraccarException as ex:
+            self._record_failure(ex)
+            return False
+        if self.failures >= self._failure_threshold:
+            _LOGGER.warning("Traccar is reachable again, resuming updates")
+        self.failures = 0
+        self._retry_at = 0.0
+        return True
+
+    def _record_failure(self, ex: TraccarException) -> None:
+        """Schedule the next attempt after a failed update."""
+        self.failures += 1
+        if self.failures < self._failure_threshold:
+            delay = min(self._interval * 2**self.failures, self._max_backoff)
+            log = _LOGGER.error if self.failures == 1 else _LOGGER.debug
+            log("Error while updating device data: %s (retrying in %.0f s)", ex, delay)
+        else:
+            delay = self._max_backoff
+            log = _LOGGER.warning if self.failures == self._failure_threshold else _LOGGER.debug
+            log(
+                "Traccar failed %s times in a row, pausing updates for %.0f s: %s",
+                self.failures,
+                delay,
+                ex,
+            )
+        self._retry_at = time.monotonic() + delay
+
+    @property
+    def stats(self) -> dict[str, int | str]:
+        """Return the counters showing the effective refresh rate."""
+        return {
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "overlapped": self.overlapped,
+            "late": self.late,
+            "failures": self.failures,
+            "circuit": self.circuit,
+        }
@@ -2,9 +2,17 @@
 """Mars coordinates transform"""
 import math
 
+try:
+    import numpy as np
+except ImportError:  # numpy不可用时批量转换逐点计算
+    np = None
+
 pi = 3.1415926535897932384626  # π
+x_pi = pi * 3000.0 / 180.0
 a = 6378245.0  # 长半轴
 ee = 0.00669342162296594323  # 扁率
+# 少于这个数量的坐标逐点计算比创建numpy数组更快
+NUMPY_MIN_BATCH = 16
 
 def wgs84togcj02(lng, lat):
     """
@@ -50,6 +58,34 @@ def gcj02towgs84(lng, lat):
     return [lng * 2 - mglng, lat * 2 - mglat]
  
  
+def gcj02_to_bd09(lng, lat):
+    """
+    GCJ02(火星坐标系)转BD09(百度坐标系)
+    :param lng:火星坐标系的经度
+    :param lat:火星坐标系纬度
+    :return:
+    """
+    z = math.sqrt(lng * lng + lat * lat) + 0.00002 * math.sin(lat * x_pi)
+    theta = math.atan2(lat, lng) + 0.000003 * math.cos(lng * x_pi)
+    bd_lng = z * math.cos(theta) + 0.0065
+    bd_lat = z * math.sin(theta) + 0.006
+    return [bd_lng, bd_lat]
+
+
+def bd09_to_gcj02(bd_lng, bd_lat):
+    """
+    BD09(百度坐标系)转GCJ02(火星坐标系)
+    :param bd_lng:百度坐标系的经度
+    :param bd_lat:百度坐标系纬度
+    :return:
+    """
+    x = bd_lng - 0.0065
+    y = bd_lat - 0.006
+    z = math.sqrt(x * x + y * y) - 0.00002 * math.sin(y * x_pi)
+    theta = math.atan2(y, x) - 0.000003 * math.cos(x * x_pi)
+    return [z * math.cos(theta), z * math.sin(theta)]
+
+
 def transformlat(lng, lat):
     ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + 0.1 * lng * lat + 0.2 * math.sqrt(math.fabs(lng))
     ret += (20.0 * math.sin(6.0 * lng * pi) + 20.0 *
@@ -85,9 +121,110 @@ def out_of_china(lng, lat):
         return True
     return False
 
+
+def _transformlat_np(lng, lat):
+    """transformlat的numpy数组版本"""
+    ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + 0.1 * lng * lat + 0.2 * np.sqrt(np.fabs(lng))
+    ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+            np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+    ret += (20.0 * np.sin(lat * pi) + 40.0 *
+            np.sin(lat / 3.0 * pi)) * 2.0 / 3.0
+    ret += (160.0 * np.sin(lat / 12.0 * pi) + 320 *
+            np.sin(lat * pi / 30.0)) * 2.0 / 3.0
+    return ret
+
+
+def _transformlng_np(lng, lat):
+    """transformlng的numpy数组版本"""
+    ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + 0.1 * lng * lat + 0.1 * np.sqrt(np.fabs(lng))
+    ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+            np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+    ret += (20.0 * np.sin(lng * pi) + 40.0 *
+            np.sin(lng / 3.0 * pi)) * 2.0 / 3.0
+    ret += (150.0 * np.sin(lng / 12.0 * pi) + 300.0 *
+            np.sin(lng / 30.0 * pi)) * 2.0 / 3.0
+    return ret
+
+
+def wgs84togcj02_batch(lngs, lats):
+    """
+    批量WGS84转GCJ02，一次转换一次轮询的所有坐标，有numpy时整批向量化计算
+    :param lngs:WGS84坐标系的经度序列
+    :param lats:WGS84坐标系的纬度序列
+    :return:(经度列表, 纬度列表)
+    """
+    if np is not None and len(lngs) >= NUMPY_MIN_BATCH:
+        lng = np.asarray(lngs, dtype=float)
+        lat = np.asarray(lats, dtype=float)
+        dlat = _transformlat_np(lng - 105.0, lat - 35.0)
+        dlng = _transformlng_np(lng - 105.0, lat - 35.0)
+        radlat = lat / 180.0 * pi
+        magic = np.sin(radlat)
+        magic = 1 - ee * magic * magic
+        sqrtmagic = np.sqrt(magic)
+        dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * pi)
+        dlng = (dlng * 180.0) / (a / sqrtmagic * np.cos(radlat) * pi)
+        outside = (lng < 72.004) | (lng > 137.8347) | (lat < 0.8293) | (lat > 55.8271)
+        # 转回float列表，结果会写入实体属性，必须可以JSON序列化
+        return np.where(outside, lng, lng + dlng).tolist(), np.where(outside, lat, lat + dlat).tolist()
+    mglngs = []
+    mglats = []
+    for lng, lat in zip(lngs, lats):
+        mglng, mglat = wgs84togcj02(lng, lat)
+        mglngs.append(mglng)
+        mglats.append(mglat)
+    return mglngs, mglats
+
+
+def gcj02_to_bd09_batch(lngs, lats):
+    """
+    批量GCJ02转BD09，有numpy时整批向量化计算
+    :param lngs:火星坐标系的经度序列
+    :param lats:火星坐标系的纬度序列
+    :return:(经度列表, 纬度列表)
+    """
+    if np is not None and len(lngs) >= NUMPY_MIN_BATCH:
+        lng = np.asarray(lngs, dtype=float)
+        lat = np.asarray(lats, dtype=float)
+        z = np.sqrt(lng * lng + lat * lat) + 0.00002 * np.sin(lat * x_pi)
+        theta = np.arctan2(lat, lng) + 0.000003 * np.cos(lng * x_pi)
+        return (z * np.cos(theta) + 0.0065).tolist(), (z * np.sin(theta) + 0.006).tolist()
+    bd_lngs = []
+    bd_lats = []
+    for lng, lat in zip(lngs, lats):
+        bd_lng, bd_lat = gcj02_to_bd09(lng, lat)
+        bd_lngs.append(bd_lng)
+        bd_lats.append(bd_lat)
+    return bd_lngs, bd_lats
+
+
+def bd09_to_gcj02_batch(lngs, lats):
+    """
+    批量BD09转GCJ02，有numpy时整批向量化计算
+    :param lngs:百度坐标系的经度序列
+    :param lats:百度坐标系的纬度序列
+    :return:(经度列表, 纬度列表)
+    """
+    if np is not None and len(lngs) >= NUMPY_MIN_BATCH:
+        x = np.asarray(lngs, dtype=float) - 0.0065
+        y = np.asarray(lats, dtype=float) - 0.006
+        z = np.sqrt(x * x + y * y) - 0.00002 * np.sin(y * x_pi)
+        theta = np.arctan2(y, x) - 0.000003 * np.cos(x * x_pi)
+        return (z * np.cos(theta)).tolist(), (z * np.sin(theta)).tolist()
+    gcj_lngs = []
+    gcj_lats = []
+    for lng, lat in zip(lngs, lats):
+        gcj_lng, gcj_lat = bd09_to_gcj02(lng, lat)
+        gcj_lngs.append(gcj_lng)
+        gcj_lats.append(gcj_lat)
+    return gcj_lngs, gcj_lats
+
+
 if __name__ == '__main__':
     lng = 121.532
     lat = 31.256
     result1 = wgs84togcj02(lng, lat)
     result2 = gcj02towgs84(result1[0], result1[1])
-    print(result1, result2)
\ No newline at end of file
+    result3 = gcj02_to_bd09(result1[0], result1[1])
+    result4 = bd09_to_gcj02(result3[0], result3[1])
+    print(result1, result2, result3, result4)
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""Offline reverse geocoding from a local list of places."""
+from __future__ import annotations
+
+from array import array
+import logging
+import math
+import os
+
+_LOGGER = logging.getLogger(__name__)
+
+# 网格边长，度（纬度方向约11公里）
+CELL_SIZE = 0.1
+# 超过这个距离没有地点时视为查不到，米
+OFFLINE_MAX_DISTANCE = 25000
+METERS_PER_DEGREE = 111320.0
+# GeoNames一级行政区名称文件，和地点文件放在同一目录时自动使用
+GEONAMES_ADMIN1_FILE = "admin1CodesASCII.txt"
+
+
+class OfflineGeocoder:
+    """Nearest place lookup over a grid index, without any network.
+
+    Places are sorted by grid cell, so the index is two `array('d')`
+    columns for the coordinates, one string holding all names with an
+    offset array, and a dict from cell to its slice of the columns. A
+    lookup scans the cell of the position and rings of neighbouring cells
+    until no closer place is possible, which takes microseconds.
+
+    Two file formats are read: a GeoNames dump (cities500.txt, CN.txt and
+    the like, tab separated) and a plain "latitude,longitude,name" CSV.
+    """
+
+    __slots__ = (
+        "path", "_lats", "_lngs", "_names", "_offsets", "_cells",
+        "lookups", "misses",
+    )
+
+    def __init__(
+        self, path: str, places: list[tuple[float, float, str]]
+    ) -> None:
+        """Build the index from (latitude, longitude, name) tuples."""
+        self.path = path
+        places.sort(key=lambda place: _cell(place[0], place[1]))
+        self._lats = array("d", (place[0] for place in places))
+        self._lngs = array("d", (place[1] for place in places))
+        self._names = "".join(place[2] for place in places)
+        self._offsets = array("I", [0])
+        self._cells: dict[tuple[int, int], tuple[int, int]] = {}
+        end = 0
+        for index, (lat, lng, name) in enumerate(places):
+            end += len(name)
+            self._offsets.append(end)
+            cell = _cell(lat, lng)
+            start = self._cells[cell][0] if cell in self._cells else index
+            self._cells[cell] = (start, index + 1)
+        self.lookups = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._lats)
+
+    @classmethod
+    def from_file(cls, path: str) -> OfflineGeocoder:
+        """Read a place file; blocking, run it in the executor."""
+        admin1 = _read_admin1(os.path.join(os.path.dirname(path), GEONAMES_ADMIN1_FILE))
+        places = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if (place := _parse_line(line, admin1)) is not None:
+                    places.append(place)
+        _LOGGER.debug("Loaded %s places from %s", len(places), path)
+        return cls(path, places)
+
+    def lookup(
+        self, lat: float, lng: float, max_distance: float = OFFLINE_MAX_DISTANCE
+    ) -> str | None:
+        """Return the name of the nearest place, None if none is close enough."""
+        self.lookups += 1
+        row, col = _cell(lat, lng)
+        # 经度方向每度的长度随纬度变小，按较小的一边估算尚未搜索的范围
+        lng_scale = max(math.cos(math.radians(lat)), 0.01)
+        cell_meters = CELL_SIZE * METERS_PER_DEGREE * lng_scale
+        best = -1
+        best_distance = max_distance * max_distance
+        lats, lngs, cells = self._lats, self._lngs, self._cells
+        ring = 0
+        while True:
+            for cell in _ring(row, col, ring):
+                if (span := cells.get(cell)) is None:
+                    continue
+                for index in range(span[0], span[1]):
+                    dy = (lats[index] - lat) * METERS_PER_DEGREE
+                    dx = (lngs[index] - lng) * METERS_PER_DEGREE * lng_scale
+                    distance = dx * dx + dy * dy
+                    if distance < best_distance:
+                        best, best_distance = index, distance
+            # 下一圈的网格至少相距 ring 个网格边长
+            reach = ring * cell_meters
+            if reach * reach >= best_distance:
+                break
+            ring += 1
+        if best < 0:
+            self.misses += 1
+            return None
+        return self._names[self._offsets[best]:self._offsets[best + 1]]
+
+    @property
+    def stats(self) -> dict[str, int | str]:
+        """Return the size and hit counts for diagnostics."""
+        return {
+            "file": os.path.basename(self.path),
+            "places": len(self),
+            "lookups": self.lookups,
+            "misses": self.misses,
+        }
+
+
+def _cell(lat: float, lng: float) -> tuple[int, int]:
+    """Return the grid cell of a position."""
+    return (math.floor(lat / CELL_SIZE), math.floor(lng / CELL_SIZE))
+
+
+def _ring(row: int, col: int, ring: int):
+    """Yield the cells at Chebyshev distance `ring` around a cell."""
+    if ring == 0:
+        yield (row, col)
+        return
+    for c in range(col - ring, col + ring + 1):
+        yield (row - ring, c)
+        yield (row + ring, c)
+    for r in range(row - ring + 1, row + ring):
+        yield (r, col - ring)
+        yield (r, col + ring)
+
+
+def _read_admin1(path: str) -> dict[str, str]:
+    """Read GeoNames admin1 codes ("CN.23" -> "Shanghai") if the file exists."""
+    admin1: dict[str, str] = {}
+    try:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    admin1[fields[0]] = fields[1]
+    except FileNotFoundError:
+        pass
+    return admin1
+
+
+def _parse_line(line: str, admin1: dict[str, str]) -> tuple[float, float, str] | None:
+    """Parse one GeoNames or CSV line; None for headers and broken lines."""
+    line = line.rstrip("\n")
+    if not line or line.startswith("#"):
+        return None
+    try:
+        if "\t" in line:
+            fields = line.split("\t")
+            # GeoNames: 名称、纬度、经度、国家代码、一级行政区代码分别在第2、5、6、9、11列
+            lat, lng = float(fields[4]), float(fields[5])
+            parts = [fields[1]]
+            if region := admin1.get(f"{fields[8]}.{fields[10]}"):
+                parts.append(region)
+            parts.append(fields[8])
+            name = ", ".join(part for part in parts if part)
+        else:
+            lat_text, lng_text, name = line.split(",", 2)
+            lat, lng = float(lat_text), float(lng_text)
+            name = name.strip().strip('"')
+    except (IndexError, ValueError):
+        return None
+    if not name or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return (lat, lng, name)
@@ -0,0 +1,105 @@
+"""Adaptive per-device polling of Traccar positions."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+import time
+
+from pytraccar import DeviceModel, PositionModel
+
+from .devices import STATUS_ONLINE
+from .state import DeviceState
+
+TIER_FAST = "fast"
+TIER_SLOW = "slow"
+
+# 停车超过这个时间才降为慢速，避免等红灯时频繁切换
+SLOW_AFTER = timedelta(minutes=5)
+# 到期设备不多于这个数量时逐个查询，否则一次查询全部位置。
+# Traccar的/api/positions只接受一个deviceId，无法分批合并查询，
+# 所以超过这个数量时仍会下载所有设备的位置，慢速分层只省去处理和写入
+PER_DEVICE_QUERY_LIMIT = 8
+
+
+class PollScheduler:
+    """Decide which devices need their position fetched on a tick.
+
+    Moving devices, and devices that stopped less than SLOW_AFTER ago, are
+    in the fast tier and due on every tick. Parked and offline devices are
+    in the slow tier and due once per `slow_interval` seconds. A device is
+    promoted back as soon as a fetched position shows it moving again.
+
+    Server load only drops while at most PER_DEVICE_QUERY_LIMIT devices
+    are due; with more, all positions are fetched in one request and
+    `select` only skips processing the slow devices that are not due.
+    """
+
+    def __init__(self, slow_interval: float) -> None:
+        """Initialize the scheduler; a slow interval of 0 disables it."""
+        self._slow_interval = slow_interval
+        self._tiers: dict[int, str] = {}
+        self._next_due: dict[int, float] = {}
+        self._position_ids: dict[int, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether devices can back off at all."""
+        return self._slow_interval > 0
+
+    def tier(self, device_id: int) -> str:
+        """Return the current tier of a device."""
+        return self._tiers.get(device_id, TIER_FAST)
+
+    def due(self, device_ids: Iterable[int]) -> set[int]:
+        """Return the devices whose position should be fetched now."""
+        now = time.monotonic()
+        return {
+            device_id
+            for device_id in device_ids
+            if self._tiers.get(device_id, TIER_FAST) == TIER_FAST
+            or self._next_due.get(device_id, 0) <= now
+        }
+
+    def select(
+        self, positions: list[PositionModel], due: set[int] | None
+    ) -> list[PositionModel]:
+        """Return the fetched positions worth processing.
+
+        When all positions were fetched at once, slow devices that are not
+        due are skipped unless they reported a new position, which is how
+        a parked device that starts moving gets promoted early.
+        """
+        selected = []
+        for position in positions:
+            device_id = position.device_id
+            if (
+                due is None
+                or device_id in due
+                or self._position_ids.get(device_id) != position.id
+            ):
+                selected.append(position)
+            self._position_ids[device_id] = position.id
+        return selected
+
+    def update(self, device: DeviceModel, state: DeviceState, now: datetime) -> str:
+        """Reclassify a device after its position was processed."""
+        if not self.enabled:
+            return TIER_FAST
+        if state.running or (
+            device.status == STATUS_ONLINE and now - state.last_stop_time < SLOW_AFTER
+        ):
+            tier = TIER_FAST
+        else:
+            tier = TIER_SLOW
+        self._tiers[device.id] = tier
+        # 慢速设备每次取到位置后重新计时
+        self._next_due[device.id] = time.monotonic() + self._slow_interval
+        return tier
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """Return the number of devices per tier."""
+        counts = {TIER_FAST: 0, TIER_SLOW: 0}
+        for tier in self._tiers.values():
+            counts[tier] += 1
+        return counts
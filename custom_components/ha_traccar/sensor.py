@@ -1,8 +1,10 @@
 """Support for Traccar device tracking."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
-import time, datetime
+from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -12,25 +14,22 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.const import UnitOfElectricPotential, UnitOfSpeed, UnitOfLength, PERCENTAGE
+from homeassistant.helpers.typing import StateType
+from homeassistant.const import CONF_HOST, CONF_PORT, UnitOfElectricPotential, UnitOfSpeed, UnitOfLength, UnitOfTime, PERCENTAGE
 
 from .const import (
     DOMAIN,
-    TRACKER_UPDATE,
     SENSORS,
+    STATS,
+    UPDATE_GUARD,
     CONF_SENSORS,
-    ATTR_BATTERY_LEVEL,
+    CONF_DIAGNOSTIC_SENSORS,
     ATTR_BATTERY,
-    ATTR_ADDRESS,
-    ATTR_QUERYTIME,
-    ATTR_PARKING_TIME,
-    ATTR_LAST_UPDATE,
-    ATTR_LASTSTOPTIME,
-    ATTR_DEVICE_STATUS,
     ATTR_TOTALDISTANCE,
-    ATTR_SPEED,
     KEY_BATTERY_LEVEL,
     KEY_BATTERY,
     KEY_ADDRESS,
@@ -43,7 +42,8 @@ from .const import (
     KEY_SPEED
 )
 
-from . import TraccarEntity
+from . import TraccarEntity, new_device_signal
+from .stats import COUNTER_GEOCODE_CALLS, COUNTER_STATE_WRITES, STAGE_UPDATE
 
 SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     SensorEntityDescription(
@@ -106,6 +106,55 @@ SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
     )
 )
 
+
+@dataclass
+class TraccarDiagnosticRequiredKeysMixin:
+    """Mixin for required keys."""
+
+    value_fn: Callable[[dict[str, Any]], StateType]
+
+
+@dataclass
+class TraccarDiagnosticSensorEntityDescription(
+    SensorEntityDescription, TraccarDiagnosticRequiredKeysMixin
+):
+    """Describes a statistic of the update pipeline of a config entry."""
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[TraccarDiagnosticSensorEntityDescription, ...] = (
+    TraccarDiagnosticSensorEntityDescription(
+        key="update_latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        value_fn=lambda data: data[STATS].last_ms(STAGE_UPDATE),
+    ),
+    TraccarDiagnosticSensorEntityDescription(
+        key="devices_per_poll",
+        icon="mdi:car-multiple",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[STATS].last_devices,
+    ),
+    TraccarDiagnosticSensorEntityDescription(
+        key="geocode_calls",
+        icon="mdi:map-search",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda data: data[STATS].counters[COUNTER_GEOCODE_CALLS],
+    ),
+    TraccarDiagnosticSensorEntityDescription(
+        key="state_writes",
+        icon="mdi:database-edit",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda data: data[STATS].counters[COUNTER_STATE_WRITES],
+    ),
+    TraccarDiagnosticSensorEntityDescription(
+        key="skipped_ticks",
+        icon="mdi:debug-step-over",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda data: data[UPDATE_GUARD].skipped,
+    ),
+)
+
 SENSOR_TYPES_MAP = { description.key: description for description in SENSOR_TYPES }
 
 SENSOR_TYPES_KEYS = { description.key for description in SENSOR_TYPES }
@@ -122,67 +171,73 @@ async def async_setup_entry(
         CONF_SENSORS, []) if s in SENSOR_TYPES_KEYS]
 
     @callback
-    def _receive_data(server, device, position, calculatedata, attr_show):
-        for sensor_type in enabled_sensors:
-            sensor_id = f"{device.unique_id}-{sensor_type}"
-            if sensor_id in hass.data[DOMAIN][entry.entry_id][SENSORS]:
-                continue
+    def _receive_data(snapshots):
+        """Create the sensors of new devices in one batch."""
+        sensors = hass.data[DOMAIN][entry.entry_id][SENSORS]
+        entities = []
+        for snapshot in snapshots:
+            for sensor_type in enabled_sensors:
+                sensor_id = f"{snapshot.server}-{snapshot.unique_id}-{sensor_type}"
+                if sensor_id in sensors:
+                    continue
+
+                sensors.add(sensor_id)
+                entities.append(
+                    TraccarSensorEntity(SENSOR_TYPES_MAP[sensor_type], snapshot)
+                )
 
-            hass.data[DOMAIN][entry.entry_id][SENSORS].add(sensor_id)
+        if entities:
+            async_add_entities(entities)
 
-            async_add_entities(
-                [TraccarSensorEntity(
-                    SENSOR_TYPES_MAP[sensor_type], server, device, position, calculatedata, attr_show)]
-            )
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, new_device_signal(entry.entry_id), _receive_data)
+    )
 
-    async_dispatcher_connect(hass, TRACKER_UPDATE, _receive_data)
+    if entry.data.get(CONF_DIAGNOSTIC_SENSORS, False):
+        async_add_entities(
+            TraccarDiagnosticSensorEntity(description, entry)
+            for description in DIAGNOSTIC_SENSOR_TYPES
+        )
 
 
 class TraccarSensorEntity(SensorEntity, TraccarEntity):
     """Represent a tracked device."""
     _attr_has_entity_name = True
 
-    def __init__(self, description, server, device, position, calculatedata, attr_show):
+    def __init__(self, description, snapshot):
         """Set up Geofency entity."""
-        super().__init__(server, device)
+        super().__init__(snapshot)
         self.entity_description = description
-        self._unique_id = f"{server}-{device.unique_id}-{description.key}"
+        self._unique_id = f"{snapshot.server}-{snapshot.unique_id}-{description.key}"
         self._attr_translation_key = f"{self.entity_description.name}"
-        self._update_traccar_info(device, position, calculatedata, attr_show)
+        self._update_traccar_info(snapshot)
 
-    def _update_traccar_info(self, device, position, calculatedata, attr_show):
+    def _update_traccar_info(self, snapshot):
         if self.entity_description.key == KEY_BATTERY_LEVEL:
-            self._state = position.attributes.get(ATTR_BATTERY_LEVEL, -1)
+            self._state = snapshot.battery_level
         elif self.entity_description.key == KEY_BATTERY:
-            self._state = position.attributes.get(ATTR_BATTERY, -1)
+            self._state = snapshot.attributes.get(ATTR_BATTERY, -1)
         elif self.entity_description.key == KEY_SPEED:
-            self._state = position.speed
+            self._state = snapshot.speed
         elif self.entity_description.key == KEY_TOTALDISTANCE:
-            self._state = position.attributes.get(ATTR_TOTALDISTANCE)
+            self._state = snapshot.attributes.get(ATTR_TOTALDISTANCE)
         elif self.entity_description.key == KEY_ADDRESS:
-            if position.address:
-                addressstrlist = position.address.replace(" ","").split(",")
-                if len(addressstrlist) > 5:
-                    self._state = ""
-                    for i in range(len(addressstrlist)-3, -1, -1):
-                        self._state += addressstrlist[i]
-                else:
-                    self._state = position.address
-            else:
-                self._state = "unknown"
-        elif self.entity_description.key == KEY_LAST_UPDATE:            
-            self._state = (datetime.datetime.strptime(device.last_update, '%Y-%m-%dT%H:%M:%S.%f+00:00')+datetime.timedelta(hours=8)).strftime("%Y-%m-%d %H:%M:%S")
+            self._state = snapshot.address
+        elif self.entity_description.key == KEY_LAST_UPDATE:
+            self._state = snapshot.last_update_text
         elif self.entity_description.key == KEY_DEVICE_STATUS:
-            self._state = device.status
+            self._state = snapshot.status
         elif self.entity_description.key == KEY_LASTSTOPTIME:
-            self._state = calculatedata[ATTR_LASTSTOPTIME]        
+            self._state = snapshot.last_stop_text
         elif self.entity_description.key == KEY_QUERYTIME:
-            self._state = calculatedata[ATTR_QUERYTIME]
-            
+            self._state = snapshot.query_text
         elif self.entity_description.key == KEY_PARKING_TIME:
-            self._state = calculatedata["parkingtime"]
+            self._state = snapshot.parking_time
 
 
+    def _state_fingerprint(self):
+        return self._state
+
     @property
     def native_value(self):
         """Return battery value of the device."""
@@ -199,3 +254,28 @@ class TraccarSensorEntity(SensorEntity, TraccarEntity):
         if state := await self.async_get_last_state():
             if state.state != "unknown":
                 self._state = state.state
+
+
+class TraccarDiagnosticSensorEntity(SensorEntity):
+    """Statistic of the update pipeline, polled by Home Assistant."""
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, description, entry):
+        """Set up the statistic of a config entry."""
+        server = f"{entry.data[CONF_HOST]}-{entry.data[CONF_PORT]}"
+        self.entity_description = description
+        self._entry_id = entry.entry_id
+        self._attr_unique_id = f"{server}-{description.key}"
+        self._attr_translation_key = description.key
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, server)},
+            name=entry.title,
+            manufacturer="Traccar",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self):
+        """Return the current value of the statistic."""
+        return self.entity_description.value_fn(self.hass.data[DOMAIN][self._entry_id])
@@ -0,0 +1,104 @@
+"""Immutable per-poll view of one Traccar device."""
+from __future__ import annotations
+
+from collections.abc import Container, Mapping
+from dataclasses import dataclass, fields
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+# 持久化时需要转换的时间字段
+_TIME_FIELDS = ("last_update_at", "last_stop_time", "query_time")
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSnapshot:
+    """Everything the entities of one device show, computed once per poll.
+
+    The tracker and every sensor of a device receive the same snapshot, so
+    address normalization, time formatting and coordinate conversion run
+    once per device per poll instead of once per entity. Times are
+    timezone-aware; the `*_text` fields are their local display strings.
+    """
+
+    server: str
+    device_id: int
+    unique_id: str
+    name: str
+    status: str | None
+    protocol: str | None
+    # Traccar的原始时间字符串，用于判断是否有新上报
+    last_update: str | None
+    last_update_at: datetime | None
+    last_update_text: str | None
+    latitude: float
+    longitude: float
+    accuracy: float
+    speed: float
+    battery_level: Any
+    # 定位的原始属性，只读
+    attributes: Mapping[str, Any]
+    address: str
+    get_address: str
+    gcj_lat: float
+    gcj_lng: float
+    bd_lat: float
+    bd_lng: float
+    running: bool
+    last_stop_time: datetime
+    last_stop_text: str
+    parking_time: str
+    query_time: datetime
+    query_text: str
+    poll_tier: str
+
+    @property
+    def runorstop(self) -> str:
+        """Return the motion state the way the attributes show it."""
+        return "run" if self.running else "stop"
+
+    def as_dict(self, attributes: Container[str]) -> dict[str, Any]:
+        """Return the JSON-serializable form written to the store.
+
+        Only the position attributes in `attributes` are kept.
+        """
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
+        data["attributes"] = {
+            key: value for key, value in self.attributes.items() if key in attributes
+        }
+        for name in _TIME_FIELDS:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DeviceSnapshot | None:
+        """Restore a snapshot written by as_dict; None if it is unusable."""
+        try:
+            values = {field.name: data[field.name] for field in fields(cls)}
+            for name in _TIME_FIELDS:
+                if values[name] is not None:
+                    values[name] = dt_util.parse_datetime(values[name])
+        except (KeyError, TypeError, ValueError):
+            # 旧版本写入的快照缺少字段时丢弃，等第一次查询重新生成
+            return None
+        if values["last_stop_time"] is None or values["query_time"] is None:
+            return None
+        values["attributes"] = MappingProxyType(dict(values["attributes"] or {}))
+        return cls(**values)
+
+
+def normalize_address(address: str | None) -> str:
+    """Return a Traccar address in Chinese reading order.
+
+    Long comma-separated addresses end with the postcode and country; drop
+    those and join the rest from the largest to the smallest area.
+    """
+    if not address:
+        return "unknown"
+    parts = address.replace(" ", "").split(",")
+    if len(parts) > 5:
+        return "".join(reversed(parts[:-2]))
+    return address
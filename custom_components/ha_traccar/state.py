@@ -0,0 +1,115 @@
+"""Per-device motion state of the Traccar integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .trips import TripState
+
+# 旧版ha_traccar.json中的时间格式（本地时间，无时区）
+LEGACY_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 行程切分取代了按里程差判断运动后不再保存的字段
+RETIRED_FIELDS = ("total_distance", "prev_total_distance", "update_time")
+
+
+@dataclass(slots=True)
+class DeviceState:
+    """What the integration remembers about one device between polls.
+
+    Times are timezone-aware datetimes, so nothing is re-parsed per poll.
+    `last_update` keeps the raw Traccar timestamp to detect new reports and
+    `last_update_at` its parsed value. `running` mirrors `trip.moving`.
+    """
+
+    last_update: str | None = None
+    last_update_at: datetime | None = None
+    last_stop_time: datetime = field(default_factory=dt_util.now)
+    running: bool = False
+    latitude: float = 0.0
+    longitude: float = 0.0
+    address: str | None = None
+    trip: TripState = field(default_factory=TripState)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the JSON-serializable form written to the store."""
+        return {
+            "last_update": self.last_update,
+            "last_stop_time": self.last_stop_time.isoformat(),
+            "running": self.running,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "address": self.address,
+            "trip": self.trip.as_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DeviceState:
+        """Restore a state written by as_dict."""
+        state = cls(
+            last_update=data.get("last_update"),
+            running=data.get("running", False),
+            latitude=data.get("latitude", 0.0),
+            longitude=data.get("longitude", 0.0),
+            address=data.get("address"),
+        )
+        if (last_stop_time := _parse_time(data.get("last_stop_time"))) is not None:
+            state.last_stop_time = last_stop_time
+        # 没有行程状态的旧数据按原来的运动/静止继续
+        if (trip := data.get("trip")) is not None:
+            state.trip = TripState.from_dict(trip)
+        else:
+            state.trip = TripState(moving=state.running)
+        if state.last_update:
+            state.last_update_at = dt_util.parse_datetime(state.last_update)
+        return state
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    """Parse a stored time, treating naive values as local time."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = datetime.strptime(value, LEGACY_TIME_FORMAT)
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+def drop_retired_fields(data: dict[str, Any]) -> None:
+    """Remove the fields of a stored state that are no longer kept."""
+    for key in RETIRED_FIELDS:
+        data.pop(key, None)
+
+
+def migrate_legacy_state(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Convert the flat "<field>_<device id>" dict of version 1.
+
+    Returns the stored form of a DeviceState per device id.
+    """
+    devices: dict[str, dict[str, Any]] = {}
+    for key, value in data.items():
+        name, _, device_id = key.rpartition("_")
+        if not name or not device_id.isdigit():
+            continue
+        devices.setdefault(device_id, {})[name] = value
+
+    migrated = {}
+    for device_id, old in devices.items():
+        coords = old.get("coords") or [0, 0]
+        migrated[device_id] = {
+            "last_update": old.get("lastupdate") or None,
+            "last_stop_time": old.get("lastlocationtime"),
+            "running": old.get("runorstop") == "run",
+            "latitude": coords[0],
+            "longitude": coords[1],
+            "address": old.get("address"),
+        }
+    return migrated
@@ -0,0 +1,134 @@
+"""Low-overhead timers and counters of the update pipeline."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+# 延迟直方图的桶上限，毫秒
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+STAGE_UPDATE = "update"
+STAGE_FETCH = "fetch"
+STAGE_JOIN = "join"
+STAGE_TRANSFORM = "transform"
+STAGE_STATE = "state"
+STAGE_DISPATCH = "dispatch"
+STAGE_GEOCODE = "geocode"
+STAGE_GEOFENCE = "geofence"
+
+COUNTER_POLLS = "polls"
+COUNTER_POSITIONS = "positions"
+COUNTER_DEVICES = "devices"
+COUNTER_GEOCODE_CALLS = "geocode_calls"
+COUNTER_STATE_WRITES = "state_writes"
+COUNTER_STATE_WRITES_SKIPPED = "state_writes_skipped"
+COUNTER_GEOFENCE_EVENTS = "geofence_events"
+COUNTER_EVENTS = "events"
+
+
+class Histogram:
+    """Latency histogram with fixed millisecond buckets."""
+
+    __slots__ = ("buckets", "count", "total", "max", "last")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        # 最后一个桶收集超过最大上限的值
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Record one duration in milliseconds."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding the percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return round(min(float(bound), self.max), 3)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the summary shown in diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 3),
+            "last_ms": round(self.last, 3),
+            "buckets_ms": {
+                **{f"<={bound}": hits for bound, hits in zip(LATENCY_BUCKETS, self.buckets)},
+                f">{LATENCY_BUCKETS[-1]}": self.buckets[-1],
+            },
+        }
+
+
+class PipelineStats:
+    """Per-stage latency histograms and counters of one config entry.
+
+    Timing a stage costs two perf_counter calls and a bisect, so it stays
+    on permanently.
+    """
+
+    __slots__ = ("timers", "counters", "last_devices")
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.timers: dict[str, Histogram] = {}
+        self.counters: Counter[str] = Counter()
+        self.last_devices = 0
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one sample of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record one duration of a stage."""
+        if (histogram := self.timers.get(stage)) is None:
+            histogram = self.timers[stage] = Histogram()
+        histogram.observe(seconds * 1000)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increase a counter."""
+        self.counters[name] += value
+
+    def last_ms(self, stage: str) -> float | None:
+        """Return the latest duration of a stage."""
+        if (histogram := self.timers.get(stage)) is None:
+            return None
+        return round(histogram.last, 3)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all statistics for diagnostics."""
+        polls = self.counters[COUNTER_POLLS]
+        return {
+            "counters": dict(self.counters),
+            "devices_last_poll": self.last_devices,
+            "devices_per_poll": (
+                round(self.counters[COUNTER_DEVICES] / polls, 2) if polls else None
+            ),
+            "stages": {stage: histogram.as_dict() for stage, histogram in self.timers.items()},
+        }
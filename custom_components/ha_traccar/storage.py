@@ -0,0 +1,254 @@
+"""Persistence of the motion state kept by the Traccar integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import datetime
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.util.json import load_json
+
+from .const import DOMAIN
+from .snapshot import DeviceSnapshot
+from .state import DeviceState, drop_retired_fields, migrate_legacy_state
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = DOMAIN
+STORAGE_VERSION = 2
+# 2.2起不再保存总里程和里程刷新时间
+STORAGE_MINOR_VERSION = 2
+# 状态变化后最多延迟多少秒写盘，同一时间段内的多次变化只写一次
+SAVE_DELAY = 10
+LEGACY_FILE = "ha_traccar.json"
+# 快照单独保存，只在停止和卸载时写入
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.snapshots"
+SNAPSHOT_STORAGE_VERSION = 1
+
+
+class _TraccarStore(Store[dict[str, Any]]):
+    """Store migrating older versions of the state format."""
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Migrate the flat version 1 dict to per-entry device states.
+
+        Version 2.1 states still carry the distance fields, which are dropped.
+        """
+        if old_major_version == 1:
+            return _empty_data(migrate_legacy_state(old_data))
+        if old_minor_version < 2:
+            for states in (*old_data.get("entries", {}).values(), old_data.get("unassigned", {})):
+                for data in states.values():
+                    drop_retired_fields(data)
+        return old_data
+
+
+def _empty_data(unassigned: dict[str, dict[str, Any]] | None = None) -> dict[str, Any]:
+    """Return the version 2 layout.
+
+    Version 1 did not know which server a device belonged to, so migrated
+    devices wait in "unassigned" until a config entry sees their id.
+    "event_cursors" holds where the event ingestion of each entry stopped.
+    """
+    return {
+        "entries": {},
+        "unassigned": unassigned or {},
+        "event_cursors": {},
+    }
+
+
+class TraccarStateStore:
+    """Debounced, atomic storage of the per-device state of all entries.
+
+    Changes only mark the data dirty; HA's Store writes it from the executor
+    at most once per SAVE_DELAY via a temp file and rename, and flushes any
+    pending write when Home Assistant shuts down.
+
+    The last snapshot of every device, used to create the entities at
+    startup before the first fetch, is much larger and only needed then. It
+    lives in a second store written when Home Assistant stops and when an
+    entry unloads, keeping only the position attributes the entities read.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._hass = hass
+        self._store = _TraccarStore(
+            hass, STORAGE_VERSION, STORAGE_KEY, minor_version=STORAGE_MINOR_VERSION
+        )
+        self._dirty = False
+        self._data: dict[str, Any] = _empty_data()
+        self._entries: dict[str, dict[int, DeviceState]] = {}
+        self._snapshot_store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, SNAPSHOT_STORAGE_KEY
+        )
+        self._snapshot_data: dict[str, Any] = {}
+        self._snapshots: dict[str, dict[int, DeviceSnapshot]] = {}
+        self._snapshot_attributes: dict[str, frozenset[str]] = {}
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self.saves = 0
+
+    async def async_load(self) -> None:
+        """Load the stored state once, migrating the old ha_traccar.json."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load()
+            if data is None:
+                data = _empty_data(
+                    migrate_legacy_state(
+                        await self._hass.async_add_executor_job(self._load_legacy)
+                    )
+                )
+            # 早期的版本2数据没有事件游标，快照还和状态存在一起
+            data.setdefault("event_cursors", {})
+            snapshots = data.pop("snapshots", None)
+            if snapshots is not None:
+                self.async_schedule_save()
+            self._snapshot_data = await self._snapshot_store.async_load() or snapshots or {}
+            self._data = data
+            self._loaded = True
+
+    def _load_legacy(self) -> dict[str, Any]:
+        """Read the state file written by earlier versions."""
+        try:
+            data = load_json(self._hass.config.path(STORAGE_DIR, LEGACY_FILE), {})
+        except HomeAssistantError:
+            return {}
+        if data:
+            _LOGGER.info("Migrating %s to the %s store", LEGACY_FILE, STORAGE_KEY)
+        return data if isinstance(data, dict) else {}
+
+    @callback
+    def async_get_entry(self, entry_id: str) -> dict[int, DeviceState]:
+        """Return the live device states of a config entry."""
+        if (states := self._entries.get(entry_id)) is None:
+            stored = self._data["entries"].get(entry_id, {})
+            states = self._entries[entry_id] = {
+                int(device_id): DeviceState.from_dict(data)
+                for device_id, data in stored.items()
+            }
+        return states
+
+    @callback
+    def async_get_snapshots(
+        self, entry_id: str, attributes: Iterable[str]
+    ) -> dict[int, DeviceSnapshot]:
+        """Return the live last snapshots of a config entry's devices.
+
+        The caller keeps the dict current; it is written when Home Assistant
+        stops and when the entry unloads, with only the given position
+        attributes.
+        """
+        self._snapshot_attributes[entry_id] = frozenset(attributes)
+        if (snapshots := self._snapshots.get(entry_id)) is None:
+            stored = self._snapshot_data.get(entry_id, {})
+            snapshots = self._snapshots[entry_id] = {}
+            for device_id, data in stored.items():
+                if (snapshot := DeviceSnapshot.from_dict(data)) is not None:
+                    snapshots[int(device_id)] = snapshot
+        return snapshots
+
+    @callback
+    def async_get_event_cursor(self, entry_id: str) -> dict[str, Any]:
+        """Return the live event cursor of a config entry.
+
+        The caller changes the dict in place and schedules the save.
+        """
+        return self._data["event_cursors"].setdefault(entry_id, {})
+
+    @callback
+    def async_create_state(
+        self, entry_id: str, device_id: int, now: datetime
+    ) -> DeviceState:
+        """Create the state of a device new to an entry.
+
+        A device migrated from version 1 picks up its old state here.
+        """
+        if (data := self._data["unassigned"].pop(str(device_id), None)) is not None:
+            state = DeviceState.from_dict(data)
+        else:
+            state = DeviceState(last_stop_time=now)
+        self._entries[entry_id][device_id] = state
+        self.async_schedule_save()
+        return state
+
+    @callback
+    def async_release_entry(self, entry_id: str) -> None:
+        """Stop tracking the live states of an unloaded entry."""
+        if (states := self._entries.pop(entry_id, None)) is not None:
+            self._data["entries"][entry_id] = _serialize_states(states)
+        if (snapshots := self._snapshots.pop(entry_id, None)) is not None:
+            self._snapshot_data[entry_id] = self._serialize_snapshots(entry_id, snapshots)
+            self._snapshot_attributes.pop(entry_id, None)
+
+    @callback
+    def async_remove_entry(self, entry_id: str) -> None:
+        """Forget everything stored for a removed entry."""
+        self._entries.pop(entry_id, None)
+        self._snapshots.pop(entry_id, None)
+        self._snapshot_attributes.pop(entry_id, None)
+        removed = [
+            self._data[key].pop(entry_id, None)
+            for key in ("entries", "event_cursors")
+        ]
+        self._snapshot_data.pop(entry_id, None)
+        if any(item is not None for item in removed):
+            self.async_schedule_save()
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Mark the state dirty and schedule a delayed write."""
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_schedule_snapshot_save(self) -> None:
+        """Write the snapshots; called when Home Assistant stops."""
+        # 停止过程中的延迟写入在最终写盘时完成
+        self._snapshot_store.async_delay_save(self._snapshots_to_save, 0)
+
+    async def async_flush(self) -> None:
+        """Write pending changes now."""
+        if self._dirty:
+            await self._store.async_save(self._data_to_save())
+        # 只在卸载和删除配置项时调用，快照此时一并写入
+        await self._snapshot_store.async_save(self._snapshots_to_save())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to write and clear the dirty flag."""
+        self._dirty = False
+        self.saves += 1
+        for entry_id, states in self._entries.items():
+            self._data["entries"][entry_id] = _serialize_states(states)
+        return self._data
+
+    @callback
+    def _snapshots_to_save(self) -> dict[str, Any]:
+        """Return the snapshots of all entries to write."""
+        for entry_id, snapshots in self._snapshots.items():
+            self._snapshot_data[entry_id] = self._serialize_snapshots(entry_id, snapshots)
+        return self._snapshot_data
+
+    def _serialize_snapshots(
+        self, entry_id: str, snapshots: dict[int, DeviceSnapshot]
+    ) -> dict[str, dict[str, Any]]:
+        """Return the stored form of an entry's snapshots."""
+        attributes = self._snapshot_attributes.get(entry_id, frozenset())
+        return {
+            str(device_id): snapshot.as_dict(attributes)
+            for device_id, snapshot in snapshots.items()
+        }
+
+
+def _serialize_states(states: dict[int, DeviceState]) -> dict[str, dict[str, Any]]:
+    """Return the stored form of an entry's device states."""
+    return {str(device_id): state.as_dict() for device_id, state in states.items()}
@@ -0,0 +1,159 @@
+"""Recent fixes of every device, kept in compact ring buffers."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+import math
+import sys
+from typing import Any, NamedTuple
+
+from pytraccar import PositionModel
+
+FIELDS = ("time", "latitude", "longitude", "speed", "course", "total_distance")
+# 每个定位在各列中各占一个双精度数
+BYTES_PER_FIX = 8 * len(FIELDS)
+
+
+class TrackFix(NamedTuple):
+    """One fix; time is a UNIX timestamp, total_distance NaN when unknown."""
+
+    time: float
+    latitude: float
+    longitude: float
+    speed: float
+    course: float
+    total_distance: float
+
+
+class TrackBuffer:
+    """Ring buffer of the last `capacity` fixes of one device.
+
+    Each field is an `array('d')` column allocated once at full size, so a
+    device costs BYTES_PER_FIX * capacity bytes of data plus about 550
+    bytes for the six array objects and the buffer itself, whatever the
+    number of fixes stored: 1.9 KiB for 30 fixes, 3.3 KiB for 60.
+    benchmarks/bench_track.py checks this budget for large fleets.
+    """
+
+    __slots__ = ("_columns", "_capacity", "_next", "_count")
+
+    def __init__(self, capacity: int) -> None:
+        """Allocate the columns."""
+        # 按乘法分配的array没有多余的预留空间
+        self._columns = tuple(array("d", [0.0]) * capacity for _ in FIELDS)
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_time(self) -> float | None:
+        """Return the time of the newest fix."""
+        if not self._count:
+            return None
+        return self._columns[0][(self._next - 1) % self._capacity]
+
+    def append(
+        self,
+        time: float,
+        latitude: float,
+        longitude: float,
+        speed: float,
+        course: float,
+        total_distance: float,
+    ) -> bool:
+        """Add a fix; a fix not newer than the newest one is ignored."""
+        if self._count and time <= self._columns[0][(self._next - 1) % self._capacity]:
+            return False
+        index = self._next
+        for column, value in zip(
+            self._columns, (time, latitude, longitude, speed, course, total_distance)
+        ):
+            column[index] = value
+        self._next = (index + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+        return True
+
+    def window(
+        self, since: float | None = None, count: int | None = None
+    ) -> list[TrackFix]:
+        """Return the fixes at or after `since`, at most the newest `count`, oldest first."""
+        columns = self._columns
+        capacity = self._capacity
+        times = columns[0]
+        limit = self._count if count is None else min(count, self._count)
+        fixes = []
+        # 从最新的定位往回取，遇到早于since的即停止
+        for back in range(1, limit + 1):
+            index = (self._next - back) % capacity
+            if since is not None and times[index] < since:
+                break
+            fixes.append(TrackFix(*(column[index] for column in columns)))
+        fixes.reverse()
+        return fixes
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the buffer."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(column) for column in self._columns)
+
+
+class TrackStore:
+    """Track buffers of the devices of a config entry."""
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize; a capacity of 0 keeps no track."""
+        self.capacity = capacity
+        self._buffers: dict[int, TrackBuffer] = {}
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def get(self, device_id: int) -> TrackBuffer | None:
+        """Return the buffer of a device."""
+        return self._buffers.get(device_id)
+
+    def append(self, position: PositionModel, fix_time: float) -> bool:
+        """Record the fix of a position at a UNIX time; False if already recorded."""
+        if not self.capacity:
+            return False
+        if (buffer := self._buffers.get(position.device_id)) is None:
+            buffer = self._buffers[position.device_id] = TrackBuffer(self.capacity)
+        total_distance = position.attributes.get("totalDistance")
+        return buffer.append(
+            fix_time,
+            position.latitude,
+            position.longitude,
+            position.speed or 0.0,
+            position.course or 0.0,
+            math.nan if total_distance is None else total_distance,
+        )
+
+    def window(
+        self, device_id: int, since: float | None = None, count: int | None = None
+    ) -> list[TrackFix]:
+        """Return the recent fixes of a device, oldest first."""
+        if (buffer := self._buffers.get(device_id)) is None:
+            return []
+        return buffer.window(since, count)
+
+    def retain(self, device_ids: Iterable[int]) -> None:
+        """Drop the buffers of devices no longer on the server."""
+        keep = set(device_ids)
+        for device_id in [device_id for device_id in self._buffers if device_id not in keep]:
+            del self._buffers[device_id]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the size of the buffers for diagnostics."""
+        nbytes = sum(buffer.nbytes for buffer in self._buffers.values())
+        return {
+            "capacity": self.capacity,
+            "devices": len(self._buffers),
+            "fixes": sum(len(buffer) for buffer in self._buffers.values()),
+            "bytes": nbytes,
+            "bytes_per_device": nbytes // len(self._buffers) if self._buffers else None,
+        }
@@ -0,0 +1,222 @@
+"""Streaming segmentation of device fixes into trips and stops."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from .filters import distance
+
+# Traccar的速度单位是节
+KNOTS_TO_KMH = 1.852
+
+TRIP_START = "start"
+TRIP_END = "end"
+
+
+@dataclass(slots=True)
+class TripState:
+    """Constant-size segmentation state of one device.
+
+    While stopped, `anchor_*` is where the device stopped; it starts a trip
+    only once a fix is `min_distance` away from it, so GPS drift while
+    parked never does. While moving, `anchor_*` and `stop_since` hold a
+    candidate stop that ends the trip once it lasted `stop_duration`.
+    Times are UNIX timestamps.
+    """
+
+    moving: bool = False
+    anchor_lat: float | None = None
+    anchor_lng: float | None = None
+    stop_since: float | None = None
+    last_time: float | None = None
+    last_lat: float = 0.0
+    last_lng: float = 0.0
+    trip_start: float | None = None
+    start_lat: float = 0.0
+    start_lng: float = 0.0
+    distance: float = 0.0
+    max_speed: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the JSON-serializable form written to the store."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> TripState:
+        """Restore a state written by as_dict."""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+
+@dataclass(frozen=True, slots=True)
+class TripRecord:
+    """A finished or starting trip; start is None when it began before tracking."""
+
+    start_time: float | None
+    end_time: float | None
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float | None
+    end_longitude: float | None
+    distance: float
+    max_speed: float
+
+    @property
+    def duration(self) -> float | None:
+        """Return the duration in seconds of a finished trip."""
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def as_event_data(self) -> dict[str, Any]:
+        """Return the record as bus event data."""
+        return {
+            "start_time": _isoformat(self.start_time),
+            "end_time": _isoformat(self.end_time),
+            "start_latitude": self.start_latitude,
+            "start_longitude": self.start_longitude,
+            "end_latitude": self.end_latitude,
+            "end_longitude": self.end_longitude,
+            "distance": round(self.distance),
+            "duration": None if self.duration is None else round(self.duration),
+            "max_speed": round(self.max_speed, 1),
+        }
+
+
+class TripSegmenter:
+    """Turn each device's stream of fixes into trips.
+
+    A fix is stop evidence when the ignition or Traccar's motion flag is
+    off, or the speed is below `min_speed` km/h. A trip ends after
+    `stop_duration` seconds of stop evidence within `min_distance` meters
+    (also when no fix follows the first one), at once when the ignition
+    goes off, when two fixes are further apart in time than
+    `stop_duration` at less than `min_speed` on average (the stop fell
+    between polls), and when a moving device stops reporting for
+    `stale_timeout` seconds. Short halts at traffic lights end nothing.
+    """
+
+    def __init__(
+        self,
+        min_speed: float,
+        stop_duration: float,
+        min_distance: float,
+        stale_timeout: float,
+    ) -> None:
+        """Initialize the thresholds."""
+        self.min_speed = min_speed
+        self.stop_duration = stop_duration
+        self.min_distance = min_distance
+        self.stale_timeout = stale_timeout
+
+    def update(
+        self,
+        state: TripState,
+        time: float,
+        lat: float,
+        lng: float,
+        speed: float,
+        ignition: bool | None = None,
+        motion: bool | None = None,
+    ) -> list[tuple[str, TripRecord]]:
+        """Feed one fix (speed in km/h); return the trips started and ended by it."""
+        if state.last_time is not None and time <= state.last_time:
+            # Traccar重复返回同一个定位
+            return []
+        records = []
+        stop_evidence = ignition is False or motion is False or speed < self.min_speed
+        if state.last_time is None:
+            if state.moving:
+                # 重启前就在行驶，行程起点未知
+                state.trip_start = None
+                state.start_lat, state.start_lng = lat, lng
+                state.stop_since = time if stop_evidence else None
+                state.anchor_lat, state.anchor_lng = (lat, lng) if stop_evidence else (None, None)
+            else:
+                state.anchor_lat, state.anchor_lng = lat, lng
+                if state.stop_since is None:
+                    state.stop_since = time
+            self._remember(state, time, lat, lng)
+            return records
+
+        step = distance(state.last_lat, state.last_lng, lat, lng)
+        gap = time - state.last_time
+        # 长时间没有定位后出发，离开停车点的时间未知，按这次定位计
+        start_time = time if gap >= self.stop_duration else state.last_time
+        if state.moving:
+            if gap >= self.stop_duration and step / gap * 3.6 < self.min_speed:
+                # 两次定位之间停过车：停在上一个定位处，何时离开未知
+                records.append((TRIP_END, self._end(
+                    state, state.last_time, state.last_lat, state.last_lng)))
+            else:
+                state.distance += step
+                state.max_speed = max(state.max_speed, speed)
+                if not stop_evidence:
+                    state.stop_since = state.anchor_lat = state.anchor_lng = None
+                else:
+                    if state.stop_since is None or distance(
+                        state.anchor_lat, state.anchor_lng, lat, lng
+                    ) >= self.min_distance:
+                        # 缓行时重新开始计算停车时长
+                        state.stop_since = time
+                        state.anchor_lat, state.anchor_lng = lat, lng
+                    if ignition is False or time - state.stop_since >= self.stop_duration:
+                        records.append((TRIP_END, self._end(
+                            state, state.stop_since, state.anchor_lat, state.anchor_lng)))
+                self._remember(state, time, lat, lng)
+                return records
+
+        if ignition is not False and distance(
+            state.anchor_lat, state.anchor_lng, lat, lng
+        ) >= self.min_distance:
+            # 离开停车点足够远才算出发，停车时的GPS漂移不会开始行程
+            state.moving = True
+            state.trip_start = start_time
+            state.start_lat, state.start_lng = state.anchor_lat, state.anchor_lng
+            state.distance = distance(state.anchor_lat, state.anchor_lng, lat, lng)
+            state.max_speed = speed
+            state.stop_since = state.anchor_lat = state.anchor_lng = None
+            records.append((TRIP_START, TripRecord(
+                start_time, None, state.start_lat, state.start_lng, None, None, 0.0, 0.0)))
+        self._remember(state, time, lat, lng)
+        return records
+
+    def expire(self, state: TripState, now: float) -> TripRecord | None:
+        """End the trip of a moving device that has not reported for a while."""
+        if not state.moving or state.last_time is None:
+            return None
+        if state.stop_since is not None and now - state.stop_since >= self.stop_duration:
+            # 停下后再没有新的定位，停车时长按当前时间计算
+            return self._end(state, state.stop_since, state.anchor_lat, state.anchor_lng)
+        if now - state.last_time > self.stale_timeout:
+            # 设备到达后立即断电，停止的定位没有发出
+            return self._end(state, state.last_time, state.last_lat, state.last_lng)
+        return None
+
+    def _end(
+        self, state: TripState, time: float, lat: float, lng: float
+    ) -> TripRecord:
+        """Close the current trip at a stop."""
+        record = TripRecord(
+            state.trip_start, time, state.start_lat, state.start_lng,
+            lat, lng, state.distance, state.max_speed,
+        )
+        state.moving = False
+        state.stop_since = time
+        state.anchor_lat, state.anchor_lng = lat, lng
+        state.trip_start = None
+        state.distance = state.max_speed = 0.0
+        return record
+
+    @staticmethod
+    def _remember(state: TripState, time: float, lat: float, lng: float) -> None:
+        """Keep the fix as the last one seen."""
+        state.last_time = time
+        state.last_lat, state.last_lng = lat, lng
+
+
+def _isoformat(time: float | None) -> str | None:
+    """Return a timestamp as an ISO 8601 UTC string."""
+    if time is None:
+        return None
+    return datetime.fromtimestamp(time, timezone.utc).isoformat()
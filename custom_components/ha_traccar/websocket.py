@@ -0,0 +1,157 @@
+"""WebSocket push client for the Traccar server."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+import json
+import logging
+
+import aiohttp
+from pydantic import ValidationError
+from pytraccar import DeviceModel, PositionModel, ReportsEventeModel
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 300
+HEARTBEAT = 30
+LOGIN_TIMEOUT = 10
+
+
+class TraccarSocket:
+    """Keep a subscription to /api/socket open and hand over its messages.
+
+    The socket only delivers what changed, so `on_message` receives the
+    changed devices and positions and the new events. `on_connect` runs after every (re)connect
+    so the caller can resync whatever was missed while the socket was down.
+    It runs in its own task: the socket is read meanwhile, so its heartbeat
+    is answered however long the resync takes, and pushes arriving during
+    the resync are passed on as usual.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: aiohttp.ClientSession,
+        host: str,
+        port: int,
+        ssl: bool,
+        username: str,
+        password: str,
+        on_message: Callable[
+            [list[DeviceModel], list[PositionModel], list[ReportsEventeModel]],
+            Awaitable[None],
+        ],
+        on_connect: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Initialize the socket client."""
+        self._hass = hass
+        self._session = session
+        self._base_url = f"http{'s' if ssl else ''}://{host}:{port}/api"
+        self._socket_url = f"ws{'s' if ssl else ''}://{host}:{port}/api/socket"
+        self._username = username
+        self._password = password
+        self._on_message = on_message
+        self._on_connect = on_connect
+        self._task: asyncio.Task | None = None
+        self._resync: asyncio.Task | None = None
+        self.connected = False
+
+    @callback
+    def async_start(self) -> None:
+        """Start the background connection loop."""
+        self._task = self._hass.async_create_background_task(
+            self._async_run(), f"ha_traccar socket {self._socket_url}"
+        )
+
+    async def async_stop(self) -> None:
+        """Close the socket and stop reconnecting."""
+        if self._task is None:
+            return
+        for task in (self._task, self._resync):
+            if task is not None:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        self._task = self._resync = None
+        self.connected = False
+
+    async def _async_run(self) -> None:
+        """Connect, read until the socket drops, back off and try again."""
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await self._async_listen()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                _LOGGER.warning(
+                    "Traccar socket %s unavailable, falling back to polling: %s",
+                    self._socket_url,
+                    ex,
+                )
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected error on Traccar socket %s", self._socket_url)
+
+            if self.connected:
+                # 连接成功过，退避时间从最短间隔重新开始
+                self.connected = False
+                delay = RECONNECT_MIN_DELAY
+            _LOGGER.debug("Reconnecting to Traccar socket in %s s", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _async_login(self) -> str:
+        """Open a session and return the cookie the socket requires."""
+        async with self._session.post(
+            f"{self._base_url}/session",
+            data={"email": self._username, "password": self._password},
+            timeout=aiohttp.ClientTimeout(total=LOGIN_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            cookie = response.cookies.get("JSESSIONID")
+        if cookie is None:
+            raise aiohttp.ClientError("No session cookie returned by Traccar")
+        return f"JSESSIONID={cookie.value}"
+
+    async def _async_listen(self) -> None:
+        """Read messages from one socket connection."""
+        cookie = await self._async_login()
+        async with self._session.ws_connect(
+            self._socket_url,
+            headers={aiohttp.hdrs.COOKIE: cookie},
+            heartbeat=HEARTBEAT,
+        ) as ws:
+            _LOGGER.debug("Connected to Traccar socket %s", self._socket_url)
+            self.connected = True
+            # aiohttp只在读取时处理pong，同步期间不能停止读取，否则心跳超时断开
+            self._resync = self._hass.async_create_background_task(
+                self._on_connect(), f"ha_traccar socket resync {self._socket_url}"
+            )
+
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    await self._async_handle(msg.data)
+                elif msg.type == aiohttp.WSMsgType.ERROR:
+                    raise aiohttp.ClientError(f"Socket error: {ws.exception()}")
+
+        _LOGGER.debug("Traccar socket %s closed", self._socket_url)
+
+    async def _async_handle(self, text: str) -> None:
+        """Parse one message and pass on the changed devices, positions and events."""
+        try:
+            data = json.loads(text)
+            devices = [DeviceModel.parse_obj(item) for item in data.get("devices", [])]
+            positions = [
+                PositionModel.parse_obj(item) for item in data.get("positions", [])
+            ]
+            events = [
+                ReportsEventeModel.parse_obj(item) for item in data.get("events", [])
+            ]
+        except (ValueError, ValidationError) as ex:
+            _LOGGER.warning("Invalid message from Traccar socket: %s", ex)
+            return
+
+        if devices or positions or events:
+            await self._on_message(devices, positions, events)
@@ -0,0 +1,50 @@
+"""Helpers of the Traccar integration tests."""
+import asyncio
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.fake_traccar import FakeTraccarServer
+from custom_components.ha_traccar.const import DOMAIN
+from homeassistant.core import HomeAssistant
+
+
+async def async_wait_idle(hass: HomeAssistant, guard) -> None:
+    """Wait for the update in the background and the address lookups."""
+    while (
+        not guard.runs
+        or guard.running
+        or any(
+            task.get_name().startswith("ha_traccar geocode")
+            for task in hass._background_tasks
+        )
+    ):
+        await asyncio.sleep(0.01)
+    await hass.async_block_till_done()
+
+
+async def async_setup_traccar(
+    hass: HomeAssistant, server: FakeTraccarServer, **options: Any
+) -> MockConfigEntry:
+    """Set up a config entry polling the fake server, driven by the test."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "name": "test",
+            "host": "127.0.0.1",
+            "port": server.port,
+            "ssl": False,
+            "verify_ssl": False,
+            "username": "test",
+            "password": "test",
+            # 轮询由测试驱动
+            "scan_interval": 3600,
+            "slow_scan_interval": 0,
+            "attr_show": True,
+            "sensors": [],
+            **options,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    return entry
@@ -0,0 +1,23 @@
+"""Fixtures of the Traccar integration tests."""
+import pytest
+
+from benchmarks.fake_traccar import FakeFleet, FakeTraccarServer
+from custom_components.ha_traccar import geocoding
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load custom_components/ha_traccar in every test."""
+    yield
+
+
+@pytest.fixture
+async def fake_server(socket_enabled, monkeypatch):
+    """Start a fake Traccar server with a small fleet."""
+    server = FakeTraccarServer(FakeFleet(20, seed=3))
+    await server.async_start()
+    monkeypatch.setattr(geocoding, "BAIDU_GEOCODER_URL", f"http://127.0.0.1:{server.port}/geocoder")
+    yield server
+    await server.async_stop()
@@ -0,0 +1,45 @@
+"""Tests of the device tracker entities against the fake Traccar server."""
+from benchmarks.fake_traccar import FakeFleet
+from custom_components.ha_traccar.const import DOMAIN, UPDATE_GUARD
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .common import async_setup_traccar, async_wait_idle
+
+# 模拟的轮询间隔，秒
+STEP = 5
+
+
+async def test_writes_only_changed_trackers(hass: HomeAssistant, fake_server) -> None:
+    """Each poll writes the trackers of the devices that reported, and no others."""
+    written = []
+
+    @callback
+    def _state_changed(event: Event) -> None:
+        if event.data["entity_id"].startswith("device_tracker."):
+            written.append(event.data["new_state"].attributes["friendly_name"])
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+    entry = await async_setup_traccar(hass, fake_server)
+    guard = hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD]
+    await async_wait_idle(hass, guard)
+    assert len(set(written)) == 20
+
+    # 第一次查询的地址送达后不再有写入
+    written.clear()
+    await guard.async_call()
+    await async_wait_idle(hass, guard)
+    assert written == []
+
+    fleet = fake_server.fleet
+    for _ in range(2):
+        written.clear()
+        changed = fleet.step(STEP)
+        await guard.async_call(dt_util.utcnow())
+        await async_wait_idle(hass, guard)
+        assert 0 < len(changed) < len(fleet.vehicles)
+        assert sorted(written) == sorted(FakeFleet.device(vehicle)["name"] for vehicle in changed)
+
+    unsub()
+    assert await hass.config_entries.async_unload(entry.entry_id)
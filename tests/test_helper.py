@@ -0,0 +1,61 @@
+"""Tests of the batch coordinate transforms against the scalar ones."""
+import random
+
+import pytest
+
+from custom_components.ha_traccar import helper
+from custom_components.ha_traccar.helper import (
+    bd09_to_gcj02,
+    bd09_to_gcj02_batch,
+    gcj02_to_bd09,
+    gcj02_to_bd09_batch,
+    wgs84togcj02,
+    wgs84togcj02_batch,
+)
+
+# 允许的最大误差（度），约0.1毫米
+TOLERANCE = 1e-9
+
+
+def make_points(size):
+    """Return coordinates across China, every tenth one outside of it."""
+    rng = random.Random(size)
+    lngs = [rng.uniform(73.0, 135.0) for _ in range(size)]
+    lats = [rng.uniform(18.0, 53.0) for _ in range(size)]
+    for i in range(0, size, 10):
+        lngs[i], lats[i] = rng.uniform(-180.0, 70.0), rng.uniform(-60.0, 80.0)
+    return lngs, lats
+
+
+def assert_close(batch, points):
+    """Compare the batch result with the scalar points one by one."""
+    lngs, lats = batch
+    assert len(lngs) == len(lats) == len(points)
+    assert all(isinstance(value, float) for value in lngs + lats)
+    for (lng, lat), x, y in zip(points, lngs, lats):
+        assert abs(lng - x) < TOLERANCE and abs(lat - y) < TOLERANCE
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_path(request, monkeypatch):
+    """Run a test with and without numpy."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(helper, "np", None)
+    return request.param
+
+
+@pytest.mark.parametrize("size", [0, 1, helper.NUMPY_MIN_BATCH, 1000])
+def test_batch_matches_scalar(numpy_path, size) -> None:
+    """The batch transforms give the scalar results, as plain floats."""
+    lngs, lats = make_points(size)
+    gcj = [wgs84togcj02(lng, lat) for lng, lat in zip(lngs, lats)]
+    assert_close(wgs84togcj02_batch(lngs, lats), gcj)
+    bd = [gcj02_to_bd09(lng, lat) for lng, lat in gcj]
+    assert_close(gcj02_to_bd09_batch([p[0] for p in gcj], [p[1] for p in gcj]), bd)
+    back = bd09_to_gcj02_batch([p[0] for p in bd], [p[1] for p in bd])
+    assert_close(back, [bd09_to_gcj02(lng, lat) for lng, lat in bd])
+    # BD09反算GCJ02本身是近似的，误差在1e-5度（约1米）以内
+    for (lng, lat), x, y in zip(gcj, *back):
+        assert abs(lng - x) < 1e-5 and abs(lat - y) < 1e-5
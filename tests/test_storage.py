@@ -0,0 +1,56 @@
+"""Tests of what the integration writes to its stores."""
+from datetime import timedelta
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.ha_traccar.const import (
+    DOMAIN,
+    ENTITY_ATTRIBUTES,
+    UPDATE_GUARD,
+)
+from custom_components.ha_traccar.storage import (
+    SAVE_DELAY,
+    SNAPSHOT_STORAGE_KEY,
+    STORAGE_KEY,
+    TraccarStateStore,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .common import async_setup_traccar, async_wait_idle
+
+
+async def test_snapshots_written_on_unload(hass: HomeAssistant, fake_server, hass_storage) -> None:
+    """State saves leave out the snapshots; unloading writes them, trimmed."""
+    entry = await async_setup_traccar(hass, fake_server, tracker_attributes=["batteryLevel"])
+    guard = hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD]
+    await async_wait_idle(hass, guard)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert set(hass_storage[STORAGE_KEY]["data"]) == {"entries", "unassigned", "event_cursors"}
+    assert SNAPSHOT_STORAGE_KEY not in hass_storage
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    snapshots = hass_storage[SNAPSHOT_STORAGE_KEY]["data"][entry.entry_id]
+    assert len(snapshots) == len(fake_server.fleet.vehicles)
+    for snapshot in snapshots.values():
+        # 没有实体读取的sat、hdop不保存
+        assert set(snapshot["attributes"]) == {"batteryLevel", "motion", "ignition", "totalDistance"}
+
+
+async def test_snapshots_moved_out_of_state_store(hass: HomeAssistant, fake_server, hass_storage) -> None:
+    """Snapshots stored with the states by earlier versions move to their store."""
+    entry = await async_setup_traccar(hass, fake_server)
+    await async_wait_idle(hass, hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD])
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    snapshots = hass_storage.pop(SNAPSHOT_STORAGE_KEY)["data"]
+    hass_storage[STORAGE_KEY]["data"]["snapshots"] = snapshots
+
+    store = TraccarStateStore(hass)
+    await store.async_load()
+    assert len(store.async_get_snapshots(entry.entry_id, ENTITY_ATTRIBUTES)) == len(
+        fake_server.fleet.vehicles
+    )
+    await store.async_flush()
+    assert "snapshots" not in hass_storage[STORAGE_KEY]["data"]
+    assert hass_storage[SNAPSHOT_STORAGE_KEY]["data"].keys() == snapshots.keys()
@@ -0,0 +1,43 @@
+"""Tests of the per-device track ring buffers."""
+import pytest
+
+from custom_components.ha_traccar.track import BYTES_PER_FIX, TrackBuffer
+
+# track.py中给出的每台设备定位数据以外的开销，缓冲区对象加6个array
+BUFFER_OVERHEAD = 550
+
+
+def fill(buffer: TrackBuffer, start: int, count: int) -> None:
+    """Append `count` fixes, 10 s apart from `start`."""
+    for step in range(start, start + count):
+        assert buffer.append(10.0 * step, 31.2 + step * 1e-4, 121.5, 30.0, 90.0, 100.0 * step)
+
+
+@pytest.mark.parametrize("capacity", [30, 60, 120])
+def test_buffer_within_budget(capacity: int) -> None:
+    """A full buffer holds no more than the documented bytes."""
+    buffer = TrackBuffer(capacity)
+    empty = buffer.nbytes
+    fill(buffer, 0, capacity)
+    assert len(buffer) == capacity
+    assert buffer.nbytes == empty
+    assert buffer.nbytes <= BYTES_PER_FIX * capacity + BUFFER_OVERHEAD
+    # 写满后继续追加不再分配内存
+    fill(buffer, capacity, capacity // 2)
+    assert buffer.nbytes == empty
+
+
+def test_buffer_overwrites_oldest() -> None:
+    """Once full, each fix replaces the oldest one and order is kept."""
+    buffer = TrackBuffer(5)
+    fill(buffer, 0, 5)
+    assert [fix.time for fix in buffer.window()] == [0.0, 10.0, 20.0, 30.0, 40.0]
+
+    for step in range(5, 12):
+        fill(buffer, step, 1)
+        fixes = buffer.window()
+        assert len(fixes) == 5
+        assert [fix.time for fix in fixes] == [10.0 * back for back in range(step - 4, step + 1)]
+    assert [fix.total_distance for fix in fixes] == [700.0, 800.0, 900.0, 1000.0, 1100.0]
+    assert buffer.last_time == 110.0
+    assert [fix.time for fix in buffer.window(since=95.0, count=3)] == [100.0, 110.0]
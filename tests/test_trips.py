@@ -0,0 +1,50 @@
+"""Tests of the trip segmentation on the synthetic tracks."""
+import pytest
+
+from benchmarks.replay_trips import TRACKS, default_segmenter, read_track, replay
+from custom_components.ha_traccar.trips import TRIP_END, TRIP_START, TripState
+
+# 每条轨迹应切分出的行程数，轨迹说明见各文件第一行
+EXPECTED_TRIPS = {
+    "commute.csv": 1,
+    "sparse.csv": 2,
+    "delivery.csv": 3,
+    "poweroff.csv": 1,
+    "overnight.csv": 1,
+}
+
+
+def test_all_tracks_listed() -> None:
+    """Every track file has an expected trip count."""
+    assert sorted(path.name for path in TRACKS.glob("*.csv")) == sorted(EXPECTED_TRIPS)
+
+
+@pytest.mark.parametrize(("name", "trips"), EXPECTED_TRIPS.items())
+def test_track_trips(name: str, trips: int) -> None:
+    """Each track gives its trips, every start followed by its end."""
+    records = replay(read_track(TRACKS / name), default_segmenter())
+    assert [kind for kind, _ in records] == [TRIP_START, TRIP_END] * trips
+
+
+def test_trip_after_long_gap_starts_at_departure() -> None:
+    """A trip after a 10 h gap starts at the first fix away from the stop."""
+    fixes = read_track(TRACKS / "overnight.csv")
+    records = replay(fixes, default_segmenter())
+    (_, start), (_, end) = records
+    departure = next(
+        time for (time, *_), (last, *_) in zip(fixes[1:], fixes) if time - last >= 36000
+    )
+    assert start.start_time == end.start_time == departure
+    assert end.duration < 3600
+
+
+def test_long_gap_while_stopped() -> None:
+    """The time before the gap is not counted as driving."""
+    segmenter = default_segmenter()
+    state = TripState()
+    segmenter.update(state, 0, 31.2, 121.45, 0.0)
+    # 停车10小时后第一个定位已在500多米外
+    records = segmenter.update(state, 36000, 31.205, 121.45, 40.0)
+    assert [kind for kind, _ in records] == [TRIP_START]
+    assert records[0][1].start_time == 36000
+    assert state.trip_start == 36000
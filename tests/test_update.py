@@ -0,0 +1,120 @@
+"""Tests of the guarded update against the fake Traccar server."""
+import asyncio
+from datetime import timedelta
+import time
+from types import SimpleNamespace
+
+from freezegun import freeze_time
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from benchmarks.fake_traccar import FakeFleet
+from custom_components import ha_traccar
+from custom_components.ha_traccar import STALE_RUN_INTERVAL
+from custom_components.ha_traccar.const import DEVICE_INDEX, DOMAIN, SOCKET, UPDATE_GUARD
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .common import async_setup_traccar, async_wait_idle
+
+
+async def test_event_errors_do_not_stop_positions(hass: HomeAssistant, fake_server) -> None:
+    """A server without the reports API still gets its positions polled."""
+    # 模拟服务器没有/api/reports/events，查询返回404
+    entry = await async_setup_traccar(hass, fake_server, events=["all_events"])
+    guard = hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD]
+    await async_wait_idle(hass, guard)
+    assert guard.failures == 0
+
+    vehicle = fake_server.fleet.vehicles[0]
+    for _ in range(3):
+        fake_server.fleet.step(60)
+        await guard.async_call(dt_util.utcnow())
+        await async_wait_idle(hass, guard)
+    assert guard.stats["skipped"] == 0 and guard.failures == 0
+    assert fake_server.requests["positions"] == 4
+    state = hass.states.get(f"device_tracker.{FakeFleet.device(vehicle)['name']}")
+    assert state.attributes["latitude"] == vehicle.latitude
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_push_mode_ends_stale_trips(hass: HomeAssistant, fake_server) -> None:
+    """A pushed trip ends on a timer tick when its device stops reporting."""
+    trips = async_capture_events(hass, f"{DOMAIN}_trip_start")
+    ends = async_capture_events(hass, f"{DOMAIN}_trip_end")
+    entry = await async_setup_traccar(hass, fake_server, push=True)
+    guard = hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD]
+    socket = hass.data[DOMAIN][entry.entry_id][SOCKET]
+    await async_wait_idle(hass, guard)
+    assert socket.connected
+
+    fleet = fake_server.fleet
+    for _ in range(3):
+        changed = fleet.step(60)
+        await fake_server.async_push(changed)
+        # 等所有推送的位置都已处理
+        while any(
+            hass.states.get(f"device_tracker.{FakeFleet.device(vehicle)['name']}").attributes["latitude"]
+            != vehicle.latitude
+            for vehicle in changed
+        ):
+            await asyncio.sleep(0.01)
+        await hass.async_block_till_done()
+    assert trips
+    names = {event.data["device_name"] for event in trips}
+    assert any(
+        hass.states.get(f"device_tracker.{name}").attributes["runorstop"] == "run"
+        for name in names
+    )
+
+    # 设备到达后断电，不再有推送，下一次定时轮询时结束行程
+    with freeze_time(fleet.now + STALE_RUN_INTERVAL + timedelta(minutes=1)):
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=3600))
+        await hass.async_block_till_done()
+    assert sorted(event.data["device_traccar_id"] for event in ends) == sorted(
+        event.data["device_traccar_id"] for event in trips
+    )
+    for name in names:
+        assert hass.states.get(f"device_tracker.{name}").attributes["runorstop"] == "stop"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_status_refresh_interval(hass: HomeAssistant, fake_server, monkeypatch) -> None:
+    """The device status is polled at its own interval, keeping the models."""
+    # 地址查询的等待时间不固定，间隔按可控的单调时钟计算
+    offset = 0
+    monkeypatch.setattr(
+        ha_traccar,
+        "time",
+        SimpleNamespace(
+            monotonic=lambda: time.monotonic() + offset, perf_counter=time.perf_counter
+        ),
+    )
+    entry = await async_setup_traccar(hass, fake_server, status_refresh_interval=30)
+    guard = hass.data[DOMAIN][entry.entry_id][UPDATE_GUARD]
+    device_index = hass.data[DOMAIN][entry.entry_id][DEVICE_INDEX]
+    await async_wait_idle(hass, guard)
+    vehicle = fake_server.fleet.vehicles[0]
+    model = device_index.get(vehicle.id)
+    entity_id = f"device_tracker.{FakeFleet.device(vehicle)['name']}"
+    assert hass.states.get(entity_id).attributes["device_status"] == "online"
+
+    vehicle.status = "offline"
+    await guard.async_call(dt_util.utcnow())
+    await async_wait_idle(hass, guard)
+    assert fake_server.requests["devices"] == 1
+    assert hass.states.get(entity_id).attributes["device_status"] == "online"
+
+    offset = 30
+    await guard.async_call(dt_util.utcnow())
+    await async_wait_idle(hass, guard)
+    assert fake_server.requests["devices"] == 2
+    assert hass.states.get(entity_id).attributes["device_status"] == "offline"
+    # 只更新状态和最后更新时间，设备对象不替换
+    assert device_index.get(vehicle.id) is model and model.status == "offline"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,44 @@
+"""Tests of the push socket against the fake Traccar server."""
+import asyncio
+
+from benchmarks.fake_traccar import FakeTraccarServer
+from custom_components.ha_traccar.websocket import TraccarSocket
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+
+async def test_pushes_read_during_resync(hass: HomeAssistant, fake_server: FakeTraccarServer) -> None:
+    """A long resync does not stop the socket from being read."""
+    resync_done = asyncio.Event()
+    pushed = []
+
+    async def _on_connect() -> None:
+        await resync_done.wait()
+
+    async def _on_message(devices, positions, events) -> None:
+        pushed.extend(positions)
+
+    socket = TraccarSocket(
+        hass,
+        async_get_clientsession(hass),
+        "127.0.0.1",
+        fake_server.port,
+        False,
+        "test",
+        "test",
+        on_message=_on_message,
+        on_connect=_on_connect,
+    )
+    socket.async_start()
+    while not socket.connected:
+        await asyncio.sleep(0.01)
+    vehicle = fake_server.fleet.vehicles[0]
+    await fake_server.async_push([vehicle])
+    async with asyncio.timeout(5):
+        while not pushed:
+            await asyncio.sleep(0.01)
+    assert not resync_done.is_set()
+    assert pushed[0].device_id == vehicle.id
+
+    resync_done.set()
+    await socket.async_stop()